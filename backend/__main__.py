@@ -1,10 +1,11 @@
 import click
 from pathlib import Path
-import yaml
 import sys
 
-sys.path.insert(0, Path(__file__).parent)
-from app.models import SchemaConfig
+sys.path.insert(0, str(Path(__file__).parent))
+
+FORMATS = ["csv", "sqlite", "parquet", "duckdb", "arrow"]
+BACKENDS = ["pandas", "polars"]
 
 
 @click.group()
@@ -15,46 +16,133 @@ def cli():
 
 @cli.command()
 @click.argument("schema_name")
-@click.option("--rows", "-n", default=100000, help="Número de filas")
-@click.option("--output", "-o", default=None, help="Archivo de salida")
-def generate(schema_name: str, rows: int, output: str):
+@click.option("--rows", "-n", default=None, type=int, help="Número de filas (default: del schema)")
+@click.option(
+    "--output", "-o", default=None,
+    help="Archivo .csv, directorio (csv/parquet/arrow) o base de datos (sqlite/duckdb)",
+)
+@click.option(
+    "--format", "-f", "fmt", default="csv", type=click.Choice(FORMATS), help="Formato de salida",
+)
+@click.option("--seed", default=None, type=int, help="Semilla (default: del schema)")
+@click.option(
+    "--backend", "-b", default="pandas", type=click.Choice(BACKENDS),
+    help="Frames de salida (polars: escritores CSV/Parquet multihilo)",
+)
+@click.option("--profile", is_flag=True, help="Mostrar tiempos y memoria por etapa")
+@click.option(
+    "--resumable", is_flag=True,
+    help="Trabajo por bloques con manifest; re-ejecutar retoma tras un corte (csv/parquet)",
+)
+def generate(
+    schema_name: str, rows: int, output: str, fmt: str, seed: int, backend: str, profile: bool,
+    resumable: bool,
+):
     """Genera base sintética desde schema"""
-    from app.generators import CIE10Generator, DemographicsGenerator
-
-    schema_path = Path(f"schemas/{schema_name}.yaml")
-    if not schema_path.exists():
-        click.echo(f"✗ Schema no encontrado: {schema_path}")
+    from contextlib import nullcontext
+    from app import profiling, registry
+    from app.config import settings
+
+    try:
+        with profiling.profile() if profile else nullcontext() as profiler:
+            if resumable:
+                from app.jobs import GenerationJob
+
+                job = GenerationJob(
+                    schema_name, output, n=rows, seed=seed, format=fmt, backend=backend
+                )
+                written, output_path = job.run(), job.output
+            else:
+                output_path, written = registry.run(
+                    schema_name, n=rows, seed=seed, output=output, format=fmt, backend=backend
+                )
+    except FileNotFoundError:
+        click.echo(f"✗ Schema no encontrado: {schema_name}")
         return
+    except (ValueError, ImportError) as e:
+        click.echo(f"✗ {e}")
+        return
+
+    for table, n in written.items():
+        click.echo(f"✓ Generado: {n} filas ({table}) en {output_path or settings.DATABASE_URL}")
+    if profiler:
+        click.echo(profiler.summary())
 
-    with open(schema_path) as f:
-        config_data = yaml.safe_load(f)
-        config = SchemaConfig(**config_data)
 
-    n_rows = rows or config.n_rows
-    seed = config.seed
+@cli.group()
+def schemas():
+    """Schemas disponibles"""
+    pass
 
-    generators = {"cie10": CIE10Generator, "demographics": DemographicsGenerator}
 
-    generator_class = generators.get(schema_name)
-    if not generator_class:
-        click.echo(f"✗ Schema no soportado: {schema_name}")
-        return
+@schemas.command("list")
+def list_schemas():
+    """Lista schemas y si tienen generador registrado"""
+    from app import registry
 
-    generator = generator_class(seed=seed)
+    for summary in registry.schema_summaries():
+        mark = "✓" if summary["registered"] else "-"
+        name = f"{summary['category']}/{summary['name']}" if summary["category"] else summary["name"]
+        click.echo(f"{mark} {name:<32} {summary['description']}")
 
-    if schema_name == "cie10":
-        df = generator.generate(n_rows, config.columns[0].error_types)
-    else:
-        df = generator.generate(n_rows)
 
-    if not output:
-        output = f"data/output/{schema_name}.csv"
+@cli.command()
+@click.option("--patients", "-n", default=10000, help="Número de pacientes")
+@click.option(
+    "--output", "-o", default=None,
+    help="Directorio (csv/parquet) o base de datos (sqlite/duckdb)",
+)
+@click.option(
+    "--format", "-f", "fmt", default="csv",
+    type=click.Choice(FORMATS), help="Formato de salida",
+)
+@click.option("--seed", default=42, help="Semilla")
+@click.option("--chunk-size", default=50000, help="Pacientes por bloque")
+def cohort(patients: int, output: str, fmt: str, seed: int, chunk_size: int):
+    """Genera cohorte EHR (pacientes, encuentros, diagnósticos, laboratorio, ENO)"""
+    from app import registry
+    from app.cohort import CohortPipeline
+    from app.config import settings
+
+    if output is None and fmt != "sqlite":
+        output = registry.OUTPUT_DIR / ("cohort" + (".duckdb" if fmt == "duckdb" else ""))
+
+    pipeline = CohortPipeline(seed=seed, chunk_size=chunk_size)
+    rows = pipeline.run(patients, output, format=fmt)
+
+    for table, n in rows.items():
+        click.echo(f"✓ {table}: {n} filas")
+    click.echo(f"✓ Salida ({fmt}): {output or settings.DATABASE_URL}")
 
-    output_path = Path(output)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False)
 
-    click.echo(f"✓ Generado: {n_rows} filas en {output_path}")
+@cli.command()
+@click.option("--patients", "-n", default=10000, help="Número de pacientes")
+@click.option("--years", default=10, help="Años simulados")
+@click.option(
+    "--output", "-o", default=None,
+    help="Directorio (csv/parquet) o base de datos (sqlite/duckdb)",
+)
+@click.option(
+    "--format", "-f", "fmt", default="csv",
+    type=click.Choice(FORMATS), help="Formato de salida",
+)
+@click.option("--seed", default=42, help="Semilla")
+@click.option("--chunk-size", default=100000, help="Pacientes por bloque")
+def trajectories(patients: int, years: int, output: str, fmt: str, seed: int, chunk_size: int):
+    """Genera trayectorias longitudinales (Markov) de enfermedades crónicas"""
+    from app import registry
+    from app.config import settings
+    from app.trajectory import TrajectoryGenerator
+
+    if output is None and fmt != "sqlite":
+        output = registry.OUTPUT_DIR / ("trajectories" + (".duckdb" if fmt == "duckdb" else ""))
+
+    generator = TrajectoryGenerator(seed=seed, chunk_size=chunk_size)
+    rows = generator.run(patients, output, format=fmt, years=years)
+
+    for table, n in rows.items():
+        click.echo(f"✓ {table}: {n} filas")
+    click.echo(f"✓ Salida ({fmt}): {output or settings.DATABASE_URL}")
 
 
 if __name__ == "__main__":
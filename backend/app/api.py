@@ -1,24 +1,24 @@
-from fastapi import APIRouter, HTTPException
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+import itertools
+import json
+import math
 import yaml
-from pathlib import Path
 
-from .models import GenerationRequest, GenerationResponse, SchemaConfig
-from .generators import CIE10Generator, DemographicsGenerator
-from .epidemic_generators import EpidemicGenerator, SurvivalGenerator
-from .regression_generator import RegressionGenerator
+from .models import GenerationRequest, GenerationResponse, PreviewResponse
+from .config import settings
+from . import profiling, registry
 
 router = APIRouter()
-SCHEMAS_DIR = Path("schemas")
-
-GENERATORS = {"cie10": CIE10Generator, "demographics": DemographicsGenerator}
 
 
 @router.get("/schemas")
 async def list_schemas():
     """Lista schemas disponibles"""
     schemas = []
-    for yaml_file in SCHEMAS_DIR.glob("*.yaml"):
+    for yaml_file in registry.list_schemas():
         with open(yaml_file) as f:
             config = yaml.safe_load(f)
             schemas.append({"name": yaml_file.stem, "config": config})
@@ -28,64 +28,184 @@ async def list_schemas():
 @router.post("/generate")
 async def generate_data(request: GenerationRequest):
     """Genera base sintética"""
-    schema_path = SCHEMAS_DIR / f"{request.schema_name}.yaml"
-
-    if not schema_path.exists():
+    try:
+        config = registry.load_schema(request.schema_name)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Schema no encontrado")
 
-    with open(schema_path) as f:
-        config_data = yaml.safe_load(f)
-        config = SchemaConfig(**config_data)
+    if request.schema_name not in registry.REGISTRY:
+        raise HTTPException(status_code=400, detail="Schema no soportado")
 
-    n_rows = request.rows or config.n_rows
+    spec = registry.get_spec(request.schema_name)
+    n_rows = spec.size(config, request.rows)
     seed = request.seed or config.seed
 
-    generator_class = GENERATORS.get(request.schema_name)
-    if not generator_class:
+    try:
+        with profiling.profile() if request.profile else nullcontext() as profiler:
+            if request.resumable:
+                # Mismo request -> mismo directorio: reintentar retoma desde el manifest
+                from .jobs import GenerationJob
+
+                job = GenerationJob(
+                    request.schema_name, n=n_rows, seed=seed,
+                    format=request.output_format, config=config, backend=request.backend,
+                )
+                rows, output_path = job.run(), job.output
+            else:
+                output_path, rows = registry.run(
+                    request.schema_name, n=n_rows, seed=seed,
+                    format=request.output_format, config=config, backend=request.backend,
+                )
+    except (ValueError, ImportError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return GenerationResponse(
+        job_id=f"{request.schema_name}_{n_rows}_{seed}",
+        status="completed",
+        message=f"Generado {sum(rows.values())} filas en {output_path or settings.DATABASE_URL}",
+        profile=profiler.report() if profiler else None,
+    )
+
+
+@router.get("/arrow/{schema_name}")
+def stream_arrow(
+    schema_name: str,
+    rows: Optional[int] = None,
+    seed: Optional[int] = None,
+    table: Optional[str] = None,
+):
+    """
+    Genera un schema como stream IPC de Arrow (una tabla por stream).
+
+    Los bloques se envian a medida que se generan; `table` es obligatorio
+    en schemas multi-tabla (ej: cohort -> patients, encounters, ...).
+    """
+    from . import arrow_io
+
+    try:
+        config = registry.load_schema(schema_name)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Schema no encontrado")
+    if schema_name not in registry.REGISTRY:
         raise HTTPException(status_code=400, detail="Schema no soportado")
 
-    generator = generator_class(seed=seed)
+    spec = registry.get_spec(schema_name)
+    if table is None:
+        if spec.tables or spec.chunked:
+            raise HTTPException(status_code=400, detail="Se requiere table para schemas multi-tabla")
+        table = schema_name
 
-    if request.schema_name == "cie10":
-        df = generator.generate(n_rows, config.columns[0].error_types)
-    elif request.schema_name.startswith("epidemic") or request.schema_name == "timeseries_covid":
-        model_type = (
-            request.schema_name.split("_")[1] if request.schema_name.startswith("epidemic") else "sir"
-        )
-        params = config.get("parameters", {})
-        if model_type == "sir":
-            df = generator.sir(
-                n_days=n_rows,
-                population=params.get("population", 100000),
-                R0=params.get("R0", 2.5),
-                gamma=params.get("gamma", 0.1),
-            )
-        elif model_type == "seir":
-            df = generator.seir(
-                n_days=n_rows,
-                population=params.get("population", 100000),
-                R0=params.get("R0", 3.0),
-                sigma=params.get("sigma", 0.2),
-                gamma=params.get("gamma", 0.1),
-                latent_period=params.get("latent_period", 5),
-            )
-    elif request.schema_name.startswith("survival") or request.schema_name == "case_control":
-        params = config.get("parameters", {})
-        df = generator.kaplan_meier(
-            n_subjects=n_rows,
-            followup_days=params.get("max_followup", 1095),
-            event_rate=params.get("event_rate", 0.15),
+    try:
+        chunks = spec.iter_chunks(config, spec.size(config, rows), seed or config.seed)
+        batches = (batch for _, batch in arrow_io.iter_record_batches(chunks, table))
+        # El primer bloque se genera antes de responder para reportar errores con status
+        first = next(batches, None)
+    except (ValueError, ImportError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if first is None:
+        raise HTTPException(status_code=400, detail=f"Tabla no encontrada: {table}")
+
+    return StreamingResponse(
+        arrow_io.ipc_stream(itertools.chain([first], batches)),
+        media_type=arrow_io.MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{table}.arrows"'},
+    )
+
+
+@router.get("/preview/{schema_name}", response_model=PreviewResponse)
+def preview(
+    schema_name: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=settings.PREVIEW_MAX_PAGE_SIZE),
+    rows: Optional[int] = Query(None, ge=1, description="Tamano de la tabla (default: del schema)"),
+    seed: Optional[int] = None,
+):
+    """
+    Pagina de filas y estadisticas de la pagina, sin generar ni escribir la tabla.
+
+    Generadores con acceso aleatorio (`random_access`) solo generan los
+    bloques de la pagina: ni el tiempo ni los valores de una fila dependen
+    de `rows`. El resto genera la tabla completa en memoria por pagina
+    (solo si n <= settings.PREVIEW_MAX_ROWS) y la recorta; sus filas
+    pueden cambiar con `rows`.
+    """
+    try:
+        config = registry.load_schema(schema_name)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Schema no encontrado")
+    if schema_name not in registry.REGISTRY:
+        raise HTTPException(status_code=400, detail="Schema no soportado")
+
+    spec = registry.get_spec(schema_name)
+    seed = seed if seed is not None else config.seed
+    start = (page - 1) * page_size
+    try:
+        df, total = spec.rows(
+            config, start, start + page_size, n=rows, seed=seed,
+            max_rows=settings.PREVIEW_MAX_ROWS,
         )
-    else:
-        df = generator.generate(n_rows)
+    except (ValueError, ImportError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if df.empty:
+        raise HTTPException(status_code=404, detail=f"Pagina fuera de rango (total: {total} filas)")
+
+    return PreviewResponse(
+        schema_name=schema_name,
+        seed=seed,
+        total_rows=total,
+        page=page,
+        page_size=page_size,
+        pages=math.ceil(total / page_size),
+        random_access=spec.random_access,
+        rows=json.loads(df.to_json(orient="records", date_format="iso")),
+        stats=_summary(df),
+    )
+
+
+def _summary(df, top: int = 5) -> Dict[str, Dict[str, Any]]:
+    """Estadisticas por columna: numericas (media, sd, rango) o frecuencias"""
+    stats = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype.kind in "iuf":
+            described = series.describe()
+            stats[col] = {
+                key: None if math.isnan(value) else float(value)
+                for key, value in described[["count", "mean", "std", "min", "max"]].items()
+            }
+        else:
+            counts = series.astype(str).where(series.notna()).value_counts()
+            stats[col] = {
+                "count": int(series.notna().sum()),
+                "unique": int(len(counts)),
+                "top": {str(k): int(v) for k, v in counts.head(top).items()},
+            }
+    return stats
+
 
-    output_path = f"data/output/{request.schema_name}.csv"
-    output_path = Path(output_path)
+@router.post("/r/generate")
+def generate_r(request: GenerationRequest):
+    """Genera base con un generador R (worker Rscript persistente)"""
+    from .r_bridge import R_GENERATORS, RBridgeError, RGenerator
+
+    if not settings.R_ENABLED:
+        raise HTTPException(status_code=503, detail="Generadores R deshabilitados")
+    if request.schema_name not in R_GENERATORS:
+        raise HTTPException(status_code=404, detail="Generador R no encontrado")
+
+    n_rows = request.rows or settings.DEFAULT_ROWS
+    seed = request.seed or 42
+    try:
+        df = RGenerator(request.schema_name, seed=seed).generate(n_rows)
+    except (RBridgeError, ImportError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    output_path = registry.OUTPUT_DIR / f"{request.schema_name}_r.csv"
     output_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(output_path, index=False)
 
     return GenerationResponse(
-        job_id=f"{request.schema_name}_{n_rows}_{seed}",
+        job_id=f"{request.schema_name}_r_{n_rows}_{seed}",
         status="completed",
-        message=f"Generado {n_rows} filas en {output_path}",
+        message=f"Generado {len(df)} filas en {output_path}",
     )
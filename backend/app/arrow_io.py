@@ -0,0 +1,149 @@
+"""
+Salida Arrow nativa
+
+Convierte bloques de generadores en `pyarrow.RecordBatch` para que
+DuckDB, Polars o Spark los consuman sin pasar por CSV:
+- columnas `category` -> diccionario Arrow reutilizando los codigos
+- columnas de texto de baja cardinalidad (codigos CIE-10, regiones,
+  estados) -> diccionario
+- fechas sin hora -> date32
+- columnas numericas -> sin copia desde los arrays NumPy
+
+`ipc_stream()` serializa los batches como stream IPC de Arrow
+(`application/vnd.apache.arrow.stream`), usado por el endpoint
+`/arrow/{schema}` y por el formato de salida `arrow`.
+
+Requiere pyarrow.
+"""
+
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, Optional, Tuple
+import io
+import numpy as np
+import pandas as pd
+from . import profiling
+from .frames import Frame, is_polars
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Maximo de valores distintos / filas para codificar texto como diccionario
+DICTIONARY_RATIO = 0.5
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("La salida Arrow requiere pyarrow: pip install pyarrow") from e
+    return pa
+
+
+def _column(series: pd.Series, dictionary_ratio: float) -> "pa.Array":
+    """Columna pandas como array Arrow segun las reglas del modulo"""
+    pa = _pyarrow()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.array.codes
+        mask = codes < 0 if series.hasnans else None
+        return pa.DictionaryArray.from_arrays(
+            pa.array(codes, mask=mask), pa.array(series.cat.categories.to_numpy())
+        )
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.to_numpy()
+        valid = ~np.isnat(values)
+        days = values.astype("datetime64[D]")
+        if (days == values)[valid].all():
+            return pa.array(days, mask=~valid, type=pa.date32())
+        return pa.array(values, mask=~valid)
+    if pd.api.types.is_numeric_dtype(series) and not series.hasnans:
+        return pa.array(series.to_numpy())
+    array = pa.array(series, from_pandas=True)
+    if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+        encoded = array.dictionary_encode()
+        if len(encoded.dictionary) <= dictionary_ratio * len(array):
+            return encoded
+    return array
+
+
+def to_record_batch(
+    df: Frame,
+    schema: Optional["pa.Schema"] = None,
+    dictionary_ratio: float = DICTIONARY_RATIO,
+) -> "pa.RecordBatch":
+    """
+    Convierte un DataFrame en RecordBatch.
+
+    Args:
+        df: Bloque de datos (pandas, o polars: se usa su tabla Arrow tal cual)
+        schema: Schema al que ajustar el batch (ej: el del primer bloque de
+            un stream, que fija diccionario/tipos para los siguientes)
+        dictionary_ratio: Cardinalidad relativa maxima para codificar texto
+            como diccionario
+
+    Returns:
+        RecordBatch (columnas numericas y codigos comparten memoria con df)
+    """
+    pa = _pyarrow()
+    with profiling.span("arrow.batch"):
+        if is_polars(df):
+            table = df.to_arrow().combine_chunks()
+            arrays = [
+                col.chunk(0) if col.num_chunks else pa.array([], col.type) for col in table.columns
+            ]
+        else:
+            arrays = [_column(df[col], dictionary_ratio) for col in df.columns]
+        batch = pa.RecordBatch.from_arrays(arrays, names=[str(col) for col in df.columns])
+        if schema is not None and not batch.schema.equals(schema):
+            batch = batch.cast(schema)
+        return batch
+
+
+def iter_record_batches(
+    chunks: Iterable[Dict[str, pd.DataFrame]], table: Optional[str] = None
+) -> Iterator[Tuple[str, "pa.RecordBatch"]]:
+    """
+    Bloques multi-tabla como (tabla, RecordBatch).
+
+    El schema de cada tabla lo fija su primer bloque; los siguientes se
+    ajustan a el para poder escribirse en un mismo stream.
+
+    Args:
+        chunks: Bloques tabla -> DataFrame (ej: `GeneratorSpec.iter_chunks`)
+        table: Emitir solo esta tabla
+    """
+    schemas: Dict[str, "pa.Schema"] = {}
+    for tables in chunks:
+        for name, df in tables.items():
+            if table is not None and name != table:
+                continue
+            batch = to_record_batch(df, schemas.get(name))
+            schemas.setdefault(name, batch.schema)
+            yield name, batch
+
+
+def ipc_stream(batches: Iterable["pa.RecordBatch"]) -> Iterator[bytes]:
+    """
+    Serializa batches como stream IPC de Arrow, un fragmento por batch.
+
+    Todos los batches deben compartir schema (ver `iter_record_batches`).
+    Un iterable vacio no produce bytes.
+    """
+    pa = _pyarrow()
+    buffer = io.BytesIO()
+    writer = None
+    for batch in batches:
+        if writer is None:
+            writer = pa.ipc.new_stream(buffer, batch.schema)
+        writer.write_batch(batch)
+        yield _drain(buffer)
+    if writer is not None:
+        writer.close()
+        yield _drain(buffer)
+
+
+def _drain(buffer: io.BytesIO) -> bytes:
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
@@ -3,19 +3,366 @@ Clase base para generadores de datos sinteticos.
 
 Provee:
 - RNG local thread-safe (np.random.default_rng)
+- Muestreo categorico ponderado O(1) (metodo alias)
 - Validadores comunes
 - Interfaz abstracta
+- Instrumentacion de `generate()` (metricas y `profile=True`)
+- Buffers columnares preasignados (`ColumnBuffer`) para armar el
+  DataFrame/tabla Arrow de salida sin copiar columnas
+- Acceso aleatorio por bloques (`generate_rows`): cada bloque de
+  `BLOCK_SIZE` filas usa su propio stream Philox, reproducible sin generar
+  los bloques anteriores
 """
 
 from abc import ABC, abstractmethod
-from typing import Any
+from datetime import date
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Sequence, Tuple, Union
+import functools
+import time
 import numpy as np
 import pandas as pd
+from . import frames, profiling
+
+if TYPE_CHECKING:
+    import polars as pl
+    import pyarrow as pa
+
+
+def build_alias_table(weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Construye tabla alias de Vose para pesos no negativos.
+
+    Returns:
+        (prob, alias): probabilidad de aceptar la columna y columna alias
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    k = len(weights)
+    if k == 0 or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("Los pesos deben ser no negativos y sumar un valor positivo")
+
+    scaled = weights * (k / weights.sum())
+    prob = np.ones(k, dtype=np.float64)
+    alias = np.arange(k, dtype=np.int32)
+
+    small = list(np.flatnonzero(scaled < 1.0))
+    large = list(np.flatnonzero(scaled >= 1.0))
+    while small and large:
+        s = small.pop()
+        g = large[-1]
+        prob[s] = scaled[s]
+        alias[s] = g
+        scaled[g] = scaled[g] + scaled[s] - 1.0
+        if scaled[g] < 1.0:
+            large.pop()
+            small.append(g)
+
+    return prob, alias
+
+
+def sample_alias(
+    rng: np.random.Generator,
+    prob: np.ndarray,
+    alias: np.ndarray,
+    n: int,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Extrae n indices desde una tabla alias con un uniforme por extraccion.
+
+    Args:
+        out: Buffer entero de largo n donde escribir los indices (in-place)
+    """
+    k = len(prob)
+    scaled = rng.random(n)
+    scaled *= k
+    idx = np.empty(n, dtype=np.int64) if out is None else out
+    np.copyto(idx, scaled, casting="unsafe")
+    np.minimum(idx, k - 1, out=idx)
+    scaled -= idx
+    reject = scaled >= prob[idx]
+    np.copyto(idx, alias[idx], where=reject, casting="unsafe")
+    return idx
+
+
+def code_dtype(k: int) -> np.dtype:
+    """Entero con signo mas chico que indexa k categorias (codigos pandas)"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if k <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class CategoricalSampler:
+    """
+    Muestreador categorico con tabla alias precalculada.
+
+    Valida y normaliza las probabilidades una sola vez; cada `sample(n)`
+    cuesta un uniforme y una comparacion por extraccion.
+    """
+
+    def __init__(
+        self,
+        categories: Sequence,
+        p: Optional[Sequence[float]] = None,
+        rng: Optional[np.random.Generator] = None,
+    ):
+        """
+        Args:
+            categories: Valores posibles
+            p: Probabilidades (default: uniforme); se normalizan
+            rng: Generador por defecto para `sample`
+        """
+        self.categories = np.asarray(categories)
+        k = len(self.categories)
+        weights = np.ones(k) if p is None else np.asarray(p, dtype=np.float64)
+        if len(weights) != k:
+            raise ValueError(
+                f"p debe tener {k} elementos, recibido: {len(weights)}"
+            )
+        self.prob, self.alias = build_alias_table(weights)
+        self.p = weights / weights.sum()
+        self.rng = rng
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def sample(
+        self,
+        n: int,
+        rng: Optional[np.random.Generator] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Extrae n codigos enteros (indices sobre `categories`), opcionalmente en `out`"""
+        with profiling.span("rng.alias"):
+            return sample_alias(rng or self.rng, self.prob, self.alias, n, out)
+
+    def sample_values(
+        self, n: int, rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """Extrae n valores de `categories`"""
+        return self.categories[self.sample(n, rng)]
+
+
+class ColumnBuffer:
+    """
+    Buffers columnares preasignados para un bloque de n filas.
+
+    Los kernels del generador escriben directamente en los arrays
+    (`rng.random(out=...)`, ufuncs con `out=`); `to_frame()`,
+    `to_arrow()` y `to_polars()` envuelven los buffers sin copiarlos. Las
+    columnas categoricas guardan solo codigos enteros y se exponen como
+    `pd.Categorical` / diccionario Arrow, evitando materializar strings;
+    los IDs con prefijo (`ids`) se guardan como enteros y se formatean al
+    armar el frame. `build()` arma el frame del backend activo.
+
+    Uso:
+        buf = ColumnBuffer(n)
+        self.rng.standard_normal(out=buf.alloc("z"))
+        buf.categorical("sexo", self._sampler(["M", "F"]))
+        df = buf.build()
+    """
+
+    def __init__(self, n: int):
+        """
+        Args:
+            n: Filas del bloque
+        """
+        self.n = n
+        self.columns: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, np.ndarray] = {}
+        self.id_formats: Dict[str, Tuple[str, int]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def alloc(self, name: str, dtype: Any = np.float64) -> np.ndarray:
+        """Reserva (sin inicializar) y retorna el buffer de una columna"""
+        buffer = np.empty(self.n, dtype=dtype)
+        self.columns[name] = buffer
+        return buffer
+
+    def put(self, name: str, values: Any) -> np.ndarray:
+        """Registra un array ya calculado como columna (sin copiar si es ndarray)"""
+        values = np.asarray(values)
+        if values.shape != (self.n,):
+            raise ValueError(
+                f"Columna {name} debe tener forma ({self.n},), recibido: {values.shape}"
+            )
+        self.columns[name] = values
+        return values
+
+    def arange(self, name: str, start: int = 1) -> np.ndarray:
+        """Columna de IDs consecutivos start..start+n-1 (int64)"""
+        buffer = self.alloc(name, np.int64)
+        buffer[:] = np.arange(start, start + self.n, dtype=np.int64)
+        return buffer
+
+    def categorical(
+        self,
+        name: str,
+        sampler: "CategoricalSampler",
+        rng: Optional[np.random.Generator] = None,
+    ) -> np.ndarray:
+        """
+        Muestrea codigos de `sampler` (con `rng` o el RNG del sampler) en un
+        buffer entero compacto.
+
+        Si la columna ya fue reservada con `alloc` (para fijar el orden de
+        columnas antes de muestrear) se reutiliza ese buffer.
+        """
+        codes = self.columns.get(name)
+        if codes is None or codes.dtype.kind != "i":
+            codes = self.alloc(name, code_dtype(len(sampler)))
+        sampler.sample(self.n, rng, out=codes)
+        self.categories[name] = sampler.categories
+        return codes
+
+    def codes(self, name: str, codes: np.ndarray, categories: Sequence) -> np.ndarray:
+        """Registra codigos enteros ya muestreados (-1 = nulo) como columna categorica"""
+        self.put(name, codes)
+        self.categories[name] = np.asarray(categories)
+        return codes
+
+    def ids(self, name: str, prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+        """
+        Columna de IDs `{prefix}{numero:0{width}d}` guardada como enteros; se
+        formatea al armar el frame (NumPy en pandas, kernels Arrow en Arrow/Polars).
+        """
+        self.put(name, numbers)
+        self.id_formats[name] = (prefix, width)
+        return numbers
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame que comparte memoria con los buffers (un bloque por columna)"""
+        with profiling.span("dataframe"):
+            data = {}
+            for name, values in self.columns.items():
+                if name in self.categories:
+                    values = pd.Categorical.from_codes(
+                        values, self.categories[name], validate=False
+                    )
+                elif name in self.id_formats:
+                    prefix, width = self.id_formats[name]
+                    values = BaseGenerator._format_ids(prefix, values, width)
+                data[name] = values
+            return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self) -> "pa.Table":
+        """
+        Tabla Arrow; columnas numericas sin copia, categoricas como
+        diccionario y fechas datetime64[D] como date32
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+        except ImportError as e:
+            raise ImportError("ColumnBuffer.to_arrow requiere pyarrow: pip install pyarrow") from e
+
+        with profiling.span("arrow"):
+            arrays = []
+            for name, values in self.columns.items():
+                if name in self.categories:
+                    mask = values < 0
+                    array = pa.DictionaryArray.from_arrays(
+                        values, pa.array(self.categories[name]), mask=mask if mask.any() else None
+                    )
+                elif name in self.id_formats:
+                    prefix, width = self.id_formats[name]
+                    digits = pc.utf8_lpad(pc.cast(pa.array(values), pa.string()), width, "0")
+                    array = pc.binary_join_element_wise(prefix, digits, "")
+                else:
+                    array = pa.array(values)
+                arrays.append(array)
+            return pa.Table.from_arrays(arrays, names=list(self.columns))
+
+    def to_polars(self) -> "pl.DataFrame":
+        """polars.DataFrame sobre los mismos buffers (categoricas como pl.Categorical)"""
+        return frames._polars().from_arrow(self.to_arrow())
+
+    def build(self) -> "frames.Frame":
+        """Frame del backend activo (`frames.use_backend`): `to_frame` o `to_polars`"""
+        return self.to_polars() if frames.active_backend() == "polars" else self.to_frame()
+
+
+def _instrument(generate):
+    """
+    Envuelve `generate()` de un generador concreto.
+
+    Registra llamadas/filas/segundos en `profiling.METRICS`, abre el span
+    `<Clase>.generate` si hay perfil activo, acepta `profile=True` para
+    perfilar la llamada (resultado en `self.last_profile`) y
+    `backend="polars"` para retornar frames Polars: el backend queda activo
+    durante la llamada para los generadores con armado nativo y el resto
+    se convierte al terminar (ver `frames`).
+    """
+
+    @functools.wraps(generate)
+    def wrapper(self, n, *args, profile: bool = False, backend: str = "pandas", **kwargs):
+        if profile:
+            with profiling.profile() as profiler:
+                result = wrapper(self, n, *args, backend=backend, **kwargs)
+            self.last_profile = profiler
+            return result
+
+        name = type(self).__name__
+        start = time.perf_counter()
+        with frames.use_backend(backend), profiling.span(f"{name}.generate"):
+            result = generate(self, n, *args, **kwargs)
+            if backend != "pandas":
+                result = frames.convert(result, backend)
+        if isinstance(result, dict):
+            rows = sum(len(df) for df in result.values())
+        else:
+            rows = len(result) if hasattr(result, "__len__") else 0
+        profiling.METRICS.record_generate(name, rows, time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+class BlockRNG:
+    """
+    RNG de un bloque de acceso aleatorio con un sub-stream por llamada.
+
+    Cada llamada (`rng.random`, `rng.integers`, ...) extrae de su propio
+    stream Philox: el del bloque avanzado llamada * 2^64 extracciones. Como
+    NumPy genera cada valor en orden, las primeras k filas de una columna no
+    dependen de cuantas se pidan y un bloque puede generarse solo hasta la
+    ultima fila necesaria (`BaseGenerator._block_rows`).
+    """
+
+    def __init__(self, bit_generator: np.random.Philox):
+        self.bit_generator = bit_generator
+        self._calls = 0
+
+    def stream(self) -> np.random.Generator:
+        """Generador del siguiente sub-stream"""
+        bit_generator = np.random.Philox()
+        bit_generator.state = self.bit_generator.state
+        bit_generator.advance(self._calls << 64)
+        self._calls += 1
+        return np.random.Generator(bit_generator)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream(), name)
 
 
 class BaseGenerator(ABC):
     """Clase base abstracta para todos los generadores"""
 
+    # Filas por bloque en acceso aleatorio (cambiarlo cambia los datos generados)
+    BLOCK_SIZE = 65_536
+    # Fecha ISO que reemplaza a "hoy" (`set_reference_date`); None = reloj
+    reference_date: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "generate" in cls.__dict__ and not getattr(cls.generate, "__isabstractmethod__", False):
+            cls.generate = _instrument(cls.generate)
+
     def __init__(self, seed: int = 42):
         """
         Inicializa generador con RNG local.
@@ -25,6 +372,158 @@ class BaseGenerator(ABC):
         """
         self.rng = np.random.default_rng(seed)
         self.seed = seed
+        self._samplers: Dict[Tuple, CategoricalSampler] = {}
+        self.last_profile: Optional[profiling.Profiler] = None
+
+    def _sampler(
+        self, categories: Sequence, p: Optional[Sequence[float]] = None
+    ) -> CategoricalSampler:
+        """
+        Retorna muestreador alias para la distribucion (cacheado por instancia).
+
+        Args:
+            categories: Valores posibles
+            p: Probabilidades (default: uniforme)
+
+        Returns:
+            CategoricalSampler ligado al RNG del generador
+        """
+        key = (tuple(categories), None if p is None else tuple(p))
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            sampler = CategoricalSampler(categories, p, rng=self.rng)
+            self._samplers[key] = sampler
+        return sampler
+
+    def _today(self) -> date:
+        """Fecha de referencia para edades y fechas relativas (default: hoy)"""
+        return date.fromisoformat(self.reference_date) if self.reference_date else date.today()
+
+    def set_reference_date(self, value: Optional[str]) -> None:
+        """
+        Fija la fecha de referencia (ISO, None = hoy) del generador y sus
+        sub-generadores, para que la salida no dependa del reloj.
+        """
+        if value is not None:
+            date.fromisoformat(value)
+        self.reference_date = value
+        for sub in vars(self).values():
+            if isinstance(sub, BaseGenerator):
+                sub.set_reference_date(value)
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Estado mutable entre bloques, serializable a JSON.
+
+        Incluye el estado de los RNG, los atributos escalares (contadores de
+        claves) y, recursivamente, el de los sub-generadores. Restaurarlo
+        con `set_state` en una instancia nueva permite continuar
+        `iter_chunks` como si no se hubiera interrumpido.
+        """
+        state: Dict[str, Any] = {}
+        for key, value in vars(self).items():
+            if isinstance(value, np.random.Generator):
+                state[key] = {"rng": value.bit_generator.state}
+            elif isinstance(value, BaseGenerator):
+                state[key] = {"generator": value.get_state()}
+            elif isinstance(value, np.generic):
+                state[key] = value.item()
+            elif isinstance(value, (bool, int, float, str)):
+                state[key] = value
+        return state
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Restaura un estado de `get_state` (los RNG se actualizan in-place)"""
+        for key, value in state.items():
+            if isinstance(value, dict) and "rng" in value:
+                getattr(self, key).bit_generator.state = value["rng"]
+            elif isinstance(value, dict) and "generator" in value:
+                getattr(self, key).set_state(value["generator"])
+            else:
+                setattr(self, key, value)
+
+    @property
+    def random_access(self) -> bool:
+        """True si el generador implementa `_generate_block` (soporta `generate_rows`)"""
+        return type(self)._generate_block is not BaseGenerator._generate_block
+
+    def _block_rng(self, block: int) -> BlockRNG:
+        """
+        RNG del bloque `block`: Philox de la semilla avanzado block * 2^128
+        extracciones (salto O(1), streams sin solapamiento entre bloques),
+        con un sub-stream por llamada (`BlockRNG`).
+        """
+        return BlockRNG(np.random.Philox(self.seed).jumped(block))
+
+    def _generate_block(
+        self, rng: np.random.Generator, start: int, n: int, **kwargs
+    ) -> pd.DataFrame:
+        """
+        Genera las filas start..start+n-1 usando solo `rng`.
+
+        Los generadores con filas independientes lo implementan y su
+        `generate(n)` retorna `generate_rows(0, n)`, que lo llama por bloque
+        con `_block_rng(bloque)`: hay una sola tabla por semilla. Cada
+        columna debe extraerse con una llamada propia a `rng` para que las
+        filas no dependan de `n` (ver `BlockRNG`).
+        """
+        raise NotImplementedError
+
+    def generate_rows(self, start: int, stop: int, **kwargs) -> pd.DataFrame:
+        """
+        Filas [start, stop) de la tabla de la semilla.
+
+        Cada bloque de `BLOCK_SIZE` filas tiene su propio RNG Philox y se
+        genera solo hasta la ultima fila pedida, por lo que el costo es
+        O(filas pedidas + offset dentro del bloque) sin importar `start`, y
+        `generate_rows(a, c)` == concat(`generate_rows(a, b)`,
+        `generate_rows(b, c)`). `generate(n)` de los generadores con acceso
+        aleatorio es `generate_rows(0, n)`: no usa ni avanza `self.rng`, y
+        llamadas repetidas retornan la misma tabla.
+
+        Args:
+            start: Primera fila (0-indexada)
+            stop: Fila final (exclusiva)
+            **kwargs: Parametros de `generate()`
+
+        Returns:
+            DataFrame con stop - start filas (ids start+1..stop)
+        """
+        if not self.random_access:
+            raise ValueError(f"{type(self).__name__} no soporta acceso aleatorio por filas")
+        return self._block_rows(self._generate_block, start, stop, **kwargs)
+
+    def _block_rows(
+        self, block: Callable[..., pd.DataFrame], start: int, stop: int, **kwargs
+    ) -> pd.DataFrame:
+        """
+        Filas [start, stop) de la tabla por bloques de `block(rng, start, n, **kwargs)`.
+
+        Base de `generate_rows`; tambien la usan tablas auxiliares con filas
+        independientes (ej: poblacion fuente de casos-controles).
+        """
+        if not isinstance(start, int) or not isinstance(stop, int) or not 0 <= start < stop:
+            raise ValueError(f"Rango de filas invalido: [{start}, {stop})")
+
+        size = self.BLOCK_SIZE
+        parts = []
+        for index in range(start // size, (stop - 1) // size + 1):
+            first = index * size
+            rows = min(stop - first, size)
+            with profiling.span("generate.block"):
+                df = block(self._block_rng(index), first, rows, **kwargs)
+            parts.append(frames.slice_rows(df, max(start - first, 0), rows))
+        return frames.concat(parts)
+
+    @staticmethod
+    def _format_ids(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+        """
+        Formatea IDs `{prefix}{numero:0{width}d}` de forma vectorizada.
+
+        Numeros con mas digitos que `width` no se truncan.
+        """
+        with profiling.span("format_ids"):
+            return np.char.add(prefix, np.char.zfill(np.asarray(numbers).astype(str), width))
 
     def _validate_positive_int(self, value: int, name: str) -> None:
         """Valida que valor sea entero positivo"""
@@ -48,6 +547,23 @@ class BaseGenerator(ABC):
         if value[0] > value[1]:
             raise ValueError(f"{name} min > max: {value}")
 
+    def generate_arrow(
+        self, n: int, **kwargs
+    ) -> Union["pa.RecordBatch", Dict[str, "pa.RecordBatch"]]:
+        """
+        `generate()` como RecordBatch de Arrow (requiere pyarrow).
+
+        Categorias y codigos de texto van como diccionario y las fechas como
+        date32 (ver `arrow_io.to_record_batch`); los generadores multi-tabla
+        retornan tabla -> RecordBatch.
+        """
+        from .arrow_io import to_record_batch
+
+        result = self.generate(n, **kwargs)
+        if isinstance(result, dict):
+            return {table: to_record_batch(df) for table, df in result.items()}
+        return to_record_batch(result)
+
     @abstractmethod
     def generate(self, n: int, **kwargs) -> pd.DataFrame:
         """
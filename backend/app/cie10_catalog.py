@@ -0,0 +1,301 @@
+"""
+Catalogo CIE-10 compilado
+
+Carga el vocabulario CIE-10 desde un archivo de texto (un codigo por linea,
+peso opcional), lo compila una sola vez a una tabla binaria `.npy` y la
+abre como memory-map en cargas posteriores. La cache se valida por
+tamano y mtime del archivo fuente; el contenido se vuelve a hashear solo
+cuando estos cambian.
+
+La tabla compilada contiene por codigo:
+- codigo (U8), capitulo (1-22) y peso de frecuencia
+- peso acumulado (para busquedas por rango)
+- tabla alias (Vose) para muestreo ponderado O(1) por extraccion
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import hashlib
+import json
+import re
+import numpy as np
+from .base_generator import build_alias_table, sample_alias
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CATALOG_PATH = REPO_ROOT / "data" / "cie10_valid_codes.txt"
+CACHE_DIRNAME = ".cache"
+
+_CODE_RE = re.compile(r"^([A-Z]\d{2}(?:\.\d{1,2})?[A-Z]?)(?:\s+([0-9]*\.?[0-9]+(?:[eE][-+]?\d+)?))?\s*$")
+
+# Capitulos CIE-10 (OMS): (numero, primera categoria, ultima categoria)
+CHAPTERS: List[Tuple[int, str, str]] = [
+    (1, "A00", "B99"),
+    (2, "C00", "D48"),
+    (3, "D50", "D89"),
+    (4, "E00", "E90"),
+    (5, "F00", "F99"),
+    (6, "G00", "G99"),
+    (7, "H00", "H59"),
+    (8, "H60", "H95"),
+    (9, "I00", "I99"),
+    (10, "J00", "J99"),
+    (11, "K00", "K93"),
+    (12, "L00", "L99"),
+    (13, "M00", "M99"),
+    (14, "N00", "N99"),
+    (15, "O00", "O99"),
+    (16, "P00", "P96"),
+    (17, "Q00", "Q99"),
+    (18, "R00", "R99"),
+    (19, "S00", "T98"),
+    (20, "V01", "Y98"),
+    (21, "Z00", "Z99"),
+    (22, "U00", "U99"),
+]
+
+# Peso relativo aproximado de cada capitulo en egresos/atenciones.
+# Se reparte en partes iguales entre los codigos del capitulo que no
+# declaran peso propio.
+CHAPTER_WEIGHTS: Dict[int, float] = {
+    1: 4.0,
+    2: 6.0,
+    3: 1.0,
+    4: 7.0,
+    5: 5.0,
+    6: 3.0,
+    7: 1.5,
+    8: 1.5,
+    9: 11.0,
+    10: 10.0,
+    11: 10.0,
+    12: 2.0,
+    13: 7.0,
+    14: 5.0,
+    15: 8.0,
+    16: 1.0,
+    17: 0.5,
+    18: 6.0,
+    19: 7.0,
+    20: 0.5,
+    21: 2.0,
+    22: 1.0,
+}
+
+CATALOG_DTYPE = np.dtype(
+    [
+        ("code", "U8"),
+        ("chapter", "u1"),
+        ("weight", "f8"),
+        ("cum_weight", "f8"),
+        ("alias_prob", "f8"),
+        ("alias", "i4"),
+    ]
+)
+
+_CHAPTER_STARTS = sorted((start, number) for number, start, _ in CHAPTERS)
+_START_KEYS = np.array([s for s, _ in _CHAPTER_STARTS], dtype="S3")
+_START_CHAPTERS = np.array([c for _, c in _CHAPTER_STARTS], dtype=np.uint8)
+
+_LOADED: Dict[Tuple[str, int, int], "CIE10Catalog"] = {}
+
+
+def chapter_of(codes: np.ndarray) -> np.ndarray:
+    """Retorna numero de capitulo (1-22) para un array de codigos"""
+    blocks = np.asarray(codes).astype("S3")
+    pos = np.searchsorted(_START_KEYS, blocks, side="right") - 1
+    return _START_CHAPTERS[np.clip(pos, 0, None)]
+
+
+def parse_catalog(path: Path) -> Tuple[List[str], List[float]]:
+    """
+    Lee codigos y pesos desde archivo de texto.
+
+    Las lineas que no comienzan con un codigo CIE-10 (titulos, notas)
+    se ignoran. Un peso ausente se marca como NaN.
+    """
+    codes: List[str] = []
+    weights: List[float] = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = _CODE_RE.match(line.strip())
+            if not match or match.group(1) in seen:
+                continue
+            seen.add(match.group(1))
+            codes.append(match.group(1))
+            weights.append(float(match.group(2)) if match.group(2) else np.nan)
+    return codes, weights
+
+
+def compile_catalog(codes: List[str], weights: List[float]) -> np.ndarray:
+    """Compila codigos y pesos a la tabla estructurada CATALOG_DTYPE"""
+    if not codes:
+        raise ValueError("Catalogo CIE-10 vacio")
+
+    table = np.zeros(len(codes), dtype=CATALOG_DTYPE)
+    table["code"] = codes
+    table["chapter"] = chapter_of(table["code"])
+
+    weight = np.array(weights, dtype=np.float64)
+    missing = np.isnan(weight)
+    if missing.any():
+        chapters = table["chapter"].astype(np.int64)
+        per_chapter = np.bincount(chapters[missing], minlength=len(CHAPTERS) + 1)
+        chapter_weight = np.array(
+            [CHAPTER_WEIGHTS.get(c, 1.0) for c in range(len(CHAPTERS) + 1)]
+        )
+        weight[missing] = (
+            chapter_weight[chapters[missing]] / per_chapter[chapters[missing]]
+        )
+
+    table["weight"] = weight
+    table["cum_weight"] = np.cumsum(weight)
+    table["alias_prob"], table["alias"] = build_alias_table(weight)
+    return table
+
+
+class CIE10Catalog:
+    """Catalogo CIE-10 con jerarquia capitulo/bloque y muestreo alias"""
+
+    def __init__(self, table: np.ndarray, source: Optional[Path] = None):
+        self.table = table
+        self.source = source
+        self.codes = table["code"]
+        self.chapters = np.asarray(table["chapter"])
+        self._prob = np.asarray(table["alias_prob"])
+        self._alias = np.asarray(table["alias"])
+        self._chapter_tables: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @property
+    def blocks(self) -> np.ndarray:
+        """Categoria de 3 caracteres de cada codigo (ej: E11)"""
+        return self.codes.astype("U3")
+
+    def sample(
+        self, rng: np.random.Generator, n: int, chapter: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Muestrea n indices ponderados del catalogo.
+
+        Args:
+            rng: Generador aleatorio del llamador
+            n: Numero de extracciones
+            chapter: Restringir a un capitulo (1-22)
+
+        Returns:
+            Array de indices sobre `codes`
+        """
+        if chapter is None:
+            return sample_alias(rng, self._prob, self._alias, n)
+
+        members, prob, alias = self._chapter_table(chapter)
+        return members[sample_alias(rng, prob, alias, n)]
+
+    def sample_codes(
+        self, rng: np.random.Generator, n: int, chapter: Optional[int] = None
+    ) -> np.ndarray:
+        """Muestrea n codigos (strings) ponderados"""
+        return self.codes[self.sample(rng, n, chapter)]
+
+    def _chapter_table(self, chapter: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Tabla alias restringida a un capitulo (construida una vez)"""
+        if chapter not in self._chapter_tables:
+            members = np.flatnonzero(self.chapters == chapter)
+            if len(members) == 0:
+                raise ValueError(f"Capitulo sin codigos en catalogo: {chapter}")
+            prob, alias = build_alias_table(self.table["weight"][members])
+            self._chapter_tables[chapter] = (members, prob, alias)
+        return self._chapter_tables[chapter]
+
+
+def resolve_catalog_path(path: Optional[Union[str, Path]] = None) -> Path:
+    """Resuelve ruta del catalogo (relativa al cwd o a la raiz del repo)"""
+    if path is None:
+        return DEFAULT_CATALOG_PATH
+    path = Path(path)
+    if not path.is_absolute() and not path.exists():
+        path = REPO_ROOT / path
+    return path
+
+
+def _source_digest(path: Path, stat, cache_dir: Path, use_cache: bool) -> str:
+    """
+    Hash del contenido fuente, reutilizado mientras tamano y mtime no cambien.
+
+    El hash se guarda junto a la tabla compilada en `<nombre>.stat.json`.
+    """
+    stamp_path = cache_dir / f"{path.stem}.stat.json"
+    stamp = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if use_cache:
+        try:
+            saved = json.loads(stamp_path.read_text())
+            if {k: saved.get(k) for k in stamp} == stamp and saved.get("digest"):
+                return saved["digest"]
+        except (OSError, ValueError):
+            pass
+
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    if use_cache:
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            stamp_path.write_text(json.dumps({**stamp, "digest": digest}))
+        except OSError:
+            pass
+    return digest
+
+
+def load_catalog(
+    path: Optional[Union[str, Path]] = None, use_cache: bool = True
+) -> CIE10Catalog:
+    """
+    Carga catalogo CIE-10, compilandolo a `.npy` la primera vez.
+
+    La tabla compilada se guarda en `<dir>/.cache/<nombre>.<hash>.npy`
+    (hash del contenido fuente) y se abre con mmap en cargas posteriores;
+    el hash solo se recalcula si cambian tamano o mtime de la fuente.
+    Si el directorio no es escribible se usa la tabla en memoria.
+
+    Args:
+        path: Archivo fuente (default: data/cie10_valid_codes.txt)
+        use_cache: Usar/escribir la tabla compilada en disco
+
+    Returns:
+        CIE10Catalog
+    """
+    path = resolve_catalog_path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Catalogo CIE-10 no encontrado: {path}")
+
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    if key in _LOADED:
+        return _LOADED[key]
+
+    cache_dir = path.parent / CACHE_DIRNAME
+    digest = _source_digest(path, stat, cache_dir, use_cache)
+    cache_path = cache_dir / f"{path.stem}.{digest}.npy"
+    table = None
+    if use_cache and cache_path.exists():
+        table = np.load(cache_path, mmap_mode="r")
+        if table.dtype != CATALOG_DTYPE:  # cache de una version anterior
+            table = None
+
+    if table is None:
+        table = compile_catalog(*parse_catalog(path))
+        if use_cache:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_path.with_suffix(".tmp.npy")
+                np.save(tmp_path, table)
+                tmp_path.replace(cache_path)
+                table = np.load(cache_path, mmap_mode="r")
+            except OSError:
+                pass
+
+    catalog = CIE10Catalog(table, source=path)
+    _LOADED[key] = catalog
+    return catalog
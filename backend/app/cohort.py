@@ -0,0 +1,258 @@
+"""
+Pipeline de cohorte EHR sintetica
+
+Genera tablas vinculadas pacientes -> encuentros -> diagnosticos ->
+laboratorio / notificaciones ENO en bloques particionados por paciente. Cada bloque se
+escribe al destino antes de generar el siguiente, por lo que la memoria
+queda acotada por `chunk_size` y no por el tamano de la cohorte.
+
+Claves foraneas: patient_key y encounter_key (int64) son globales y
+consecutivas entre bloques; patient_id legible se renderiza al exportar.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .base_generator import BaseGenerator
+from . import profiling
+from .cie10_catalog import load_catalog
+from .patient_id import (
+    ENCOUNTER_TYPES,
+    LAB_PANELS,
+    MAX_FACILITIES,
+    LaboratoryGenerator,
+    PatientIDGenerator,
+)
+from .storage import concat_chunks, open_sink, write_chunks
+from .surveillance import NOTIFIABLE_DISEASES
+
+
+TABLES = ["patients", "encounters", "diagnoses", "labs", "notifications"]
+
+
+class CohortPipeline(BaseGenerator):
+    """Generador de cohorte EHR multi-tabla por bloques de pacientes"""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        chunk_size: int = 50_000,
+        catalog_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            seed: Semilla para reproducibilidad
+            chunk_size: Pacientes por bloque
+            catalog_path: Catalogo CIE-10 para diagnosticos
+        """
+        super().__init__(seed)
+        self._validate_positive_int(chunk_size, "chunk_size")
+        self.chunk_size = chunk_size
+        patient_seed, lab_seed = np.random.SeedSequence(seed).generate_state(2)
+        self.patients = PatientIDGenerator(seed=int(patient_seed))
+        self.labs = LaboratoryGenerator(seed=int(lab_seed))
+        self.catalog = load_catalog(catalog_path)
+        self._encounter_counter = 0
+
+    def generate(self, n: int, **kwargs) -> Dict[str, pd.DataFrame]:
+        """
+        Genera la cohorte completa en memoria.
+
+        Args:
+            n: Numero de pacientes
+            **kwargs: Parametros de `iter_chunks`
+
+        Returns:
+            Dict tabla -> DataFrame
+        """
+        return concat_chunks(self.iter_chunks(n, **kwargs))
+
+    def run(
+        self,
+        n_patients: int,
+        output: Union[str, Path, None] = None,
+        format: str = "csv",
+        sink=None,
+        **kwargs,
+    ) -> Dict[str, int]:
+        """
+        Genera la cohorte y la escribe bloque a bloque.
+
+        Args:
+            n_patients: Numero de pacientes
+            output: Directorio (csv/parquet) o base de datos (sqlite/duckdb)
+            format: Formato de salida si no se entrega `sink` (ver storage.SINKS)
+            sink: Destino con `write(tabla, df)` y `close()`
+            **kwargs: Parametros de `iter_chunks`
+
+        Returns:
+            Filas escritas por tabla
+        """
+        if sink is None:
+            sink = open_sink(format, output)
+        return write_chunks(self.iter_chunks(n_patients, **kwargs), sink)
+
+    def iter_chunks(
+        self,
+        n_patients: int,
+        encounters_per_patient: float = 4.0,
+        encounter_dispersion: float = 1.0,
+        diagnoses_per_encounter: float = 0.6,
+        lab_probability: float = 0.3,
+        date_range: Tuple[str, str] = ("2020-01-01", "2024-12-31"),
+        lab_panels: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, pd.DataFrame]]:
+        """
+        Genera la cohorte en bloques de `chunk_size` pacientes.
+
+        Las tablas se generan con `patient_key`; el `patient_id` legible se
+        agrega a patients al final de cada bloque, de modo que todo punto de
+        entrada (generate, run, registry, trabajos) escribe las mismas columnas.
+
+        Args:
+            n_patients: Numero de pacientes
+            encounters_per_patient: Media de encuentros por paciente
+            encounter_dispersion: Forma gamma de la heterogeneidad entre
+                pacientes (binomial negativa; menor = mas dispersion)
+            diagnoses_per_encounter: Media de diagnosticos secundarios
+            lab_probability: Probabilidad de panel de laboratorio por encuentro
+            date_range: Rango de fechas de encuentros
+            lab_panels: Paneles de laboratorio (default: todos)
+
+        Yields:
+            Dict tabla -> DataFrame del bloque
+        """
+        self._validate_positive_int(n_patients, "n_patients")
+        self.patients._check_keys(self.patients._counter + n_patients)
+        self._validate_positive_float(encounters_per_patient, "encounters_per_patient")
+        self._validate_positive_float(encounter_dispersion, "encounter_dispersion")
+        self._validate_probability(lab_probability, "lab_probability")
+        if lab_panels is None:
+            lab_panels = LAB_PANELS
+
+        start_day = np.datetime64(date_range[0], "D").astype(np.int64)
+        end_day = np.datetime64(date_range[1], "D").astype(np.int64)
+
+        for start in range(0, n_patients, self.chunk_size):
+            rows = min(self.chunk_size, n_patients - start)
+            with profiling.span("cohort.patients"):
+                patients = self.patients.generate_cohort(rows, render_ids=False)
+            with profiling.span("cohort.encounters"):
+                encounters = self._encounters(
+                    patients, encounters_per_patient, encounter_dispersion, start_day, end_day
+                )
+            with profiling.span("cohort.diagnoses"):
+                diagnoses = self._diagnoses(encounters, diagnoses_per_encounter)
+            with profiling.span("cohort.labs"):
+                labs = self._labs(encounters, lab_probability, lab_panels)
+            with profiling.span("cohort.notifications"):
+                notifications = self._notifications(patients, encounters, diagnoses)
+            with profiling.span("cohort.render_ids"):
+                patients.insert(1, "patient_id", self.patients.render_patient_ids(patients))
+            yield {
+                "patients": patients,
+                "encounters": encounters,
+                "diagnoses": diagnoses,
+                "labs": labs,
+                "notifications": notifications,
+            }
+
+    def _encounters(
+        self,
+        patients: pd.DataFrame,
+        mean: float,
+        dispersion: float,
+        start_day: int,
+        end_day: int,
+    ) -> pd.DataFrame:
+        """Encuentros por paciente (binomial negativa), fechas posteriores al nacimiento"""
+        n_patients = len(patients)
+        counts = self.rng.poisson(self.rng.gamma(dispersion, mean / dispersion, n_patients))
+        patient_idx = np.repeat(np.arange(n_patients), counts)
+        n = len(patient_idx)
+
+        keys = np.arange(self._encounter_counter, self._encounter_counter + n, dtype=np.int64)
+        self._encounter_counter += n
+
+        birth_day = patients["birth_date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        low = np.maximum(start_day, birth_day[patient_idx])
+        days = low + (self.rng.random(n) * (end_day - low + 1)).astype(np.int64)
+
+        return pd.DataFrame(
+            {
+                "encounter_key": keys,
+                "patient_key": patients["patient_key"].to_numpy()[patient_idx],
+                "encounter_date": days.astype("datetime64[D]"),
+                "encounter_type": self._sampler(
+                    ENCOUNTER_TYPES, [0.55, 0.2, 0.1, 0.15]
+                ).sample_values(n),
+                "facility_id": self._format_ids(
+                    "FAC-", self.rng.integers(1, MAX_FACILITIES + 1, n), 3
+                ),
+                "region": patients["region"].to_numpy()[patient_idx],
+            }
+        )
+
+    def _diagnoses(self, encounters: pd.DataFrame, mean_secondary: float) -> pd.DataFrame:
+        """Un diagnostico principal + Poisson(mean_secondary) secundarios por encuentro"""
+        n_dx = 1 + self.rng.poisson(mean_secondary, len(encounters))
+        enc_idx = np.repeat(np.arange(len(encounters)), n_dx)
+        starts = np.cumsum(n_dx) - n_dx
+        rank = np.arange(len(enc_idx)) - np.repeat(starts, n_dx) + 1
+
+        return pd.DataFrame(
+            {
+                "encounter_key": encounters["encounter_key"].to_numpy()[enc_idx],
+                "patient_key": encounters["patient_key"].to_numpy()[enc_idx],
+                "dx_rank": rank.astype(np.int16),
+                "cie10_code": self.catalog.sample_codes(self.rng, len(enc_idx)),
+            }
+        )
+
+    def _labs(
+        self, encounters: pd.DataFrame, probability: float, lab_panels: List[str]
+    ) -> pd.DataFrame:
+        """Panel de laboratorio en una fraccion de encuentros, fechado en el encuentro"""
+        enc_idx = np.flatnonzero(self.rng.random(len(encounters)) < probability)
+        panel_idx = self.labs._sampler(np.arange(len(lab_panels))).sample(len(enc_idx))
+        result_idx, tests = self.labs.expand_panels(panel_idx, lab_panels)
+        source = enc_idx[result_idx]
+
+        tests.insert(0, "encounter_key", encounters["encounter_key"].to_numpy()[source])
+        tests.insert(1, "patient_key", encounters["patient_key"].to_numpy()[source])
+        tests.insert(2, "test_date", encounters["encounter_date"].to_numpy()[source])
+        return tests
+
+    def _notifications(
+        self, patients: pd.DataFrame, encounters: pd.DataFrame, diagnoses: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Notificacion ENO por cada diagnostico de enfermedad notificable"""
+        eno_codes, names, urgencies = (np.array(col) for col in zip(*NOTIFIABLE_DISEASES))
+        eno_index = pd.Index(eno_codes)
+        codes = diagnoses["cie10_code"].to_numpy().astype(str)
+        disease = eno_index.get_indexer(codes)
+        by_block = eno_index.get_indexer(codes.astype("U3"))
+        disease = np.where(disease >= 0, disease, by_block)
+
+        dx_idx = np.flatnonzero(disease >= 0)
+        disease = disease[dx_idx]
+        enc_idx = pd.Index(encounters["encounter_key"]).get_indexer(
+            diagnoses["encounter_key"].to_numpy()[dx_idx]
+        )
+        patient_idx = pd.Index(patients["patient_key"]).get_indexer(
+            encounters["patient_key"].to_numpy()[enc_idx]
+        )
+        delay = self.rng.integers(0, 3, len(dx_idx)).astype("timedelta64[D]")
+
+        return pd.DataFrame(
+            {
+                "encounter_key": encounters["encounter_key"].to_numpy()[enc_idx],
+                "patient_key": encounters["patient_key"].to_numpy()[enc_idx],
+                "notification_date": encounters["encounter_date"].to_numpy()[enc_idx] + delay,
+                "disease_code": eno_codes[disease],
+                "disease_name": names[disease],
+                "urgency": urgencies[disease],
+                "region": patients["region"].to_numpy()[patient_idx],
+            }
+        )
@@ -0,0 +1,396 @@
+"""
+Indices de comorbilidad Charlson / Elixhauser
+
+Port vectorizado de R_scripts/generators/comorbid.R:
+- conjuntos de diagnosticos por paciente como arrays ragged
+  (`np.repeat` de ids + codigos concatenados)
+- categorias via lookup precomputado codigo -> categoria
+- presencia por paciente y categoria con `np.bincount` sobre
+  `paciente * n_categorias + categoria` (duplicados no suman)
+
+Pesos: Charlson (Quan 2005, pesos originales) y Elixhauser con
+puntaje van Walraven (2009).
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .base_generator import BaseGenerator
+from .cie10_catalog import load_catalog
+
+
+@dataclass
+class ComorbidityIndex:
+    """Definicion de un indice: codigos y peso por categoria, jerarquias"""
+
+    name: str
+    codes: Dict[str, List[str]]  # categoria -> codigos CIE-10 (completos o de 3 caracteres)
+    weights: Dict[str, int]
+    hierarchy: List[Tuple[str, str]]  # (categoria grave, categoria leve que anula)
+
+    def __post_init__(self):
+        self.categories = list(self.codes)
+        missing = set(self.categories) - set(self.weights)
+        if missing:
+            raise ValueError(f"{self.name}: categorias sin peso: {sorted(missing)}")
+        self._codes = np.array([c for cat in self.categories for c in self.codes[cat]])
+        self._code_category = np.repeat(
+            np.arange(len(self.categories)), [len(self.codes[c]) for c in self.categories]
+        )
+        self._index = pd.Index(self._codes)
+        if not self._index.is_unique:
+            raise ValueError(f"{self.name}: codigo asignado a mas de una categoria")
+        self.weight_vector = np.array([self.weights[c] for c in self.categories])
+        position = {c: i for i, c in enumerate(self.categories)}
+        self._hierarchy = [(position[hi], position[lo]) for hi, lo in self.hierarchy]
+
+    def lookup(self, codes: np.ndarray) -> np.ndarray:
+        """Categoria de cada codigo (-1 si no pertenece al indice)"""
+        codes = np.asarray(codes).astype(str)
+        pos = self._index.get_indexer(codes)
+        by_block = self._index.get_indexer(codes.astype("U3"))
+        pos = np.where(pos >= 0, pos, by_block)
+        return np.where(pos >= 0, self._code_category[np.maximum(pos, 0)], -1)
+
+    def flags(self, patient_idx: np.ndarray, category: np.ndarray, n_patients: int) -> np.ndarray:
+        """
+        Matriz (n_patients, n_categorias) de presencia con jerarquias aplicadas.
+
+        Args:
+            patient_idx: Indice 0..n_patients-1 de cada diagnostico
+            category: Categoria de cada diagnostico (de `lookup`)
+            n_patients: Numero de pacientes
+        """
+        k = len(self.categories)
+        mask = category >= 0
+        flat = patient_idx[mask].astype(np.int64) * k + category[mask]
+        present = np.bincount(flat, minlength=n_patients * k).reshape(n_patients, k) > 0
+        for severe, mild in self._hierarchy:
+            present[:, mild] &= ~present[:, severe]
+        return present
+
+    def score(self, present: np.ndarray) -> np.ndarray:
+        """Puntaje ponderado por paciente"""
+        return present.astype(np.int64) @ self.weight_vector
+
+
+CHARLSON = ComorbidityIndex(
+    name="charlson",
+    codes={
+        "mi": ["I21", "I22", "I25.2"],
+        "chf": ["I50", "I11.0", "I13.0", "I13.2", "I42.0", "I42.9"],
+        "pvd": ["I70", "I71", "I73.9", "I77.1", "K55.1", "Z95.8"],
+        "cevd": ["G45", "G46", "I60", "I61", "I62", "I63", "I64", "I69"],
+        "dementia": ["F00", "F01", "F02", "F03", "G30", "G31.1"],
+        "copd": ["J40", "J41", "J42", "J43", "J44", "J45", "J46", "J47"],
+        "rheumatic": ["M05", "M06", "M32", "M33", "M34", "M35.3"],
+        "pud": ["K25", "K26", "K27", "K28"],
+        "mild_liver": ["B18", "K70.3", "K73", "K74", "K76.0"],
+        "diab_nc": ["E10.0", "E10.1", "E10.9", "E11.0", "E11.1", "E11.9"],
+        "diab_c": ["E10.2", "E10.3", "E10.4", "E10.5", "E11.2", "E11.3", "E11.4", "E11.5"],
+        "hemiplegia": ["G81", "G82", "G83.4"],
+        "renal": ["N18", "N19", "N05.2", "Z49", "Z99.2"],
+        "cancer": ["C18", "C34", "C50", "C61", "C67", "C73", "C81", "C85", "C90", "C91"],
+        "severe_liver": ["I85", "K72.1", "K72.9", "K76.6", "K76.7"],
+        "metastatic": ["C77", "C78", "C79", "C80"],
+        "aids": ["B20", "B21", "B22", "B24"],
+    },
+    weights={
+        "mi": 1, "chf": 1, "pvd": 1, "cevd": 1, "dementia": 1, "copd": 1,
+        "rheumatic": 1, "pud": 1, "mild_liver": 1, "diab_nc": 1, "diab_c": 2,
+        "hemiplegia": 2, "renal": 2, "cancer": 2, "severe_liver": 3,
+        "metastatic": 6, "aids": 6,
+    },
+    hierarchy=[
+        ("diab_c", "diab_nc"),
+        ("severe_liver", "mild_liver"),
+        ("metastatic", "cancer"),
+    ],
+)
+
+ELIXHAUSER = ComorbidityIndex(
+    name="elixhauser",
+    codes={
+        "chf": ["I50", "I11.0", "I13.0", "I13.2", "I42"],
+        "arrhythmia": ["I44.1", "I47", "I48", "I49", "R00.1"],
+        "valvular": ["I05", "I06", "I34", "I35", "I36", "Q23"],
+        "pulm_circ": ["I26", "I27", "I28.0"],
+        "pvd": ["I70", "I71", "I73.9", "I77.1"],
+        "htn_unc": ["I10"],
+        "htn_c": ["I11.9", "I12", "I13.1", "I15"],
+        "paralysis": ["G81", "G82", "G83.4"],
+        "neuro": ["G10", "G20", "G35", "G40", "G41", "R56.8"],
+        "chronic_pulm": ["J40", "J41", "J42", "J43", "J44", "J45", "J47"],
+        "diab_unc": ["E10.9", "E11.9", "E10.0", "E11.0"],
+        "diab_c": ["E10.2", "E10.3", "E10.4", "E11.2", "E11.3", "E11.4"],
+        "hypothyroid": ["E00", "E01", "E02", "E03"],
+        "renal": ["N18", "N19", "Z49", "Z99.2"],
+        "liver": ["B18", "I85", "K70", "K72", "K73", "K74"],
+        "pud": ["K25.7", "K26.7", "K27.7", "K28.7"],
+        "aids": ["B20", "B21", "B22", "B24"],
+        "lymphoma": ["C81", "C82", "C83", "C84", "C85", "C88", "C90.0"],
+        "metastatic": ["C77", "C78", "C79", "C80"],
+        "solid_tumor": ["C18", "C34", "C50", "C61", "C67", "C73"],
+        "rheumatoid": ["M05", "M06", "M32", "M33", "M34", "M45"],
+        "coagulopathy": ["D65", "D66", "D67", "D68", "D69.1", "D69.3"],
+        "obesity": ["E66"],
+        "weight_loss": ["E40", "E41", "E43", "E44", "E46", "R63.4", "R64"],
+        "fluid_electrolyte": ["E86", "E87"],
+        "blood_loss_anemia": ["D50.0"],
+        "deficiency_anemia": ["D50.8", "D50.9", "D51", "D52", "D53"],
+        "alcohol": ["F10", "K70.0", "Z50.2"],
+        "drug": ["F11", "F12", "F13", "F14", "F15", "F16", "F18", "F19"],
+        "psychoses": ["F20", "F22", "F25", "F28", "F29"],
+        "depression": ["F20.4", "F31.3", "F32", "F33", "F34.1", "F41.2"],
+    },
+    weights={
+        "chf": 7, "arrhythmia": 5, "valvular": -1, "pulm_circ": 4, "pvd": 2,
+        "htn_unc": 0, "htn_c": 0, "paralysis": 7, "neuro": 6, "chronic_pulm": 3,
+        "diab_unc": 0, "diab_c": 0, "hypothyroid": 0, "renal": 5, "liver": 11,
+        "pud": 0, "aids": 0, "lymphoma": 9, "metastatic": 12, "solid_tumor": 4,
+        "rheumatoid": 0, "coagulopathy": 3, "obesity": -4, "weight_loss": 6,
+        "fluid_electrolyte": 5, "blood_loss_anemia": -2, "deficiency_anemia": -2,
+        "alcohol": 0, "drug": -7, "psychoses": 0, "depression": -3,
+    },
+    hierarchy=[
+        ("diab_c", "diab_unc"),
+        ("htn_c", "htn_unc"),
+        ("metastatic", "solid_tumor"),
+    ],
+)
+
+INDICES: Dict[str, ComorbidityIndex] = {"charlson": CHARLSON, "elixhauser": ELIXHAUSER}
+
+# Codigos representativos por categoria Charlson (pool de R_scripts/generators/comorbid.R)
+COMORBID_CODES: List[str] = [
+    "I21.0", "I21.1", "I21.2", "I21.9", "I25.2",
+    "I50.0", "I50.1", "I50.9", "I11.0", "I13.0",
+    "I70.0", "I70.1", "I70.2", "I71.0", "I71.1", "I73.9",
+    "G45.0", "G45.9", "I60.0", "I61.0", "I63.0",
+    "F00.0", "F01.0", "F03", "G30.0", "G30.1",
+    "J40", "J42", "J43.0", "J44.0", "J44.9",
+    "E10.0", "E10.1", "E10.9", "E11.0", "E11.9",
+    "E10.2", "E10.3", "E10.4", "E11.2", "E11.3",
+    "N18.1", "N18.2", "N18.3", "N18.4", "N18.5", "N19",
+    "C18.0", "C34.0", "C50.0", "C61", "C67.0", "C73",
+    "B20", "B21", "B22", "B23", "B24",
+]
+
+
+class ComorbidityGenerator(BaseGenerator):
+    """Generador de diagnosticos por paciente con indices Charlson/Elixhauser"""
+
+    def __init__(self, seed: int = 42, catalog_path: Optional[str] = None):
+        """
+        Args:
+            seed: Semilla para reproducibilidad
+            catalog_path: Catalogo CIE-10 para diagnosticos de fondo
+        """
+        super().__init__(seed)
+        self.catalog = load_catalog(catalog_path)
+        # Pool unico: codigos de comorbilidad + catalogo; categorias precomputadas
+        self.codes = pd.unique(np.concatenate([COMORBID_CODES, self.catalog.codes]))
+        self._catalog_pos = pd.Index(self.codes).get_indexer(self.catalog.codes)
+        self._categories = {name: index.lookup(self.codes) for name, index in INDICES.items()}
+
+    def generate(
+        self,
+        n: int,
+        codes_per_patient: Tuple[int, int] = (2, 6),
+        comorbid_fraction: float = 0.5,
+        indices: Tuple[str, ...] = ("charlson", "elixhauser"),
+        include_flags: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Genera pacientes con diagnosticos y sus indices de comorbilidad
+        (tabla de acceso aleatorio, ver `generate_rows`).
+
+        Args:
+            n: Numero de pacientes
+            codes_per_patient: Rango (min, max) de codigos por paciente
+            comorbid_fraction: Fraccion de codigos tomados del pool de
+                comorbilidades (el resto del catalogo CIE-10)
+            indices: Indices a calcular (charlson, elixhauser)
+            include_flags: Incluir columnas de presencia por categoria
+
+        Returns:
+            DataFrame con una fila por paciente
+        """
+        self._validate_positive_int(n, "n")
+        return self.generate_rows(
+            0, n, codes_per_patient=codes_per_patient, comorbid_fraction=comorbid_fraction,
+            indices=indices, include_flags=include_flags,
+        )
+
+    def _generate_block(
+        self,
+        rng: np.random.Generator,
+        start: int,
+        n: int,
+        codes_per_patient: Tuple[int, int] = (2, 6),
+        comorbid_fraction: float = 0.5,
+        indices: Tuple[str, ...] = ("charlson", "elixhauser"),
+        include_flags: bool = True,
+    ) -> pd.DataFrame:
+        """Pacientes start+1..start+n con `rng` (ver `generate`)"""
+        patient_idx, code_idx = self._sample_codes(rng, n, codes_per_patient, comorbid_fraction)
+        codes, counts = self._unique_codes(n, patient_idx, code_idx)
+
+        df = pd.DataFrame(
+            {"id": np.arange(start + 1, start + n + 1), "n_codes": counts, "codes": codes}
+        )
+        for name in indices:
+            df = pd.concat(
+                [df, self._index_columns(name, patient_idx, code_idx, n, include_flags)], axis=1
+            )
+        return df
+
+    def generate_diagnoses(
+        self,
+        n: int,
+        codes_per_patient: Tuple[int, int] = (2, 6),
+        comorbid_fraction: float = 0.5,
+    ) -> pd.DataFrame:
+        """
+        Genera diagnosticos en formato largo (id, diag), sin duplicados
+        por paciente, como `generate_comorbid_base()` en R. Son los
+        diagnosticos de `generate(n)` (columna `codes`) en formato largo.
+
+        Args:
+            n: Numero de pacientes
+            codes_per_patient: Rango (min, max) de codigos por paciente
+            comorbid_fraction: Fraccion de codigos del pool de comorbilidades
+
+        Returns:
+            DataFrame con columnas id, diag
+        """
+        self._validate_positive_int(n, "n")
+        size = self.BLOCK_SIZE
+        parts = []
+        for first in range(0, n, size):
+            # Mismos bloques (y diagnosticos) que `generate`
+            patient_idx, code_idx = self._sample_codes(
+                self._block_rng(first // size), min(size, n - first),
+                codes_per_patient, comorbid_fraction,
+            )
+            key = self._unique_keys(patient_idx, code_idx)
+            parts.append(
+                pd.DataFrame(
+                    {
+                        "id": key // len(self.codes) + first + 1,
+                        "diag": self.codes[key % len(self.codes)],
+                    }
+                )
+            )
+        return pd.concat(parts, ignore_index=True)
+
+    def score(
+        self,
+        diagnoses: pd.DataFrame,
+        id_col: str = "id",
+        code_col: str = "diag",
+        indices: Tuple[str, ...] = ("charlson", "elixhauser"),
+        include_flags: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Calcula indices de comorbilidad desde una tabla larga de diagnosticos
+        (ej: `generate_diagnoses()` o la tabla diagnoses de CohortPipeline).
+
+        Args:
+            diagnoses: DataFrame con un diagnostico por fila
+            id_col: Columna de paciente
+            code_col: Columna de codigo CIE-10
+            indices: Indices a calcular
+            include_flags: Incluir columnas de presencia por categoria
+
+        Returns:
+            DataFrame con una fila por paciente
+        """
+        for col in (id_col, code_col):
+            if col not in diagnoses.columns:
+                raise ValueError(f"Columna no encontrada: {col}")
+
+        patient_idx, ids = pd.factorize(diagnoses[id_col], sort=True)
+        codes = diagnoses[code_col].to_numpy().astype(str)
+        n = len(ids)
+
+        df = pd.DataFrame({id_col: ids})
+        for name in indices:
+            index = self._index(name)
+            present = index.flags(patient_idx, index.lookup(codes), n)
+            df = pd.concat([df, self._format_index(index, present, include_flags)], axis=1)
+        return df
+
+    def _sample_codes(
+        self,
+        rng: np.random.Generator,
+        n: int,
+        codes_per_patient: Tuple[int, int],
+        comorbid_fraction: float,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Arrays ragged (paciente, codigo) de todos los diagnosticos con `rng`"""
+        self._validate_positive_int(n, "n")
+        self._validate_probability(comorbid_fraction, "comorbid_fraction")
+        codes_per_patient = tuple(codes_per_patient)
+        self._validate_range(codes_per_patient, "codes_per_patient")
+        low, high = codes_per_patient
+        self._validate_positive_int(low, "codes_per_patient[0]")
+
+        n_codes = rng.integers(low, high + 1, n)
+        patient_idx = np.repeat(np.arange(n), n_codes)
+        total = len(patient_idx)
+
+        from_comorbid = rng.random(total) < comorbid_fraction
+        code_idx = self._catalog_pos[self.catalog.sample(rng, total)]
+        n_comorbid = int(from_comorbid.sum())
+        code_idx[from_comorbid] = rng.integers(0, len(COMORBID_CODES), n_comorbid)
+        return patient_idx, code_idx
+
+    def _unique_keys(self, patient_idx: np.ndarray, code_idx: np.ndarray) -> np.ndarray:
+        """Claves paciente*n_codigos+codigo ordenadas y sin duplicados"""
+        key = np.sort(patient_idx.astype(np.int64) * len(self.codes) + code_idx)
+        return key[np.r_[True, key[1:] != key[:-1]]]
+
+    def _unique_codes(
+        self, n: int, patient_idx: np.ndarray, code_idx: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Codigos unicos por paciente unidos por ';' y su cantidad"""
+        key = self._unique_keys(patient_idx, code_idx)
+        patients = key // len(self.codes)
+        counts = np.bincount(patients, minlength=n)
+        # Todo paciente tiene >= 1 codigo: concatenacion por tramos con reduceat
+        items = self.codes.astype(object)[key % len(self.codes)] + ";"
+        starts = np.cumsum(counts) - counts
+        joined = np.add.reduceat(items, starts)
+        return np.array([s[:-1] for s in joined], dtype=object), counts
+
+    def _index(self, name: str) -> ComorbidityIndex:
+        if name not in INDICES:
+            raise ValueError(f"Indice no soportado: {name}. Opciones: {list(INDICES)}")
+        return INDICES[name]
+
+    def _index_columns(
+        self,
+        name: str,
+        patient_idx: np.ndarray,
+        code_idx: np.ndarray,
+        n: int,
+        include_flags: bool,
+    ) -> pd.DataFrame:
+        index = self._index(name)
+        present = index.flags(patient_idx, self._categories[name][code_idx], n)
+        return self._format_index(index, present, include_flags)
+
+    @staticmethod
+    def _format_index(
+        index: ComorbidityIndex, present: np.ndarray, include_flags: bool
+    ) -> pd.DataFrame:
+        """Columnas de salida: flags opcionales, conteo e indice ponderado"""
+        columns = {}
+        if include_flags:
+            for j, category in enumerate(index.categories):
+                columns[f"{index.name}_{category}"] = present[:, j].astype(np.int8)
+        columns[f"{index.name}_count"] = present.sum(axis=1)
+        columns[f"{index.name}_index"] = index.score(present)
+        return pd.DataFrame(columns)
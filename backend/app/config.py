@@ -20,6 +20,11 @@ class Settings(BaseSettings):
     MAX_ROWS_PER_JOB: int = 10_000_000
     DEFAULT_ROWS: int = 100_000
 
+    # Preview
+    PREVIEW_MAX_PAGE_SIZE: int = 1_000
+    # Tamano maximo de tabla para previsualizar generadores sin acceso aleatorio
+    PREVIEW_MAX_ROWS: int = 100_000
+
     class Config:
         env_file = ".env"
 
@@ -1,7 +1,69 @@
-from typing import List
+from typing import Dict, Iterator, List, Optional
 import numpy as np
 import pandas as pd
-from .base_generator import BaseGenerator
+from .base_generator import BaseGenerator, ColumnBuffer, code_dtype
+
+
+DISTRIBUTIONS = ["exponential", "weibull", "loglogistic", "piecewise"]
+
+# Riesgo por causa: distribucion basal (tiempos en dias) y hazard ratios
+DEFAULT_CAUSES: Dict[str, dict] = {
+    "event": {
+        "distribution": "weibull",
+        "scale": 2500.0,
+        "shape": 1.2,
+        "hr": {"age": 1.02, "sex_M": 1.2, "treatment_B": 0.75},
+    },
+}
+
+
+def inverse_cumulative_hazard(x: np.ndarray, spec: dict) -> np.ndarray:
+    """
+    Tiempo t tal que H(t) = x para la distribucion basal de `spec`.
+
+    Distribuciones (t en dias):
+    - exponential: H(t) = rate * t
+    - weibull:     H(t) = (t / scale)^shape
+    - loglogistic: H(t) = log(1 + (t / scale)^shape)
+    - piecewise:   exponencial por tramos, `rates[j]` en [breaks[j], breaks[j+1]);
+      el ultimo tramo se extiende sin limite
+
+    Args:
+        x: Hazard acumulada objetivo (>= 0)
+        spec: Dict con `distribution` y sus parametros
+
+    Returns:
+        Array de tiempos (inf si la hazard no alcanza x)
+    """
+    distribution = spec.get("distribution", "weibull")
+    x = np.asarray(x, dtype=np.float64)
+
+    if distribution == "exponential":
+        rate = float(spec["rate"])
+        if rate < 0:
+            raise ValueError(f"rate debe ser >= 0, recibido: {rate}")
+        with np.errstate(divide="ignore"):
+            return x / rate
+    if distribution in ("weibull", "loglogistic"):
+        scale, shape = float(spec["scale"]), float(spec["shape"])
+        if scale <= 0 or shape <= 0:
+            raise ValueError(f"scale y shape deben ser positivos: {spec}")
+        base = x if distribution == "weibull" else np.expm1(x)
+        return scale * np.power(base, 1.0 / shape)
+    if distribution == "piecewise":
+        breaks = np.asarray(spec["breaks"], dtype=np.float64)
+        rates = np.asarray(spec["rates"], dtype=np.float64)
+        if len(breaks) != len(rates) or breaks[0] != 0 or (np.diff(breaks) <= 0).any():
+            raise ValueError("piecewise: breaks debe iniciar en 0, ser creciente y tener un rate por tramo")
+        if (rates < 0).any():
+            raise ValueError("piecewise: rates deben ser >= 0")
+        cum = np.concatenate([[0.0], np.cumsum(rates[:-1] * np.diff(breaks))])
+        piece = np.searchsorted(cum, x, side="right") - 1
+        # Tramos con rate 0 no avanzan la hazard: se salta al siguiente con rate > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            time = breaks[piece] + (x - cum[piece]) / rates[piece]
+        return np.where(np.isnan(time), np.inf, time)
+    raise ValueError(f"Distribucion no soportada: {distribution}. Opciones: {DISTRIBUTIONS}")
 
 
 class EpidemicGenerator(BaseGenerator):
@@ -118,19 +180,32 @@ class SurvivalGenerator(BaseGenerator):
     def __init__(self, seed: int = 42):
         super().__init__(seed)
 
-    def generate(self, n: int, **kwargs) -> pd.DataFrame:
+    def generate(self, n: int, model: str = "kaplan_meier", **kwargs) -> pd.DataFrame:
         """
-        Genera datos de supervivencia.
+        Genera datos de supervivencia (tabla de acceso aleatorio, ver `generate_rows`).
 
         Args:
             n: Numero de sujetos
-            **kwargs: Parametros adicionales
+            model: 'kaplan_meier' (exponencial simple) o 'parametric'
+                (ver `simulate`)
+            **kwargs: Parametros del modelo
 
         Returns:
-            DataFrame con datos Kaplan-Meier
+            DataFrame con tiempos de seguimiento y eventos
         """
-        return self.kaplan_meier(
-            n_subjects=n,
+        self._validate_positive_int(n, "n")
+        return self.generate_rows(0, n, model=model, **kwargs)
+
+    def _generate_block(
+        self, rng: np.random.Generator, start: int, n: int, model: str = "kaplan_meier", **kwargs
+    ) -> pd.DataFrame:
+        """Sujetos start+1..start+n del modelo con `rng` (ver `generate`)"""
+        if model == "parametric":
+            return self._simulate(rng, n, first_id=start + 1, **kwargs)
+        if model != "kaplan_meier":
+            raise ValueError(f"Modelo no soportado: {model}")
+        return self._kaplan_meier(
+            rng, start, n,
             followup_days=kwargs.get("followup_days", 1095),
             event_rate=kwargs.get("event_rate", 0.15),
         )
@@ -138,26 +213,205 @@ class SurvivalGenerator(BaseGenerator):
     def kaplan_meier(
         self, n_subjects: int, followup_days: int, event_rate: float
     ) -> pd.DataFrame:
-        """Genera datos para Kaplan-Meier"""
+        """
+        Genera datos para Kaplan-Meier.
+
+        Tiempos exponenciales con tasa -log(1 - event_rate) / followup_days,
+        de modo que P(T <= followup_days) = event_rate. El evento se observa
+        solo si ocurre dentro del seguimiento. Igual a
+        `generate(n_subjects, model="kaplan_meier", ...)`.
+        """
         self._validate_positive_int(n_subjects, "n_subjects")
+        return self.generate(
+            n_subjects, model="kaplan_meier", followup_days=followup_days, event_rate=event_rate
+        )
+
+    def _kaplan_meier(
+        self,
+        rng: np.random.Generator,
+        start: int,
+        n: int,
+        followup_days: int,
+        event_rate: float,
+    ) -> pd.DataFrame:
+        """Sujetos start+1..start+n de `kaplan_meier` con `rng`"""
         self._validate_positive_int(followup_days, "followup_days")
         self._validate_probability(event_rate, "event_rate")
 
-        times = self.rng.exponential(scale=200, size=n_subjects)
-        events = self.rng.binomial(1, event_rate, n_subjects)
-        censored = 1 - events
+        buf = ColumnBuffer(n)
+        buf.arange("subject_id", start + 1)
+        ages = buf.alloc("age", np.int64)
+        sex = self._sampler(["M", "F"])
+        buf.alloc("sex", code_dtype(len(sex)))
+        followup = buf.alloc("followup_days")
+        events = buf.alloc("event", np.int64)
+        censored = buf.alloc("censored", np.int64)
+
+        rate = -np.log1p(-min(event_rate, 1 - 1e-12)) / followup_days
+        times = inverse_cumulative_hazard(
+            rng.standard_exponential(n), {"distribution": "exponential", "rate": rate}
+        )
+        np.less_equal(times, followup_days, out=events)
+        np.subtract(1, events, out=censored)
+        np.minimum(times, followup_days, out=followup)
+        del times
+
+        ages[:] = rng.normal(50, 15, n)
+        np.clip(ages, 18, 85, out=ages)
+        buf.categorical("sex", sex, rng)
+
+        return buf.to_frame()
+
+    def simulate(
+        self,
+        n: int,
+        causes: Optional[Dict[str, dict]] = None,
+        accrual_days: int = 365,
+        followup_days: int = 1095,
+        dropout_rate: float = 0.0,
+        start_date: str = "2020-01-01",
+        treatment_ratio: float = 0.5,
+        first_id: int = 1,
+    ) -> pd.DataFrame:
+        """
+        Simula un estudio de supervivencia con riesgos competitivos.
+
+        Cada causa k tiene hazard especifica h_k(t | x) = h0_k(t) * HR_k(x).
+        Se muestrea un tiempo latente por causa invirtiendo su hazard
+        acumulada (T_k = H0_k^-1(E / HR_k(x)), E ~ Exp(1)); el tiempo de
+        evento es el minimo y la causa la que lo alcanza. Con causas
+        independientes esto reproduce exactamente las hazards especificas.
+
+        Ingreso escalonado uniforme en [0, accrual_days]; el estudio cierra
+        en accrual_days + followup_days (censura administrativa) y existe
+        perdida de seguimiento exponencial opcional.
+
+        Args:
+            n: Numero de sujetos
+            causes: Causa -> spec de `inverse_cumulative_hazard` con clave
+                opcional `hr` (hazard ratio por: age [por anio sobre 50],
+                sex_M, treatment_B). Default: DEFAULT_CAUSES
+            accrual_days: Duracion del reclutamiento
+            followup_days: Seguimiento minimo tras el cierre del reclutamiento
+            dropout_rate: Proporcion anual de perdidas de seguimiento
+            start_date: Fecha de inicio del reclutamiento
+            treatment_ratio: Proporcion asignada a tratamiento B
+            first_id: Primer subject_id: retorna las filas first_id..first_id+n-1
+                de la tabla de la semilla (`generate_rows`)
+
+        Returns:
+            DataFrame con entrada, tiempo observado, status (0 = censura,
+            k = causa k en orden de `causes`), causa y motivo de censura
+        """
+        self._validate_positive_int(n, "n")
+        self._validate_positive_int(first_id, "first_id")
+        return self.generate_rows(
+            first_id - 1, first_id - 1 + n, model="parametric", causes=causes,
+            accrual_days=accrual_days, followup_days=followup_days, dropout_rate=dropout_rate,
+            start_date=start_date, treatment_ratio=treatment_ratio,
+        )
+
+    def _simulate(
+        self,
+        rng: np.random.Generator,
+        n: int,
+        causes: Optional[Dict[str, dict]] = None,
+        accrual_days: int = 365,
+        followup_days: int = 1095,
+        dropout_rate: float = 0.0,
+        start_date: str = "2020-01-01",
+        treatment_ratio: float = 0.5,
+        first_id: int = 1,
+    ) -> pd.DataFrame:
+        """Sujetos first_id..first_id+n-1 de `simulate` con `rng`"""
+        self._validate_positive_int(n, "n")
+        self._validate_positive_int(followup_days, "followup_days")
+        self._validate_probability(dropout_rate, "dropout_rate")
+        self._validate_probability(treatment_ratio, "treatment_ratio")
+        if not isinstance(accrual_days, int) or accrual_days < 0:
+            raise ValueError(f"accrual_days debe ser entero >= 0, recibido: {accrual_days}")
+        if causes is None:
+            causes = DEFAULT_CAUSES
+        if not causes:
+            raise ValueError("Se requiere al menos una causa")
 
-        ages = self.rng.normal(50, 15, n_subjects).astype(int)
-        ages = np.clip(ages, 18, 85)
-        sex = self.rng.choice(["M", "F"], n_subjects)
+        age = np.clip(rng.normal(60, 12, n), 18, 95).astype(np.int64)
+        sex_m = rng.random(n) < 0.5
+        treatment_b = rng.random(n) < treatment_ratio
+        covariates = {"age": age - 50, "sex_M": sex_m, "treatment_B": treatment_b}
 
+        # Tiempos latentes por causa: minimo y causa ganadora
+        event_time = np.full(n, np.inf)
+        status = np.zeros(n, dtype=np.int8)
+        for k, spec in enumerate(causes.values(), start=1):
+            log_hr = np.zeros(n)
+            for name, hr in spec.get("hr", {}).items():
+                if name not in covariates:
+                    raise ValueError(f"Covariable no soportada: {name}. Opciones: {list(covariates)}")
+                self._validate_positive_float(hr, f"hr[{name}]")
+                log_hr += np.log(hr) * covariates[name]
+            latent = inverse_cumulative_hazard(
+                rng.standard_exponential(n) * np.exp(-log_hr), spec
+            )
+            first = latent < event_time
+            event_time[first] = latent[first]
+            status[first] = k
+
+        # Censura: administrativa (cierre del estudio) y perdida de seguimiento
+        entry = rng.integers(0, accrual_days + 1, n)
+        admin = (accrual_days + followup_days - entry).astype(np.float64)
+        if dropout_rate > 0:
+            dropout = rng.standard_exponential(n) / (-np.log1p(-min(dropout_rate, 1 - 1e-12)) / 365.25)
+        else:
+            dropout = np.full(n, np.inf)
+        censor_time = np.minimum(admin, dropout)
+
+        event = event_time <= censor_time
+        status[~event] = 0
+        time = np.where(event, event_time, censor_time)
+        censor_reason = np.where(
+            event, "", np.where(dropout < admin, "dropout", "administrative")
+        )
+        cause_names = np.array(["censored"] + list(causes))
+
+        start = np.datetime64(start_date, "D")
+        entry_date = start + entry.astype("timedelta64[D]")
         return pd.DataFrame(
             {
-                "subject_id": range(1, n_subjects + 1),
-                "age": ages,
-                "sex": sex,
-                "followup_days": np.minimum(times, followup_days),
-                "event": events,
-                "censored": censored,
+                "subject_id": np.arange(first_id, first_id + n),
+                "age": age,
+                "sex": np.where(sex_m, "M", "F"),
+                "treatment": np.where(treatment_b, "B", "A"),
+                "entry_date": entry_date,
+                "exit_date": entry_date + np.ceil(time).astype("timedelta64[D]"),
+                "time": np.round(time, 2),
+                "event": event.astype(np.int8),
+                "status": status,
+                "cause": cause_names[status],
+                "censor_reason": censor_reason,
             }
         )
+
+    def iter_chunks(
+        self, n: int, chunk_size: int = 1_000_000, **kwargs
+    ) -> Iterator[Dict[str, pd.DataFrame]]:
+        """
+        Genera `simulate` por bloques con subject_id consecutivos; la
+        concatenacion es `simulate(n)` para cualquier `chunk_size`. Los
+        bloques son dicts tabla -> DataFrame (tabla `survival`), como el
+        resto de `iter_chunks` (`storage.write_chunks`, `arrow_io`, jobs).
+
+        Args:
+            n: Numero total de sujetos
+            chunk_size: Sujetos por bloque
+            **kwargs: Parametros de `simulate`
+
+        Yields:
+            {"survival": DataFrame del bloque}
+        """
+        self._validate_positive_int(n, "n")
+        self._validate_positive_int(chunk_size, "chunk_size")
+        for start in range(0, n, chunk_size):
+            yield {
+                "survival": self.simulate(min(chunk_size, n - start), first_id=start + 1, **kwargs)
+            }
@@ -0,0 +1,134 @@
+"""
+Backends de DataFrame
+
+Los generadores construyen sus columnas con NumPy. Con `backend="polars"`
+`generate()` activa el backend (`use_backend`) y los generadores con
+armado nativo (CIE10, Demographics, Encounter, Surveillance) crean el
+`polars.DataFrame` directo desde sus buffers (`ColumnBuffer.to_polars`):
+columnas numericas y codigos de categorias sin copia, IDs formateados en
+Arrow y fechas como `pl.Date`, sin pasar por strings de pandas. El resto
+retorna pandas y se convierte via Arrow (`arrow_io.to_record_batch`).
+Los sinks de `storage` escriben frames Polars con sus escritores nativos
+(CSV/Parquet multihilo).
+
+Uso:
+    df = DemographicsGenerator().generate(10**6, backend="polars")
+    registry.run("cie10", n=5 * 10**7, backend="polars")
+
+Requiere polars y pyarrow para el backend polars.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Union
+import pandas as pd
+from . import profiling
+
+if TYPE_CHECKING:
+    import polars as pl
+
+
+BACKENDS = ("pandas", "polars")
+
+Frame = Union[pd.DataFrame, "pl.DataFrame"]
+
+_ACTIVE: ContextVar[str] = ContextVar("frame_backend", default="pandas")
+
+
+def _polars():
+    try:
+        import polars as pl
+    except ImportError as e:
+        raise ImportError("El backend polars requiere polars: pip install polars") from e
+    return pl
+
+
+def validate_backend(backend: str) -> None:
+    """Valida nombre de backend (ValueError si no existe)"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend no soportado: {backend}. Opciones: {list(BACKENDS)}")
+
+
+def active_backend() -> str:
+    """Backend del `generate()` en curso (pandas fuera de `use_backend`)"""
+    return _ACTIVE.get()
+
+
+@contextmanager
+def use_backend(backend: str) -> Iterator[None]:
+    """Fija el backend en que los generadores arman sus frames"""
+    validate_backend(backend)
+    token = _ACTIVE.set(backend)
+    try:
+        yield
+    finally:
+        _ACTIVE.reset(token)
+
+
+def is_polars(df: Any) -> bool:
+    """True si `df` es un polars.DataFrame (sin importar polars)"""
+    return type(df).__module__.split(".")[0] == "polars"
+
+
+def to_polars(df: Frame) -> "pl.DataFrame":
+    """DataFrame pandas como polars.DataFrame (via Arrow, sin copiar columnas numericas)"""
+    pl = _polars()
+    if is_polars(df):
+        return df
+    from .arrow_io import to_record_batch
+
+    with profiling.span("polars.frame"):
+        return pl.from_arrow(to_record_batch(df))
+
+
+def to_pandas(df: Frame) -> pd.DataFrame:
+    """Frame de cualquier backend como pandas.DataFrame"""
+    return df.to_pandas() if is_polars(df) else df
+
+
+def slice_rows(df: Frame, start: int, stop: int) -> Frame:
+    """Filas [start, stop) de un frame de cualquier backend"""
+    return df.slice(start, stop - start) if is_polars(df) else df.iloc[start:stop]
+
+
+def concat(parts: Iterable[Frame]) -> Frame:
+    """Concatena frames de un mismo backend (indice pandas renumerado)"""
+    parts = list(parts)
+    if is_polars(parts[0]):
+        return _polars().concat(parts) if len(parts) > 1 else parts[0]
+    if len(parts) == 1:
+        return parts[0].reset_index(drop=True)
+    return pd.concat(parts, ignore_index=True)
+
+
+def convert(result: Any, backend: str = "pandas") -> Any:
+    """
+    Convierte el resultado de un generador al backend pedido.
+
+    Args:
+        result: DataFrame o dict tabla -> DataFrame
+        backend: pandas o polars
+
+    Returns:
+        Mismo tipo de contenedor con frames del backend
+    """
+    validate_backend(backend)
+    if backend == "pandas":
+        if isinstance(result, dict):
+            return {table: to_pandas(df) for table, df in result.items()}
+        return to_pandas(result)
+    if isinstance(result, dict):
+        return {table: to_polars(df) for table, df in result.items()}
+    return to_polars(result)
+
+
+def convert_chunks(
+    chunks: Iterable[Dict[str, Frame]], backend: str = "pandas"
+) -> Iterator[Dict[str, Frame]]:
+    """Bloques multi-tabla convertidos al backend (sin costo para pandas)"""
+    validate_backend(backend)
+    if backend == "pandas":
+        yield from chunks
+        return
+    for tables in chunks:
+        yield {table: to_polars(df) for table, df in tables.items()}
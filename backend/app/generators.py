@@ -1,62 +1,110 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import numpy as np
 import pandas as pd
 from .models import SchemaConfig, ErrorType
-from .base_generator import BaseGenerator
+from .base_generator import BaseGenerator, ColumnBuffer
+from .cie10_catalog import load_catalog
+from . import frames, profiling
+
+
+REGIONS = [f"R{i:02d}" for i in range(1, 16)]
 
 
 class CIE10Generator(BaseGenerator):
     """Generador CIE-10 deterministico"""
 
-    def __init__(self, seed: int = 42):
+    def __init__(self, seed: int = 42, catalog_path: Optional[str] = None):
+        """
+        Args:
+            seed: Semilla para reproducibilidad
+            catalog_path: Archivo de codigos (default: data/cie10_valid_codes.txt)
+        """
         super().__init__(seed)
+        self.catalog = load_catalog(catalog_path)
         self.valid_codes = self._load_codes()
 
     def _load_codes(self) -> List[str]:
         """Carga codigos validos CIE-10"""
-        return [
-            "A00.0",
-            "A01.0",
-            "A15.0",
-            "I21.0",
-            "I25.1",
-            "I50.9",
-            "E11.0",
-            "E11.9",
-            "J44.9",
-            "G20",
-            "G30.9",
-            "C50.9",
-            "N18.9",
-            "M54.5",
-            "F32.9",
-            "R10.4",
-            "S06.0",
-        ]
-
-    def generate(self, n: int, error_types: dict = None) -> pd.DataFrame:
-        """Genera base sintetica CIE-10"""
+        return self.catalog.codes.tolist()
+
+    def generate(
+        self,
+        n: int,
+        error_types: dict = None,
+        chapter: Optional[int] = None,
+        include_hierarchy: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Genera base sintetica CIE-10
+
+        Args:
+            n: Numero de registros
+            error_types: Probabilidad por tipo de error a inyectar
+            chapter: Restringir codigos a un capitulo (1-22)
+            include_hierarchy: Agregar columnas capitulo y bloque
+        """
         self._validate_positive_int(n, "n")
+        return self.generate_rows(
+            0, n, error_types=error_types, chapter=chapter, include_hierarchy=include_hierarchy
+        )
 
-        ids = np.arange(1, n + 1)
-        codes = self.rng.choice(self.valid_codes, n)
-
-        df = pd.DataFrame({"id": ids, "codigo": codes})
+    def _generate_block(
+        self,
+        rng: np.random.Generator,
+        start: int,
+        n: int,
+        error_types: dict = None,
+        chapter: Optional[int] = None,
+        include_hierarchy: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Registros start+1..start+n con `rng` (ver `generate`).
+
+        Con backend polars y sin errores el frame se arma desde los indices
+        del catalogo (codigo/bloque categoricos); la inyeccion de errores
+        opera sobre strings de pandas.
+        """
+        ids = np.arange(start + 1, start + n + 1)
+        with profiling.span("cie10.sample"):
+            idx = self.catalog.sample(rng, n, chapter=chapter)
+
+        if frames.active_backend() == "polars" and not error_types:
+            buf = ColumnBuffer(n)
+            buf.put("id", ids)
+            buf.codes("codigo", idx, self.catalog.codes)
+            if include_hierarchy:
+                buf.put("capitulo", self.catalog.chapters[idx])
+                blocks, block_idx = np.unique(self.catalog.blocks, return_inverse=True)
+                buf.codes("bloque", block_idx[idx], blocks)
+            return buf.to_polars()
+
+        with profiling.span("dataframe"):
+            df = pd.DataFrame({"id": ids, "codigo": self.catalog.codes[idx]})
+            if include_hierarchy:
+                df["capitulo"] = self.catalog.chapters[idx]
+                df["bloque"] = self.catalog.blocks[idx]
 
         if error_types:
-            df = self._apply_errors(df, error_types)
+            with profiling.span("cie10.errors"):
+                df = self._apply_errors(df, error_types, rng)
 
         return df
 
-    def _apply_errors(self, df: pd.DataFrame, errors: dict = None) -> pd.DataFrame:
-        """Aplica errores segun configuracion"""
+    def _apply_errors(
+        self,
+        df: pd.DataFrame,
+        errors: dict = None,
+        rng: Optional[np.random.Generator] = None,
+    ) -> pd.DataFrame:
+        """Aplica errores segun configuracion (rng default: self.rng)"""
         if not errors:
             return df
+        rng = rng or self.rng
         for error_type, prob in errors.items():
             if prob <= 0:
                 continue
 
-            mask = self.rng.random(len(df)) < prob
+            mask = rng.random(len(df)) < prob
             if not mask.any():
                 continue
 
@@ -79,22 +127,29 @@ class DemographicsGenerator(BaseGenerator):
         super().__init__(seed)
 
     def generate(self, n: int, age_dist: str = "chile") -> pd.DataFrame:
-        """Genera datos demograficos"""
+        """Genera datos demograficos (tabla de acceso aleatorio, ver `generate_rows`)"""
         self._validate_positive_int(n, "n")
+        return self.generate_rows(0, n, age_dist=age_dist)
 
-        ids = np.arange(1, n + 1)
+    def _generate_block(
+        self, rng: np.random.Generator, start: int, n: int, age_dist: str = "chile"
+    ) -> pd.DataFrame:
+        """Personas start+1..start+n con `rng` (ver `generate`)"""
+        buf = ColumnBuffer(n)
+        buf.arange("id", start + 1)
 
         # Distribucion edad (chilena promedio)
-        age = self.rng.beta(2, 5, n) * 90 + 5
-        age = age.astype(int)
+        with profiling.span("rng.beta"):
+            age = rng.beta(2, 5, n)
+            age *= 90
+            age += 5
+            buf.alloc("edad", np.int64)[:] = age
+        del age
 
         # Genero (50/50)
-        gender = self.rng.choice(["M", "F"], n)
+        buf.categorical("genero", self._sampler(["M", "F"]), rng)
 
         # Region (15 regiones)
-        regions = [f"R{i:02d}" for i in range(1, 16)]
-        region = self.rng.choice(regions, n)
+        buf.categorical("region", self._sampler(REGIONS), rng)
 
-        return pd.DataFrame(
-            {"id": ids, "edad": age, "genero": gender, "region": region}
-        )
+        return buf.build()
@@ -0,0 +1,331 @@
+"""
+Trabajos de generacion reanudables
+
+`GenerationJob` genera un schema bloque a bloque en archivos parte
+(`<output>/parts/<tabla>/part-00000.csv`) y despues de cada bloque
+actualiza `<output>/manifest.json` con los bloques completados, el estado
+de RNG/contadores del generador y las partes escritas. Si el proceso
+muere, el mismo trabajo retoma desde el ultimo bloque completado y el
+resultado es identico byte a byte al de una ejecucion sin cortes. La
+fecha de referencia de edades y fechas relativas (`reference_date`,
+default: el dia en que se crea el trabajo) queda en el manifest y se
+reutiliza al retomar, aunque sea otro dia.
+
+Modos segun el generador:
+- sequential: generadores `chunked` (cohort, trajectories); un bloque del
+  trabajo es un bloque de pacientes del generador y el estado se
+  restaura con `BaseGenerator.set_state`
+- random_access: generadores con `generate_rows`; cada bloque es un rango
+  de filas independiente (Philox por bloque), sin estado que guardar
+- single: el resto; un solo bloque
+
+Formatos: csv (al terminar se unen las partes en `<output>/<tabla>.csv`)
+y parquet (las partes son el dataset `<output>/<tabla>/part-*.parquet`).
+Con `backend="polars"` los bloques se escriben con los escritores de
+Polars, como en `registry.run`.
+
+Uso:
+    job = GenerationJob("cohort", n=10**7, seed=42)
+    rows = job.run()  # re-ejecutar tras un corte retoma desde el manifest
+"""
+
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+import json
+import math
+import os
+import shutil
+import pandas as pd
+from . import frames, profiling, registry
+from .models import SchemaConfig
+
+
+MANIFEST = "manifest.json"
+FORMATS = ("csv", "parquet")
+VERSION = 2
+# Bloques Philox por bloque del trabajo en modo random_access
+CHUNK_BLOCKS = 16
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """Escritura atomica (archivo temporal + rename)"""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+
+class _PartWriter:
+    """Escribe las tablas de un bloque en archivos parte temporales"""
+
+    def __init__(self, parts_dir: Path, chunk: int, format: str):
+        self.parts_dir = parts_dir
+        self.chunk = chunk
+        self.format = format
+        self.files: Dict[str, Path] = {}
+        self._writers: Dict[str, Any] = {}
+
+    def path(self, table: str) -> Path:
+        return self.parts_dir / table / f"part-{self.chunk:05d}.{self.format}"
+
+    def write(self, table: str, df: frames.Frame) -> None:
+        first = table not in self.files
+        if first:
+            tmp = self.path(table).with_suffix(f".{self.format}.tmp")
+            tmp.parent.mkdir(parents=True, exist_ok=True)
+            self.files[table] = tmp
+        tmp = self.files[table]
+        if self.format == "csv":
+            if frames.is_polars(df):
+                with open(tmp, "wb" if first else "ab") as f:
+                    df.write_csv(f, include_header=first)
+            else:
+                df.to_csv(tmp, mode="w" if first else "a", header=first, index=False)
+            return
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Formato parquet requiere pyarrow: pip install pyarrow") from e
+
+        writer = self._writers.get(table)
+        if frames.is_polars(df):
+            data = df.to_arrow()
+            if writer is not None:
+                data = data.cast(writer.schema)
+        else:
+            data = pa.Table.from_pandas(
+                df, schema=None if writer is None else writer.schema, preserve_index=False
+            )
+        if writer is None:
+            writer = pq.ParquetWriter(str(tmp), data.schema)
+            self._writers[table] = writer
+        writer.write_table(data)
+
+    def commit(self) -> Dict[str, Path]:
+        """Cierra y renombra las partes temporales; retorna tabla -> parte final"""
+        for writer in self._writers.values():
+            writer.close()
+        final = {}
+        for table, tmp in self.files.items():
+            final[table] = self.path(table)
+            os.replace(tmp, final[table])
+        return final
+
+
+class GenerationJob:
+    """Generacion por bloques con checkpoint en manifest y reanudacion"""
+
+    def __init__(
+        self,
+        name: str,
+        output: Union[str, Path, None] = None,
+        n: Optional[int] = None,
+        seed: Optional[int] = None,
+        format: str = "csv",
+        chunk_rows: Optional[int] = None,
+        config: Optional[SchemaConfig] = None,
+        backend: str = "pandas",
+        reference_date: Optional[str] = None,
+    ):
+        """
+        Args:
+            name: Nombre del schema registrado
+            output: Directorio del trabajo (default: OUTPUT_DIR/jobs/<job_id>)
+            n: Numero de filas/unidades (default: del schema)
+            seed: Semilla (default: del schema)
+            format: csv o parquet
+            chunk_rows: Unidades por bloque: filas en modo random_access
+                (default: CHUNK_BLOCKS * BLOCK_SIZE) o pacientes en modo
+                sequential (fija el `chunk_size` del generador, que es
+                parte de la semilla efectiva: el default reproduce
+                `registry.run`)
+            config: Schema ya cargado (default: `load_schema(name)`)
+            backend: pandas o polars (frames y escritores de los bloques)
+            reference_date: Fecha ISO que reemplaza a "hoy" en los
+                generadores (default: la del manifest al retomar, o la
+                fecha actual al crear el trabajo)
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Formato no reanudable: {format}. Opciones: {list(FORMATS)}")
+        frames.validate_backend(backend)
+        if reference_date is not None:
+            date.fromisoformat(reference_date)
+        self.name = name
+        self.spec = registry.get_spec(name)
+        self.config = config or registry.load_schema(name)
+        self.n = self.spec.size(self.config, n)
+        self.seed = self.config.seed if seed is None else seed
+        self.format = format
+        self.backend = backend
+        self.reference_date = reference_date
+        self.kwargs = self.spec.kwargs(self.config)
+        self.generator = self.spec.create(self.config, self.seed)
+
+        if self.spec.chunked:
+            self.mode = "sequential"
+            if chunk_rows is not None:
+                self.generator._validate_positive_int(chunk_rows, "chunk_rows")
+                self.generator.chunk_size = chunk_rows
+            self.chunk_units = self.generator.chunk_size
+        elif self.spec.random_access:
+            self.mode = "random_access"
+            self.chunk_units = chunk_rows or CHUNK_BLOCKS * self.generator.BLOCK_SIZE
+            self.generator._validate_positive_int(self.chunk_units, "chunk_rows")
+        else:
+            self.mode = "single"
+            self.chunk_units = self.n
+        self.n_chunks = math.ceil(self.n / self.chunk_units)
+
+        self.output = Path(output) if output is not None else (
+            registry.OUTPUT_DIR / "jobs" / self.job_id
+        )
+        self.parts_dir = self.output / "parts" if format == "csv" else self.output
+
+    @property
+    def job_id(self) -> str:
+        return f"{self.name}_{self.n}_{self.seed}"
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.output / MANIFEST
+
+    def params(self) -> Dict[str, Any]:
+        """Parametros que definen el resultado (deben coincidir para reanudar)"""
+        return {
+            "schema": self.name,
+            "n": self.n,
+            "seed": self.seed,
+            "format": self.format,
+            "backend": self.backend,
+            "reference_date": self.reference_date,
+            "mode": self.mode,
+            "chunk_units": self.chunk_units,
+            "chunks": self.n_chunks,
+            "kwargs": json.loads(json.dumps(self.kwargs, default=str)),
+        }
+
+    def load_manifest(self) -> Optional[Dict[str, Any]]:
+        """Manifest existente (ValueError si es de otro trabajo) o None"""
+        if not self.manifest_path.exists():
+            return None
+        manifest = json.loads(self.manifest_path.read_text())
+        if self.reference_date is None:
+            # Retomar usa la fecha de referencia con que se creo el trabajo
+            self.reference_date = manifest.get("params", {}).get("reference_date")
+        if manifest.get("version") != VERSION or manifest.get("params") != self.params():
+            raise ValueError(
+                f"{self.manifest_path} corresponde a otro trabajo; use otro directorio de salida"
+            )
+        return manifest
+
+    def _new_manifest(self) -> Dict[str, Any]:
+        if self.reference_date is None:
+            self.reference_date = date.today().isoformat()
+        manifest = {
+            "version": VERSION,
+            "params": self.params(),
+            "completed": [],
+            "parts": {},
+            "rows": {},
+            "state": None,
+            "done": False,
+        }
+        if self.mode == "random_access":
+            manifest["rng"] = {
+                "bit_generator": "Philox",
+                "seed": self.seed,
+                "block_size": self.generator.BLOCK_SIZE,
+            }
+        return manifest
+
+    def _chunk(self, k: int) -> Iterator[Dict[str, pd.DataFrame]]:
+        """Tablas del bloque k (el generador debe estar en el estado del bloque k)"""
+        start = k * self.chunk_units
+        stop = min(start + self.chunk_units, self.n)
+        if self.mode == "sequential":
+            yield from frames.convert_chunks(
+                self.generator.iter_chunks(stop - start, **self.kwargs), self.backend
+            )
+        elif self.mode == "random_access":
+            with frames.use_backend(self.backend):
+                df = self.generator.generate_rows(start, stop, **self.kwargs)
+            yield {self.name: frames.convert(df, self.backend)}
+        else:
+            result = self.generator.generate(self.n, backend=self.backend, **self.kwargs)
+            yield result if self.spec.tables else {self.name: result}
+
+    def run(self, max_chunks: Optional[int] = None) -> Dict[str, int]:
+        """
+        Ejecuta (o reanuda) el trabajo.
+
+        Args:
+            max_chunks: Procesar a lo sumo esta cantidad de bloques en la
+                llamada (el trabajo queda reanudable)
+
+        Returns:
+            Filas escritas por tabla en los bloques completados
+        """
+        self.output.mkdir(parents=True, exist_ok=True)
+        manifest = self.load_manifest() or self._new_manifest()
+        if manifest["done"]:
+            self._cleanup()
+            return manifest["rows"]
+
+        self.generator.set_reference_date(self.reference_date)
+        completed = set(manifest["completed"])
+        if manifest["state"] is not None:
+            self.generator.set_state(manifest["state"])
+
+        processed = 0
+        for k in range(self.n_chunks):
+            if k in completed:
+                continue
+            if max_chunks is not None and processed >= max_chunks:
+                return manifest["rows"]
+            writer = _PartWriter(self.parts_dir, k, self.format)
+            rows: Dict[str, int] = {}
+            with profiling.span("job.chunk"):
+                for tables in self._chunk(k):
+                    for table, df in tables.items():
+                        writer.write(table, df)
+                        rows[table] = rows.get(table, 0) + len(df)
+            for table, path in writer.commit().items():
+                parts = manifest["parts"].setdefault(table, [])
+                part = str(path.relative_to(self.output))
+                if part not in parts:
+                    parts.append(part)
+            for table, count in rows.items():
+                manifest["rows"][table] = manifest["rows"].get(table, 0) + count
+            manifest["completed"].append(k)
+            if self.mode == "sequential":
+                manifest["state"] = self.generator.get_state()
+            _write_json(self.manifest_path, manifest)
+            processed += 1
+
+        if self.format == "csv":
+            with profiling.span("job.merge"):
+                for table, parts in manifest["parts"].items():
+                    self._merge(table, sorted(parts))
+        manifest["done"] = True
+        _write_json(self.manifest_path, manifest)
+        self._cleanup()
+        return manifest["rows"]
+
+    def _merge(self, table: str, parts: List[str]) -> None:
+        """Une partes CSV en `<output>/<tabla>.csv` (encabezado solo de la primera)"""
+        target = self.output / f"{table}.csv"
+        tmp = target.with_suffix(".csv.tmp")
+        with open(tmp, "wb") as out:
+            for i, part in enumerate(parts):
+                with open(self.output / part, "rb") as f:
+                    if i > 0:
+                        f.readline()
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp, target)
+
+    def _cleanup(self) -> None:
+        """Elimina las partes CSV ya unidas"""
+        if self.format == "csv" and self.parts_dir.exists():
+            shutil.rmtree(self.parts_dir)
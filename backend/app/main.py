@@ -1,7 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .config import settings
 from .api import router as api_router
+from .profiling import METRICS
 
 app = FastAPI(title=settings.PROJECT_NAME, version="0.1.0")
 
@@ -19,3 +21,9 @@ app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 @app.get("/")
 async def root():
     return {"message": "Synthetic Health DB API", "version": "0.1.0"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metricas del proceso en formato Prometheus"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -16,7 +16,7 @@ class ColumnConfig(BaseModel):
     type: str
     distribution: Optional[str] = None
     range: Optional[List[int]] = None
-    categories: Optional[str] = None
+    categories: Optional[Union[str, List[Any]]] = None  # archivo o lista de valores
     error_types: Optional[dict] = None
 
 
@@ -30,19 +30,36 @@ class SchemaConfig(BaseModel):
     name: str
     description: str
     n_rows: int = 100000
-    columns: List[ColumnConfig]
+    columns: List[ColumnConfig] = []
     correlations: Optional[List[CorrelationConfig]] = []
     seed: int = 42
+    parameters: Dict[str, Any] = {}
 
 
 class GenerationRequest(BaseModel):
     schema_name: str = Field(..., description="Nombre del schema YAML")
     rows: Optional[int] = None
     output_format: str = "csv"
+    backend: str = "pandas"
     seed: Optional[int] = None
+    profile: bool = False
+    resumable: bool = False
 
 
 class GenerationResponse(BaseModel):
     job_id: str
     status: str
     message: str
+    profile: Optional[Dict[str, Dict[str, float]]] = None
+
+
+class PreviewResponse(BaseModel):
+    schema_name: str
+    seed: int
+    total_rows: int
+    page: int
+    page_size: int
+    pages: int
+    random_access: bool
+    rows: List[Dict[str, Any]]
+    stats: Dict[str, Dict[str, Any]]
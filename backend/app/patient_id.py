@@ -5,14 +5,79 @@ Genera IDs deterministicos y vinculables para analisis estadisticos.
 Formato: SHDB-{birth_year}-{sex}-{region}-{hash6}
 """
 
-from typing import Dict, List, Optional, Any
-import hashlib
+from typing import Dict, List, Optional, Any, Union
 import uuid
 import numpy as np
 import pandas as pd
 from datetime import date, datetime
 from dataclasses import dataclass
-from .base_generator import BaseGenerator
+from .base_generator import BaseGenerator, ColumnBuffer
+from . import frames
+
+
+HEX_DIGITS = np.array(list("0123456789ABCDEF"))
+# El hash de 6 hex del patient_id es una permutacion de 24 bits de patient_key
+MAX_PATIENT_KEYS = 1 << 24
+# Establecimientos de los encuentros: FAC-001..FAC-099
+MAX_FACILITIES = 99
+
+ENCOUNTER_TYPES = ["ambulatory", "emergency", "inpatient", "telehealth"]
+
+COMMON_CIE10 = [
+    "I10",
+    "E11.9",
+    "J06.9",
+    "M54.5",
+    "K29.7",
+    "F32.9",
+    "J44.9",
+    "I25.1",
+    "E78.5",
+    "N39.0",
+    "R10.4",
+    "J18.9",
+    "K21.0",
+    "G43.9",
+    "L30.9",
+]
+
+PROCEDURES = [
+    "99213",
+    "99214",
+    "99215",
+    "36415",
+    "80053",
+    "85025",
+    "81001",
+    "71046",
+    "93000",
+    "90715",
+]
+
+LAB_PANELS = ["chemistry", "hematology", "lipid"]
+
+# (test, normal bajo, normal alto, unidad, rango bajo, rango alto)
+LAB_DEFINITIONS = {
+    "chemistry": [
+        ("glucose", 70, 100, "mg/dL", 50, 200),
+        ("creatinine", 0.7, 1.3, "mg/dL", 0.3, 5.0),
+        ("bun", 7, 20, "mg/dL", 3, 50),
+        ("sodium", 136, 145, "mEq/L", 130, 155),
+        ("potassium", 3.5, 5.0, "mEq/L", 2.5, 6.5),
+    ],
+    "hematology": [
+        ("hemoglobin", 12, 17, "g/dL", 8, 20),
+        ("hematocrit", 36, 50, "%", 25, 55),
+        ("wbc", 4.5, 11.0, "K/uL", 2.0, 25.0),
+        ("platelets", 150, 400, "K/uL", 50, 600),
+    ],
+    "lipid": [
+        ("total_cholesterol", 150, 200, "mg/dL", 100, 350),
+        ("ldl", 70, 100, "mg/dL", 40, 250),
+        ("hdl", 40, 60, "mg/dL", 20, 100),
+        ("triglycerides", 50, 150, "mg/dL", 30, 500),
+    ],
+}
 
 
 @dataclass
@@ -66,14 +131,6 @@ class PatientIDGenerator(BaseGenerator):
             encounters_per_patient=kwargs.get("encounters_per_patient", (1, 10)),
         )
 
-    def _generate_hash(
-        self, birth_date: str, sex: str, region: str, salt: str = ""
-    ) -> str:
-        """Genera hash de 6 caracteres deterministico"""
-        data = f"{birth_date}{sex}{region}{salt}{self._counter}"
-        hash_obj = hashlib.sha256(data.encode())
-        return hash_obj.hexdigest()[:6].upper()
-
     def generate_patient(
         self, birth_date: str, sex: str, region: str, comuna: str = None
     ) -> Dict[str, Any]:
@@ -88,11 +145,15 @@ class PatientIDGenerator(BaseGenerator):
 
         Returns:
             Dict con patient_id, uuid, y datos demograficos
+
+        El hash del patient_id es el de `render_patient_ids` para el
+        patient_key del paciente (contador previo), de modo que un mismo
+        paciente tiene el mismo ID por ambos caminos.
         """
+        hash_part = self._hash_keys(np.array([self._counter]))[0]
         self._counter += 1
         birth_year = birth_date[:4]
 
-        hash_part = self._generate_hash(birth_date, sex, region)
         patient_id = f"{self.prefix}-{birth_year}-{sex}-{region}-{hash_part}"
 
         patient_uuid = str(
@@ -123,7 +184,7 @@ class PatientIDGenerator(BaseGenerator):
     def _calculate_age(self, birth_date: str) -> int:
         """Calcula edad actual"""
         birth = datetime.strptime(birth_date, "%Y-%m-%d")
-        today = datetime.now()
+        today = self._today()
         return today.year - birth.year - (
             (today.month, today.day) < (birth.month, birth.day)
         )
@@ -136,10 +197,16 @@ class PatientIDGenerator(BaseGenerator):
         regions: List[str] = None,
         with_encounters: bool = False,
         encounters_per_patient: tuple = (1, 10),
+        render_ids: bool = True,
     ) -> pd.DataFrame:
         """
         Genera cohorte de pacientes con IDs unicos
 
+        Cada paciente recibe un `patient_key` int64 (surrogate interno para
+        generacion y joins). Con `render_ids=False` no se construyen strings
+        ni registro: el `patient_id` legible se obtiene al exportar con
+        `render_patient_ids()` / `attach_patient_ids()`.
+
         Args:
             n: Numero de pacientes
             age_range: Rango de edad (min, max)
@@ -147,6 +214,7 @@ class PatientIDGenerator(BaseGenerator):
             regions: Lista de regiones (default: 01-16)
             with_encounters: Incluir encuentros/visitas
             encounters_per_patient: Rango de encuentros por paciente
+            render_ids: Generar patient_id/uuid y registro por paciente
 
         Returns:
             DataFrame con cohorte de pacientes
@@ -154,98 +222,240 @@ class PatientIDGenerator(BaseGenerator):
         self._validate_positive_int(n, "n")
         self._validate_range(age_range, "age_range")
         self._validate_probability(sex_ratio, "sex_ratio")
+        self._check_keys(self._counter + n)
 
         if regions is None:
             regions = [f"{i:02d}" for i in range(1, 17)]
 
         # Vectorized generation
         ages = self.rng.integers(age_range[0], age_range[1] + 1, size=n)
-        current_year = datetime.now().year
+        today = self._today()
+        current_year = today.year
         birth_years = current_year - ages
         birth_months = self.rng.integers(1, 13, size=n)
         birth_days = self.rng.integers(1, 29, size=n)
 
         sexes = np.where(self.rng.random(n) < sex_ratio, "F", "M")
-        region_choices = self.rng.choice(regions, n)
-
-        patients = []
-        for i in range(n):
-            birth_date = f"{birth_years[i]}-{birth_months[i]:02d}-{birth_days[i]:02d}"
-            patient = self.generate_patient(birth_date, sexes[i], region_choices[i])
-            patients.append(patient)
-
-        df = pd.DataFrame(patients)
+        region_choices = self._sampler(regions).sample_values(n)
+        patient_keys = np.arange(self._counter, self._counter + n, dtype=np.int64)
+
+        if render_ids:
+            patients = []
+            for i in range(n):
+                birth_date = f"{birth_years[i]}-{birth_months[i]:02d}-{birth_days[i]:02d}"
+                patient = self.generate_patient(birth_date, sexes[i], region_choices[i])
+                patients.append(patient)
+
+            df = pd.DataFrame(patients)
+            df.insert(0, "patient_key", patient_keys)
+        else:
+            self._counter += n
+            birth_dates = (
+                (birth_years - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+                + (birth_months - 1).astype("timedelta64[M]")
+            ).astype("datetime64[D]") + (birth_days - 1).astype("timedelta64[D]")
+            had_birthday = (birth_months < today.month) | (
+                (birth_months == today.month) & (birth_days <= today.day)
+            )
+            df = pd.DataFrame(
+                {
+                    "patient_key": patient_keys,
+                    "birth_date": birth_dates,
+                    "sex": sexes,
+                    "region": region_choices,
+                    "age": current_year - birth_years - (~had_birthday),
+                }
+            )
 
         if with_encounters:
             df = self._add_encounters(df, encounters_per_patient)
 
         return df
 
+    @staticmethod
+    def _check_keys(n_keys: int) -> None:
+        """ValueError si se necesitan mas de MAX_PATIENT_KEYS claves"""
+        if n_keys > MAX_PATIENT_KEYS:
+            raise ValueError(
+                f"patient_id admite hasta {MAX_PATIENT_KEYS} pacientes por generador "
+                f"(hash de 6 hex sin colisiones); requeridos: {n_keys}"
+            )
+
+    def _hash_keys(self, patient_keys: np.ndarray) -> np.ndarray:
+        """
+        Hash hexadecimal de 6 caracteres por patient_key (vectorizado).
+
+        Permutacion biyectiva de 24 bits (multiplicaciones impares y
+        xorshift modulo 2^24) sembrada con `seed`: claves distintas menores
+        a MAX_PATIENT_KEYS (2^24, ~16.7M pacientes) nunca colisionan; claves
+        mayores se rechazan con ValueError.
+        """
+        patient_keys = np.asarray(patient_keys)
+        if patient_keys.size and (patient_keys.min() < 0 or patient_keys.max() >= MAX_PATIENT_KEYS):
+            raise ValueError(f"patient_key fuera de [0, {MAX_PATIENT_KEYS})")
+        mask = np.uint64(0xFFFFFF)
+        z = patient_keys.astype(np.uint64) + np.uint64(
+            (self.seed * 0x9E3779) & 0xFFFFFF
+        )
+        z &= mask
+        z = (z * np.uint64(0x2C1B3B)) & mask
+        z ^= z >> np.uint64(12)
+        z = (z * np.uint64(0x5BD1E9)) & mask
+        z ^= z >> np.uint64(11)
+        shifts = np.arange(20, -1, -4, dtype=np.uint64)
+        digits = (z[:, None] >> shifts) & np.uint64(0xF)
+        return np.ascontiguousarray(HEX_DIGITS[digits]).view("U6").ravel()
+
+    def render_patient_ids(self, cohort: pd.DataFrame) -> np.ndarray:
+        """
+        Construye patient_id legibles desde una cohorte con patient_key.
+
+        Formato {prefix}-{birth_year}-{sex}-{region}-{hash6}, con hash
+        derivado de (seed, patient_key). Pensado para exportacion: la
+        generacion y los joins usan solo patient_key.
+
+        Args:
+            cohort: DataFrame con patient_key, birth_date, sex, region
+
+        Returns:
+            Array de strings patient_id alineado con cohort
+        """
+        birth_years = pd.DatetimeIndex(cohort["birth_date"]).year.astype(str)
+        parts = [
+            np.asarray(birth_years),
+            cohort["sex"].to_numpy().astype(str),
+            cohort["region"].to_numpy().astype(str),
+            self._hash_keys(cohort["patient_key"].to_numpy()),
+        ]
+        ids = np.full(len(cohort), self.prefix)
+        for part in parts:
+            ids = np.char.add(np.char.add(ids, "-"), part)
+        return ids
+
+    def attach_patient_ids(
+        self,
+        df: pd.DataFrame,
+        cohort: pd.DataFrame,
+        categorical: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Agrega columna patient_id a una tabla con patient_key.
+
+        Los IDs se renderizan una vez por paciente y se asignan por indice;
+        con `categorical=True` la columna guarda solo codigos enteros.
+
+        Args:
+            df: Tabla con patient_key (encuentros, laboratorio, ...)
+            cohort: Cohorte con patient_key (y patient_id o datos para renderizarlo)
+            categorical: Guardar patient_id como pd.Categorical
+
+        Returns:
+            Copia de df con columna patient_id
+        """
+        if "patient_id" in cohort.columns:
+            ids = cohort["patient_id"].to_numpy()
+        else:
+            ids = self.render_patient_ids(cohort)
+
+        codes = pd.Index(cohort["patient_key"]).get_indexer(df["patient_key"])
+        if (codes < 0).any():
+            raise ValueError("patient_key sin paciente en la cohorte")
+
+        result = df.copy()
+        if categorical and len(pd.unique(ids)) == len(ids):
+            result["patient_id"] = pd.Categorical.from_codes(codes, categories=ids)
+        else:
+            result["patient_id"] = ids[codes]
+        return result
+
     def _add_encounters(
         self, df: pd.DataFrame, encounters_range: tuple
     ) -> pd.DataFrame:
-        """Agrega encuentros/visitas a cada paciente (vectorizado)"""
+        """
+        Agrega encuentros/visitas a cada paciente (vectorizado)
+
+        Una fila por encuentro: las columnas del paciente se replican con
+        `take(patient_indices)` (sin merge) y el numero de encuentro dentro
+        del paciente se obtiene con cumsum. Pacientes con 0 encuentros
+        conservan una fila con columnas de encuentro vacias.
+        """
         n_patients = len(df)
         n_encounters_per_patient = self.rng.integers(
             encounters_range[0], encounters_range[1] + 1, size=n_patients
         )
         total_encounters = n_encounters_per_patient.sum()
 
-        # Pre-allocate arrays
-        patient_indices = np.repeat(np.arange(n_patients), n_encounters_per_patient)
-        encounter_nums = np.concatenate(
-            [np.arange(1, n + 1) for n in n_encounters_per_patient]
-        )
+        # Indice de paciente y numero de encuentro (1..k) por fila
+        rows_per_patient = np.maximum(n_encounters_per_patient, 1)
+        patient_indices = np.repeat(np.arange(n_patients), rows_per_patient)
+        starts = np.cumsum(rows_per_patient) - rows_per_patient
+        encounter_nums = np.arange(len(patient_indices)) - np.repeat(starts, rows_per_patient) + 1
+        has_encounter = encounter_nums <= n_encounters_per_patient[patient_indices]
 
         # Generate all random values at once
         days_ago = self.rng.integers(0, 365 * 5, size=total_encounters)
-        encounter_types = self.rng.choice(
-            ["ambulatory", "emergency", "inpatient", "telehealth"],
-            size=total_encounters,
-            p=[0.6, 0.15, 0.1, 0.15],
+        encounter_types = self._sampler(
+            ENCOUNTER_TYPES, [0.6, 0.15, 0.1, 0.15]
+        ).sample_values(total_encounters)
+
+        # Hash del paciente una vez por paciente, luego gather por fila
+        if "patient_id" in df.columns:
+            hash_parts = df["patient_id"].astype(str).str[-6:].to_numpy().astype("U6")
+        else:
+            hash_parts = self._hash_keys(df["patient_key"].to_numpy())
+        encounter_ids = np.char.add(
+            np.char.add("ENC-", hash_parts[patient_indices[has_encounter]]),
+            self._format_ids("-", encounter_nums[has_encounter], 4),
         )
 
-        # Build encounters DataFrame
-        patient_ids = df["patient_id"].values[patient_indices]
-        hash_parts = np.array([pid[-6:] for pid in patient_ids])
-
-        enc_dates = pd.Timestamp.now() - pd.to_timedelta(days_ago, unit="D")
+        today = np.datetime64(self._today(), "D")
+        enc_dates = (today - days_ago.astype("timedelta64[D]")).astype(str)
 
-        encounters_df = pd.DataFrame(
-            {
-                "patient_id": patient_ids,
-                "encounter_id": [
-                    f"ENC-{hash_parts[i]}-{encounter_nums[i]:04d}"
-                    for i in range(total_encounters)
-                ],
-                "encounter_date": enc_dates.strftime("%Y-%m-%d"),
-                "encounter_type": encounter_types,
-            }
-        )
+        result = df.take(patient_indices).reset_index(drop=True)
+        encounter_columns = {
+            "encounter_id": encounter_ids,
+            "encounter_date": enc_dates,
+            "encounter_type": encounter_types,
+        }
+        for column, values in encounter_columns.items():
+            if has_encounter.all():
+                result[column] = values
+            else:
+                full = np.full(len(result), None, dtype=object)
+                full[has_encounter] = values
+                result[column] = full
 
-        return df.merge(encounters_df, on="patient_id", how="left")
+        return result
 
     def link_datasets(
-        self, datasets: List[pd.DataFrame], key: str = "patient_id"
-    ) -> pd.DataFrame:
+        self,
+        datasets: Union[List[pd.DataFrame], Dict[str, pd.DataFrame]],
+        key: str = "patient_id",
+        how: str = "wide",
+    ) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
         """
         Vincula multiples datasets por patient_id
 
+        Ver `DatasetLinker`: indice de claves unico, joins 1:1 y resumenes
+        1:N sin producto cartesiano, en tiempo lineal en el total de filas.
+
         Args:
-            datasets: Lista de DataFrames a vincular
+            datasets: Lista (o dict nombre -> DataFrame) a vincular
             key: Columna clave (default: patient_id)
+            how: 'wide' (resumen por paciente) o 'normalized' (tablas con patient_key)
 
         Returns:
-            DataFrame vinculado
+            DataFrame vinculado, o dict de tablas si how='normalized'
         """
         if not datasets:
             return pd.DataFrame()
 
-        result = datasets[0]
-        for df in datasets[1:]:
-            result = result.merge(df, on=key, how="outer")
-
-        return result
+        linker = DatasetLinker(datasets, key=key)
+        if how == "wide":
+            return linker.wide()
+        elif how == "normalized":
+            return linker.normalized()
+        raise ValueError(f"Modo de vinculacion no soportado: {how}")
 
     def get_registry(self) -> pd.DataFrame:
         """Retorna registro completo de pacientes generados"""
@@ -265,6 +475,144 @@ class PatientIDGenerator(BaseGenerator):
         return pd.DataFrame(records)
 
 
+def _sample_patients(
+    rng: np.random.Generator,
+    n: int,
+    patient_ids: Optional[List[str]],
+    patient_keys: Optional[np.ndarray],
+) -> tuple:
+    """
+    Asigna n filas a pacientes uniformemente.
+
+    Returns:
+        (indices, columna): columna patient_key (int64) si hay claves, o
+        patient_id categorica (codigos enteros, sin copiar strings)
+    """
+    if patient_keys is not None:
+        keys = np.asarray(patient_keys, dtype=np.int64)
+        idx = rng.integers(0, len(keys), n)
+        return idx, {"patient_key": keys[idx]}
+
+    if not patient_ids:
+        raise ValueError("Se requiere patient_ids o patient_keys")
+    idx = rng.integers(0, len(patient_ids), n)
+    categories = pd.Index(patient_ids)
+    if categories.is_unique:
+        column = pd.Categorical.from_codes(idx, categories=categories)
+    else:
+        column = categories.to_numpy()[idx]
+    return idx, {"patient_id": column}
+
+
+class DatasetLinker:
+    """
+    Vinculador estrella por clave de paciente.
+
+    Construye una sola vez un indice de claves (union de todas las tablas,
+    en orden de aparicion) y traduce cada tabla a `patient_key` entero con
+    una sonda hash por fila. Las tablas con clave unica se tratan como
+    dimensiones (1:1) y el resto como hechos (1:N).
+    """
+
+    def __init__(
+        self,
+        datasets: Union[List[pd.DataFrame], Dict[str, pd.DataFrame]],
+        key: str = "patient_id",
+    ):
+        """
+        Args:
+            datasets: Lista (nombres t1, t2, ...) o dict nombre -> DataFrame
+            key: Columna clave comun
+        """
+        if isinstance(datasets, dict):
+            self.tables = dict(datasets)
+        else:
+            self.tables = {f"t{i + 1}": df for i, df in enumerate(datasets)}
+        for name, df in self.tables.items():
+            if key not in df.columns:
+                raise ValueError(f"Tabla '{name}' no tiene columna clave '{key}'")
+
+        self.key = key
+        self.index = pd.Index(
+            pd.unique(np.concatenate([df[key].to_numpy() for df in self.tables.values()]))
+        )
+        self.codes = {
+            name: self.index.get_indexer(df[key]) for name, df in self.tables.items()
+        }
+        self.is_unique = {
+            name: len(codes) == len(np.unique(codes)) for name, codes in self.codes.items()
+        }
+
+    @property
+    def n_keys(self) -> int:
+        return len(self.index)
+
+    def normalized(self) -> Dict[str, pd.DataFrame]:
+        """
+        Tablas normalizadas con `patient_key` (int64) consistente.
+
+        Returns:
+            Dict con tabla `patient_keys` (patient_key -> clave original) y cada
+            tabla de entrada con columna `patient_key` agregada
+        """
+        result = {
+            "patient_keys": pd.DataFrame(
+                {"patient_key": np.arange(self.n_keys, dtype=np.int64), self.key: self.index}
+            )
+        }
+        for name, df in self.tables.items():
+            table = df.reset_index(drop=True)
+            table.insert(0, "patient_key", self.codes[name].astype(np.int64))
+            result[name] = table
+        return result
+
+    def wide(self) -> pd.DataFrame:
+        """
+        Resumen a nivel paciente (una fila por clave).
+
+        Tablas 1:1 aportan sus columnas (por posicion, sin merge); tablas 1:N
+        aportan `n_<tabla>` y la media de cada columna numerica via bincount.
+        """
+        names = list(self.tables)
+        first = names[0]
+        if self.is_unique[first]:
+            # pd.unique conserva orden: las primeras claves son las de la dimension
+            wide = self.tables[first].reset_index(drop=True)
+            if len(wide) < self.n_keys:
+                wide = wide.reindex(range(self.n_keys))
+                wide[self.key] = self.index
+            names = names[1:]
+        else:
+            wide = pd.DataFrame({self.key: self.index})
+
+        for name in names:
+            df = self.tables[name].reset_index(drop=True)
+            codes = self.codes[name]
+            if self.is_unique[name]:
+                pos = np.full(self.n_keys, -1, dtype=np.int64)
+                pos[codes] = np.arange(len(df))
+                other = df.drop(columns=self.key).reindex(pos).reset_index(drop=True)
+                other.columns = [
+                    f"{name}_{c}" if c in wide.columns else c for c in other.columns
+                ]
+                wide = pd.concat([wide, other], axis=1)
+                continue
+
+            summary = {f"n_{name}": np.bincount(codes, minlength=self.n_keys)}
+            for col in df.select_dtypes(include="number").columns:
+                if col == self.key:
+                    continue
+                values = df[col].to_numpy(dtype=np.float64)
+                valid = ~np.isnan(values)
+                sums = np.bincount(codes[valid], weights=values[valid], minlength=self.n_keys)
+                counts = np.bincount(codes[valid], minlength=self.n_keys)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    summary[f"{name}_{col}_mean"] = sums / counts
+            wide = pd.concat([wide, pd.DataFrame(summary)], axis=1)
+
+        return wide
+
+
 class EncounterGenerator(BaseGenerator):
     """Generador de encuentros clinicos vinculados a pacientes"""
 
@@ -283,10 +631,15 @@ class EncounterGenerator(BaseGenerator):
         Returns:
             DataFrame con encuentros
         """
-        patient_ids = kwargs.get("patient_ids", [f"PAT-{i:06d}" for i in range(100)])
+        patient_keys = kwargs.get("patient_keys", None)
+        patient_ids = kwargs.get(
+            "patient_ids",
+            [f"PAT-{i:06d}" for i in range(100)] if patient_keys is None else None,
+        )
         return self.generate_encounters(
             patient_ids=patient_ids,
             n_encounters=n,
+            patient_keys=patient_keys,
             date_range=kwargs.get("date_range", ("2020-01-01", "2024-12-31")),
             include_diagnoses=kwargs.get("include_diagnoses", True),
             include_procedures=kwargs.get("include_procedures", False),
@@ -294,110 +647,102 @@ class EncounterGenerator(BaseGenerator):
 
     def generate_encounters(
         self,
-        patient_ids: List[str],
+        patient_ids: Optional[List[str]],
         n_encounters: int,
         date_range: tuple = ("2020-01-01", "2024-12-31"),
         include_diagnoses: bool = True,
         include_procedures: bool = False,
+        patient_keys: Optional[np.ndarray] = None,
     ) -> pd.DataFrame:
         """
         Genera encuentros para lista de pacientes
 
         Args:
-            patient_ids: Lista de patient_ids
+            patient_ids: Lista de patient_ids (columna patient_id categorica)
             n_encounters: Numero total de encuentros
             date_range: Rango de fechas (inicio, fin)
             include_diagnoses: Incluir diagnosticos CIE-10
             include_procedures: Incluir procedimientos
+            patient_keys: Claves enteras de pacientes; si se entregan, la
+                tabla lleva patient_key en lugar de patient_id
 
         Returns:
             DataFrame con encuentros
         """
         self._validate_positive_int(n_encounters, "n_encounters")
+        patient_idx, patient_column = _sample_patients(
+            self.rng, n_encounters, patient_ids, patient_keys
+        )
 
         start = pd.Timestamp(date_range[0])
         end = pd.Timestamp(date_range[1])
         date_range_days = (end - start).days
 
         # Vectorized generation
-        patient_choices = self.rng.choice(patient_ids, n_encounters)
         days_offset = self.rng.integers(0, date_range_days, n_encounters)
+        type_sampler = self._sampler(ENCOUNTER_TYPES, [0.55, 0.2, 0.1, 0.15])
+        type_codes = type_sampler.sample(n_encounters)
+        facility_nums = self.rng.integers(1, MAX_FACILITIES + 1, n_encounters)
+        provider_nums = self.rng.integers(1, 500, n_encounters)
+        encounter_nums = np.arange(self._counter + 1, self._counter + n_encounters + 1)
+        self._counter += n_encounters
+
+        # Columnas de codigos: (sampler, codigos, admite nulos); -1 = sin codigo
+        optional = {}
+        if include_diagnoses:
+            dx_sampler = self._sampler(COMMON_CIE10)
+            optional["primary_dx"] = (dx_sampler, dx_sampler.sample(n_encounters), False)
+            has_secondary = self.rng.random(n_encounters) < 0.4
+            secondary = dx_sampler.sample(n_encounters)
+            secondary[~has_secondary] = -1
+            optional["secondary_dx"] = (dx_sampler, secondary, True)
+        if include_procedures:
+            has_procedure = self.rng.random(n_encounters) < 0.3
+            procedure_sampler = self._sampler(PROCEDURES)
+            procedures = procedure_sampler.sample(n_encounters)
+            procedures[~has_procedure] = -1
+            optional["procedure_code"] = (procedure_sampler, procedures, True)
+
+        if frames.active_backend() == "polars":
+            buf = ColumnBuffer(n_encounters)
+            buf.ids("encounter_id", "ENC-", encounter_nums, 8)
+            for name, values in patient_column.items():
+                if isinstance(values, pd.Categorical):
+                    buf.codes(name, values.codes, values.categories.to_numpy())
+                else:
+                    buf.put(name, values)
+            buf.put("encounter_date", np.datetime64(start.date(), "D") + days_offset)
+            buf.codes("encounter_type", type_codes, type_sampler.categories)
+            buf.ids("facility_id", "FAC-", facility_nums, 3)
+            buf.ids("provider_id", "PROV-", provider_nums, 4)
+            for name, (sampler, codes, _) in optional.items():
+                buf.codes(name, codes, sampler.categories)
+            return buf.to_polars()
+
         enc_dates = start + pd.to_timedelta(days_offset, unit="D")
-        encounter_types = self.rng.choice(
-            ["ambulatory", "emergency", "inpatient", "telehealth"],
-            n_encounters,
-            p=[0.55, 0.2, 0.1, 0.15],
+        df = pd.DataFrame(
+            {
+                "encounter_id": self._format_ids("ENC-", encounter_nums, 8),
+                **patient_column,
+                "encounter_date": enc_dates.strftime("%Y-%m-%d"),
+                "encounter_type": type_sampler.categories[type_codes],
+                "facility_id": self._format_ids("FAC-", facility_nums, 3),
+                "provider_id": self._format_ids("PROV-", provider_nums, 4),
+            }
         )
-        facility_ids = [
-            f"FAC-{i:03d}" for i in self.rng.integers(1, 100, n_encounters)
-        ]
-        provider_ids = [
-            f"PROV-{i:04d}" for i in self.rng.integers(1, 500, n_encounters)
-        ]
+        for name, (sampler, codes, nullable) in optional.items():
+            values = sampler.categories[codes]
+            df[name] = np.where(codes >= 0, values, None) if nullable else values
 
-        encounters = []
-        for i in range(n_encounters):
-            self._counter += 1
-            enc = {
-                "encounter_id": f"ENC-{self._counter:08d}",
-                "patient_id": patient_choices[i],
-                "encounter_date": enc_dates[i].strftime("%Y-%m-%d"),
-                "encounter_type": encounter_types[i],
-                "facility_id": facility_ids[i],
-                "provider_id": provider_ids[i],
-            }
+        return df
 
-            if include_diagnoses:
-                enc["primary_dx"] = self._random_cie10()
-                enc["secondary_dx"] = (
-                    self._random_cie10() if self.rng.random() < 0.4 else None
-                )
-
-            if include_procedures:
-                enc["procedure_code"] = (
-                    self._random_procedure() if self.rng.random() < 0.3 else None
-                )
-
-            encounters.append(enc)
-
-        return pd.DataFrame(encounters)
-
-    def _random_cie10(self) -> str:
-        """Genera codigo CIE-10 aleatorio"""
-        common_codes = [
-            "I10",
-            "E11.9",
-            "J06.9",
-            "M54.5",
-            "K29.7",
-            "F32.9",
-            "J44.9",
-            "I25.1",
-            "E78.5",
-            "N39.0",
-            "R10.4",
-            "J18.9",
-            "K21.0",
-            "G43.9",
-            "L30.9",
-        ]
-        return self.rng.choice(common_codes)
-
-    def _random_procedure(self) -> str:
-        """Genera codigo de procedimiento aleatorio"""
-        procedures = [
-            "99213",
-            "99214",
-            "99215",
-            "36415",
-            "80053",
-            "85025",
-            "81001",
-            "71046",
-            "93000",
-            "90715",
-        ]
-        return self.rng.choice(procedures)
+    def _random_cie10(self, n: int) -> np.ndarray:
+        """Genera n codigos CIE-10 aleatorios"""
+        return self._sampler(COMMON_CIE10).sample_values(n)
+
+    def _random_procedure(self, n: int) -> np.ndarray:
+        """Genera n codigos de procedimiento aleatorios"""
+        return self._sampler(PROCEDURES).sample_values(n)
 
 
 class LaboratoryGenerator(BaseGenerator):
@@ -417,26 +762,34 @@ class LaboratoryGenerator(BaseGenerator):
         Returns:
             DataFrame con resultados
         """
-        patient_ids = kwargs.get("patient_ids", [f"PAT-{i:06d}" for i in range(100)])
+        patient_keys = kwargs.get("patient_keys", None)
+        patient_ids = kwargs.get(
+            "patient_ids",
+            [f"PAT-{i:06d}" for i in range(100)] if patient_keys is None else None,
+        )
         return self.generate_labs(
             patient_ids=patient_ids,
             n_results=n,
             lab_panels=kwargs.get("lab_panels", None),
+            patient_keys=patient_keys,
         )
 
     def generate_labs(
         self,
-        patient_ids: List[str],
+        patient_ids: Optional[List[str]],
         n_results: int,
         lab_panels: List[str] = None,
+        patient_keys: Optional[np.ndarray] = None,
     ) -> pd.DataFrame:
         """
         Genera resultados de laboratorio
 
         Args:
-            patient_ids: Lista de patient_ids
+            patient_ids: Lista de patient_ids (columna patient_id categorica)
             n_results: Numero de resultados
             lab_panels: Paneles a incluir (default: todos)
+            patient_keys: Claves enteras de pacientes; si se entregan, la
+                tabla lleva patient_key en lugar de patient_id
 
         Returns:
             DataFrame con resultados
@@ -444,65 +797,77 @@ class LaboratoryGenerator(BaseGenerator):
         self._validate_positive_int(n_results, "n_results")
 
         if lab_panels is None:
-            lab_panels = ["chemistry", "hematology", "lipid"]
-
-        lab_definitions = {
-            "chemistry": [
-                ("glucose", 70, 100, "mg/dL", 50, 200),
-                ("creatinine", 0.7, 1.3, "mg/dL", 0.3, 5.0),
-                ("bun", 7, 20, "mg/dL", 3, 50),
-                ("sodium", 136, 145, "mEq/L", 130, 155),
-                ("potassium", 3.5, 5.0, "mEq/L", 2.5, 6.5),
-            ],
-            "hematology": [
-                ("hemoglobin", 12, 17, "g/dL", 8, 20),
-                ("hematocrit", 36, 50, "%", 25, 55),
-                ("wbc", 4.5, 11.0, "K/uL", 2.0, 25.0),
-                ("platelets", 150, 400, "K/uL", 50, 600),
-            ],
-            "lipid": [
-                ("total_cholesterol", 150, 200, "mg/dL", 100, 350),
-                ("ldl", 70, 100, "mg/dL", 40, 250),
-                ("hdl", 40, 60, "mg/dL", 20, 100),
-                ("triglycerides", 50, 150, "mg/dL", 30, 500),
-            ],
-        }
-
-        results = []
+            lab_panels = LAB_PANELS
 
-        for _ in range(n_results):
-            patient_id = self.rng.choice(patient_ids)
-            panel = self.rng.choice(lab_panels)
+        # Un panel por resultado, expandido a sus tests
+        patient_idx, patient_column = _sample_patients(
+            self.rng, n_results, patient_ids, patient_keys
+        )
+        panel_idx = self._sampler(np.arange(len(lab_panels))).sample(n_results)
+        days_ago = self.rng.integers(0, 365 * 3, n_results)
+        result_idx, tests = self.expand_panels(panel_idx, lab_panels)
+
+        test_dates = (
+            pd.Timestamp(self._today()) - pd.to_timedelta(days_ago, unit="D")
+        ).strftime("%Y-%m-%d")
+
+        tests.insert(0, "test_date", np.asarray(test_dates)[result_idx])
+        for i, (col, column) in enumerate(patient_column.items()):
+            tests.insert(i, col, column[result_idx])
+        return tests
+
+    def expand_panels(
+        self, panel_idx: np.ndarray, lab_panels: List[str]
+    ) -> tuple:
+        """
+        Expande paneles a sus tests y genera valores (vectorizado).
 
-            for test in lab_definitions.get(panel, []):
-                test_name, low_norm, high_norm, unit, low_range, high_range = test
+        Args:
+            panel_idx: Indice de panel (sobre lab_panels) por resultado
+            lab_panels: Paneles disponibles
 
-                # 80% normal, 20% abnormal
-                if self.rng.random() < 0.8:
-                    value = self.rng.uniform(low_norm, high_norm)
-                else:
-                    if self.rng.random() < 0.5:
-                        value = self.rng.uniform(low_range, low_norm)
-                    else:
-                        value = self.rng.uniform(high_norm, high_range)
-
-                results.append(
-                    {
-                        "patient_id": patient_id,
-                        "test_date": (
-                            pd.Timestamp.now()
-                            - pd.Timedelta(days=int(self.rng.integers(0, 365 * 3)))
-                        ).strftime("%Y-%m-%d"),
-                        "panel": panel,
-                        "test_name": test_name,
-                        "value": round(value, 2),
-                        "unit": unit,
-                        "low_normal": low_norm,
-                        "high_normal": high_norm,
-                        "abnormal_flag": (
-                            "L" if value < low_norm else ("H" if value > high_norm else "N")
-                        ),
-                    }
-                )
-
-        return pd.DataFrame(results)
+        Returns:
+            (result_idx, tests): indice del resultado de origen por fila y
+            DataFrame con panel, test_name, value, unit, rangos y abnormal_flag
+        """
+        # Tabla plana de tests: panel -> rango [offset, offset + size)
+        tests = [test for panel in lab_panels for test in LAB_DEFINITIONS.get(panel, [])]
+        if not tests:
+            raise ValueError(f"Paneles de laboratorio desconocidos: {lab_panels}")
+        sizes = np.array([len(LAB_DEFINITIONS.get(panel, [])) for panel in lab_panels])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        names, low_norm, high_norm, units, low_range, high_range = (
+            np.array(col) for col in zip(*tests)
+        )
+        low_norm, high_norm = low_norm.astype(float), high_norm.astype(float)
+        low_range, high_range = low_range.astype(float), high_range.astype(float)
+
+        per_result = sizes[panel_idx]
+        result_idx = np.repeat(np.arange(len(panel_idx)), per_result)
+        starts = np.cumsum(per_result) - per_result
+        within = np.arange(per_result.sum()) - np.repeat(starts, per_result)
+        test_idx = offsets[panel_idx][result_idx] + within
+        n_tests = len(test_idx)
+
+        # 80% normal, 20% anormal (mitad bajo, mitad alto)
+        lo, hi = low_norm[test_idx], high_norm[test_idx]
+        u = self.rng.random(n_tests)
+        abnormal = self.rng.random(n_tests) >= 0.8
+        below = self.rng.random(n_tests) < 0.5
+        lower = np.where(abnormal, np.where(below, low_range[test_idx], hi), lo)
+        upper = np.where(abnormal, np.where(below, lo, high_range[test_idx]), hi)
+        values = np.round(lower + u * (upper - lower), 2)
+
+        return result_idx, pd.DataFrame(
+            {
+                "panel": np.asarray(lab_panels)[panel_idx][result_idx],
+                "test_name": names[test_idx],
+                "value": values,
+                "unit": units[test_idx],
+                "low_normal": lo,
+                "high_normal": hi,
+                "abnormal_flag": np.select(
+                    [values < lo, values > hi], ["L", "H"], default="N"
+                ),
+            }
+        )
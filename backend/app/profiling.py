@@ -0,0 +1,231 @@
+"""
+Instrumentacion de generadores
+
+- `span(nombre)`: context manager que mide tiempo (y memoria asignada si
+  tracemalloc esta activo) de una etapa. Sin perfil activo no hace nada,
+  por lo que puede quedar en caminos calientes.
+- `profile()`: activa un `Profiler` en el contexto actual (contextvar,
+  aislado por request/hilo) y opcionalmente tracemalloc.
+- `METRICS`: contadores globales del proceso (llamadas/filas/segundos por
+  generador y etapas perfiladas) en formato Prometheus (`/metrics`).
+
+Uso:
+    with profile() as prof:
+        df = DemographicsGenerator().generate(100_000)
+    print(prof.summary())
+
+    df = gen.generate(100_000, profile=True)  # perfil en gen.last_profile
+"""
+
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+import threading
+import time
+import tracemalloc
+
+
+@dataclass
+class SpanStats:
+    """Estadisticas acumuladas de una etapa"""
+
+    calls: int = 0
+    seconds: float = 0.0
+    alloc_bytes: int = 0
+    peak_bytes: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "alloc_bytes": self.alloc_bytes,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+class Profiler:
+    """Acumula tiempos y memoria por etapa (span)"""
+
+    def __init__(self, trace_memory: bool = True):
+        """
+        Args:
+            trace_memory: Medir memoria con tracemalloc (agrega overhead)
+        """
+        self.trace_memory = trace_memory
+        self.stats: Dict[str, SpanStats] = {}
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        # Pila de [memoria al entrar, peak absoluto visto] por span abierto
+        self._stack: List[List[int]] = []
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Mide una etapa; los spans anidados se cuentan tambien en el padre"""
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+            # reset_peak aisla el peak del span; el del padre se conserva en la pila
+            tracemalloc.reset_peak()
+            self._stack.append([current, current])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = self.stats.setdefault(name, SpanStats())
+            stats.calls += 1
+            stats.seconds += elapsed
+            if tracing:
+                entry, seen = self._stack.pop()
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, seen)
+                stats.alloc_bytes += current - entry
+                stats.peak_bytes = max(stats.peak_bytes, peak - entry)
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], peak)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Etapa -> calls, seconds, alloc_bytes, peak_bytes"""
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def top_allocations(self, limit: int = 10) -> List[Tuple[str, int, int]]:
+        """
+        Lineas con mayor memoria viva al cerrar el perfil (snapshot tracemalloc).
+
+        Returns:
+            Lista de (archivo:linea, bytes, bloques)
+        """
+        if self.snapshot is None:
+            return []
+        return [
+            (str(stat.traceback[0]), stat.size, stat.count)
+            for stat in self.snapshot.statistics("lineno")[:limit]
+        ]
+
+    def summary(self, limit: int = 10) -> str:
+        """Tabla legible de etapas (por tiempo) y asignaciones principales"""
+        lines = [f"{'etapa':<40} {'llamadas':>9} {'segundos':>10} {'asignado MB':>12} {'peak MB':>9}"]
+        for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].seconds):
+            lines.append(
+                f"{name:<40} {stats.calls:>9} {stats.seconds:>10.4f} "
+                f"{stats.alloc_bytes / 2**20:>12.2f} {stats.peak_bytes / 2**20:>9.2f}"
+            )
+        top = self.top_allocations(limit)
+        if top:
+            lines.append("")
+            lines.append(f"{'asignaciones vivas':<60} {'MB':>9} {'bloques':>9}")
+            for location, size, count in top:
+                lines.append(f"{location[-60:]:<60} {size / 2**20:>9.2f} {count:>9}")
+        return "\n".join(lines)
+
+
+_active: ContextVar[Optional[Profiler]] = ContextVar("profiler", default=None)
+_NULL = nullcontext()
+
+
+def active_profiler() -> Optional[Profiler]:
+    """Profiler activo en el contexto actual (o None)"""
+    return _active.get()
+
+
+def span(name: str):
+    """Span en el profiler activo; no-op si no hay perfil"""
+    profiler = _active.get()
+    if profiler is None:
+        return _NULL
+    return profiler.span(name)
+
+
+@contextmanager
+def profile(trace_memory: bool = True) -> Iterator[Profiler]:
+    """
+    Activa un Profiler para el bloque.
+
+    Args:
+        trace_memory: Activar tracemalloc durante el bloque (si no estaba activo)
+
+    Yields:
+        Profiler con las etapas medidas (al salir se publica en METRICS)
+    """
+    profiler = Profiler(trace_memory)
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
+        if trace_memory and tracemalloc.is_tracing():
+            profiler.snapshot = tracemalloc.take_snapshot()
+        if started:
+            tracemalloc.stop()
+        METRICS.record_profile(profiler)
+
+
+class Metrics:
+    """Contadores del proceso, exportables en formato Prometheus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.generate: Dict[str, List[float]] = {}  # generador -> [llamadas, filas, segundos]
+        self.stages: Dict[str, SpanStats] = {}
+
+    def record_generate(self, generator: str, rows: int, seconds: float) -> None:
+        """Registra una llamada a generate()"""
+        with self._lock:
+            counters = self.generate.setdefault(generator, [0, 0, 0.0])
+            counters[0] += 1
+            counters[1] += rows
+            counters[2] += seconds
+
+    def record_profile(self, profiler: Profiler) -> None:
+        """Acumula las etapas de un perfil"""
+        with self._lock:
+            for name, stats in profiler.stats.items():
+                total = self.stages.setdefault(name, SpanStats())
+                total.calls += stats.calls
+                total.seconds += stats.seconds
+                total.alloc_bytes += stats.alloc_bytes
+                total.peak_bytes = max(total.peak_bytes, stats.peak_bytes)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.generate.clear()
+            self.stages.clear()
+
+    def render(self) -> str:
+        """Texto de exposicion Prometheus (version 0.0.4)"""
+        with self._lock:
+            generate = {name: list(values) for name, values in self.generate.items()}
+            stages = {name: stats.as_dict() for name, stats in self.stages.items()}
+
+        families = [
+            ("shdb_generate_calls_total", "counter", "Llamadas a generate() por generador",
+             "generator", {name: v[0] for name, v in generate.items()}),
+            ("shdb_generate_rows_total", "counter", "Filas generadas por generador",
+             "generator", {name: v[1] for name, v in generate.items()}),
+            ("shdb_generate_seconds_total", "counter", "Segundos en generate() por generador",
+             "generator", {name: v[2] for name, v in generate.items()}),
+            ("shdb_stage_calls_total", "counter", "Llamadas por etapa perfilada",
+             "stage", {name: s["calls"] for name, s in stages.items()}),
+            ("shdb_stage_seconds_total", "counter", "Segundos por etapa perfilada",
+             "stage", {name: s["seconds"] for name, s in stages.items()}),
+            ("shdb_stage_alloc_bytes_total", "counter", "Bytes asignados netos por etapa perfilada",
+             "stage", {name: s["alloc_bytes"] for name, s in stages.items()}),
+            ("shdb_stage_peak_bytes", "gauge", "Peak de memoria por etapa perfilada",
+             "stage", {name: s["peak_bytes"] for name, s in stages.items()}),
+        ]
+        lines = []
+        for metric, kind, help_text, label, values in families:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for key, value in sorted(values.items()):
+                escaped = key.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{metric}{{{label}="{escaped}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
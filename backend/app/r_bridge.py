@@ -0,0 +1,226 @@
+"""
+Puente Python -> R con worker persistente
+
+Ejecuta los generadores de R_scripts/ (cie10.R, comorbid.R) en un unico
+proceso Rscript de larga vida (R_scripts/worker.R), en lugar de lanzar
+Rscript y hacer `source()` en cada llamada. Las solicitudes viajan como
+JSON por stdin/stdout y los resultados vuelven como archivos Arrow IPC
+(sin ida y vuelta por CSV).
+
+Requiere Rscript (settings.R_PATH) con los paquetes jsonlite, arrow y
+data.table, y pyarrow en Python.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import pandas as pd
+from .base_generator import BaseGenerator
+
+
+R_SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "R_scripts"
+WORKER_SCRIPT = R_SCRIPTS_DIR / "worker.R"
+
+# Nombre -> (script relativo a R_scripts, funcion)
+R_GENERATORS: Dict[str, Tuple[str, str]] = {
+    "cie10": ("generators/cie10.R", "generate_cie10_base"),
+    "comorbid": ("generators/comorbid.R", "generate_comorbid_base"),
+}
+
+
+class RBridgeError(RuntimeError):
+    """Error del worker R (no disponible, caido o error en la funcion)"""
+
+
+def find_rscript(path: Optional[str] = None) -> Optional[str]:
+    """Ruta de Rscript: argumento, settings.R_PATH o PATH"""
+    if path is None:
+        from .config import settings
+
+        path = settings.R_PATH
+    if path and Path(path).exists():
+        return str(path)
+    return shutil.which("Rscript")
+
+
+class RBridge:
+    """Cliente de un worker Rscript persistente"""
+
+    def __init__(
+        self,
+        rscript: Optional[str] = None,
+        scripts_dir: Union[str, Path] = R_SCRIPTS_DIR,
+        timeout: float = 300.0,
+    ):
+        """
+        Args:
+            rscript: Ejecutable Rscript (default: settings.R_PATH o PATH)
+            scripts_dir: Directorio base de los scripts R
+            timeout: Segundos maximos de espera por respuesta
+        """
+        self.rscript = find_rscript(rscript)
+        self.scripts_dir = Path(scripts_dir)
+        self.timeout = timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+        self._log_path: Optional[Path] = None
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def __enter__(self) -> "RBridge":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        """Lanza el worker (una vez) y espera su senal de listo"""
+        if self.running:
+            return
+        if self.rscript is None:
+            raise RBridgeError("Rscript no encontrado (revisar settings.R_PATH)")
+        self._tmpdir = tempfile.TemporaryDirectory(prefix="r_bridge_")
+        # stderr a archivo: un pipe sin leer puede bloquear al worker
+        self._log_path = Path(self._tmpdir.name) / "worker.log"
+        try:
+            with open(self._log_path, "w") as log:
+                self._process = subprocess.Popen(
+                    [self.rscript, "--vanilla", str(WORKER_SCRIPT), str(self.scripts_dir)],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=log,
+                    text=True,
+                    bufsize=1,
+                )
+        except OSError as e:
+            raise RBridgeError(f"No se pudo iniciar Rscript: {e}") from e
+        ready = self._read_response()
+        if ready.get("status") != "ready":
+            raise RBridgeError(f"Worker R no inicio correctamente: {ready}")
+
+    def call(self, script: str, fn: str, **args) -> pd.DataFrame:
+        """
+        Ejecuta una funcion R y retorna su data.frame.
+
+        Args:
+            script: Script relativo a scripts_dir (ej: generators/cie10.R)
+            fn: Nombre de la funcion
+            **args: Argumentos nombrados (serializables a JSON)
+
+        Returns:
+            DataFrame leido desde Arrow IPC
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("RBridge requiere pyarrow: pip install pyarrow") from e
+
+        with self._lock:
+            self.start()
+            request_id = self._next_id
+            self._next_id += 1
+            output = Path(self._tmpdir.name) / f"{request_id}.arrow"
+            request = {"id": request_id, "script": script, "fn": fn, "args": args,
+                       "output": str(output)}
+            self._send(request)
+            response = self._read_response()
+
+        if response.get("status") != "ok":
+            raise RBridgeError(f"{fn}: {response.get('message', response)}")
+        try:
+            with pa.memory_map(str(output)) as source:
+                return pa.ipc.open_file(source).read_pandas()
+        finally:
+            output.unlink(missing_ok=True)
+
+    def generate(self, name: str, n: int, seed: int = 42) -> pd.DataFrame:
+        """Ejecuta un generador registrado en R_GENERATORS"""
+        if name not in R_GENERATORS:
+            raise ValueError(f"Generador R no soportado: {name}. Opciones: {list(R_GENERATORS)}")
+        script, fn = R_GENERATORS[name]
+        if name == "comorbid":
+            return self.call(script, fn, n_patients=n, seed=seed)
+        return self.call(script, fn, n=n, seed=seed)
+
+    def close(self) -> None:
+        """Detiene el worker"""
+        if self.running:
+            try:
+                self._send({"id": 0, "fn": "__shutdown__"})
+                self._process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+        self._process = None
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+    def _send(self, request: dict) -> None:
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise RBridgeError(f"Worker R no disponible: {e}") from e
+
+    def _read_response(self) -> dict:
+        """Lee una linea JSON de stdout (con timeout)"""
+        result = {}
+
+        def read():
+            result["line"] = self._process.stdout.readline()
+
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+        reader.join(self.timeout)
+        line = result.get("line")
+        if reader.is_alive():
+            self._process.kill()
+            raise RBridgeError(f"Worker R sin respuesta tras {self.timeout}s")
+        if not line:
+            self._process.wait(timeout=5)
+            log = self._log_path.read_text().strip()
+            raise RBridgeError(f"Worker R termino inesperadamente: {log}")
+        return json.loads(line)
+
+
+_bridge: Optional[RBridge] = None
+
+
+def get_bridge() -> RBridge:
+    """Worker compartido del proceso (se inicia en la primera llamada)"""
+    global _bridge
+    if _bridge is None:
+        _bridge = RBridge()
+    return _bridge
+
+
+class RGenerator(BaseGenerator):
+    """Adaptador BaseGenerator para un generador R via el worker compartido"""
+
+    def __init__(self, name: str, seed: int = 42, bridge: Optional[RBridge] = None):
+        """
+        Args:
+            name: Nombre en R_GENERATORS
+            seed: Semilla (se pasa a set.seed en R)
+            bridge: Worker a usar (default: compartido)
+        """
+        super().__init__(seed)
+        if name not in R_GENERATORS:
+            raise ValueError(f"Generador R no soportado: {name}. Opciones: {list(R_GENERATORS)}")
+        self.name = name
+        self.bridge = bridge
+
+    def generate(self, n: int, **kwargs) -> pd.DataFrame:
+        """Genera n registros con el script R"""
+        self._validate_positive_int(n, "n")
+        bridge = self.bridge or get_bridge()
+        return bridge.generate(self.name, n, seed=self.seed)
@@ -0,0 +1,469 @@
+"""
+Registro de generadores
+
+Cada generador declara el schema que atiende, como se construye, como se
+mapean los `parameters` del schema a `generate()` y si produce varias
+tablas o soporta generacion por bloques (`iter_chunks`). API y CLI
+despachan por este modulo en lugar de ramificar por prefijo de nombre:
+
+    config = load_schema("epidemic_sir")
+    df = get_spec("epidemic_sir").generate(config)
+
+Los schemas se buscan en `schemas/` y sus subdirectorios
+(`schemas/epidemiology/epidemic_sir.yaml`).
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
+import importlib
+import yaml
+from . import profiling
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from .base_generator import BaseGenerator
+    from .models import SchemaConfig
+
+
+SCHEMAS_DIR = Path(__file__).resolve().parents[2] / "schemas"
+OUTPUT_DIR = Path(__file__).resolve().parents[1] / "data" / "output"
+
+Result = Union["pd.DataFrame", Dict[str, "pd.DataFrame"]]
+
+
+@dataclass(frozen=True)
+class GeneratorSpec:
+    """
+    Declaracion de un generador registrado.
+
+    Attributes:
+        name: Nombre del schema (y del generador en API/CLI)
+        generator: Clase BaseGenerator o "modulo:Clase" (relativo a app); el
+            modulo se importa recien al generar
+        options: kwargs fijos de `generate()` (ej: model="sir")
+        params: Parametro del schema -> kwarg de `generate()`
+        init: Funcion schema -> kwargs adicionales del constructor
+        configure: Funcion schema -> kwargs de `generate()` derivados de columnas
+        size_param: Parametro del schema que define n (default: n_rows)
+        tables: `generate()` retorna tabla -> DataFrame
+        chunked: Tiene `iter_chunks(n, **kwargs)` con bloques multi-tabla;
+            la escritura va por bloques sin materializar el resultado
+        n_rows: n por defecto si no existe archivo de schema
+        description: Descripcion si no existe archivo de schema
+    """
+
+    name: str
+    generator: Union[str, Type["BaseGenerator"]]
+    options: Dict[str, Any] = field(default_factory=dict)
+    params: Dict[str, str] = field(default_factory=dict)
+    init: Optional[Callable[["SchemaConfig"], Dict[str, Any]]] = None
+    configure: Optional[Callable[["SchemaConfig"], Dict[str, Any]]] = None
+    size_param: Optional[str] = None
+    tables: bool = False
+    chunked: bool = False
+    n_rows: int = 10_000
+    description: str = ""
+
+    def load(self) -> Type["BaseGenerator"]:
+        """Clase del generador (importa su modulo en el primer uso)"""
+        if not isinstance(self.generator, str):
+            return self.generator
+        module, _, name = self.generator.partition(":")
+        return getattr(importlib.import_module(f".{module}", __package__), name)
+
+    def create(self, config: "SchemaConfig", seed: Optional[int] = None) -> "BaseGenerator":
+        """Instancia el generador (seed default: la del schema)"""
+        init = self.init(config) if self.init else {}
+        return self.load()(seed=config.seed if seed is None else seed, **init)
+
+    def size(self, config: "SchemaConfig", n: Optional[int] = None) -> int:
+        """n efectivo: argumento, parametro `size_param` o n_rows del schema"""
+        if n:
+            return n
+        if self.size_param and self.size_param in config.parameters:
+            return config.parameters[self.size_param]
+        return config.n_rows
+
+    def kwargs(self, config: "SchemaConfig") -> Dict[str, Any]:
+        """kwargs de `generate()`: opciones fijas + parametros mapeados del schema"""
+        kwargs = dict(self.options)
+        for param, arg in self.params.items():
+            if param in config.parameters:
+                kwargs[arg] = config.parameters[param]
+        if self.configure:
+            kwargs.update(self.configure(config))
+        return kwargs
+
+    def generate(
+        self,
+        config: "SchemaConfig",
+        n: Optional[int] = None,
+        seed: Optional[int] = None,
+        backend: str = "pandas",
+    ) -> Result:
+        """Genera el resultado completo en memoria (frames del backend pedido)"""
+        generator = self.create(config, seed)
+        return generator.generate(self.size(config, n), backend=backend, **self.kwargs(config))
+
+    @property
+    def random_access(self) -> bool:
+        """El generador implementa `generate_rows` por bloques (importa su modulo)"""
+        from .base_generator import BaseGenerator
+
+        return not self.tables and self.load()._generate_block is not BaseGenerator._generate_block
+
+    def rows(
+        self,
+        config: "SchemaConfig",
+        start: int,
+        stop: int,
+        n: Optional[int] = None,
+        seed: Optional[int] = None,
+        max_rows: Optional[int] = None,
+    ) -> Tuple["pd.DataFrame", int]:
+        """
+        Filas [start, stop) de la tabla sin escribirla.
+
+        Con acceso aleatorio solo se generan los bloques que contienen el
+        rango (`BaseGenerator.generate_rows`) y las filas no dependen de n.
+        Si no, se genera la tabla completa de tamano n en memoria y se
+        recorta (costo O(n) por llamada, filas dependientes de n),
+        permitido solo si n <= max_rows.
+        `stop` se recorta al total; un `start` fuera de la tabla retorna 0 filas.
+
+        Returns:
+            (filas, total de filas de la tabla)
+
+        Raises:
+            ValueError: Schema multi-tabla, rango invalido o tabla demasiado
+                grande sin acceso aleatorio
+        """
+        if self.tables or self.chunked:
+            raise ValueError(f"{self.name}: acceso por filas no disponible para schemas multi-tabla")
+        if not 0 <= start < stop:
+            raise ValueError(f"Rango de filas invalido: [{start}, {stop})")
+        n = self.size(config, n)
+        if self.random_access:
+            if start >= n:
+                import pandas as pd
+
+                return pd.DataFrame(), n
+            generator = self.create(config, seed)
+            return generator.generate_rows(start, min(stop, n), **self.kwargs(config)), n
+        if max_rows is not None and n > max_rows:
+            raise ValueError(
+                f"{self.name} no tiene acceso aleatorio; n={n} excede {max_rows}"
+            )
+        df = self.generate(config, n, seed)
+        return df.iloc[start:stop].reset_index(drop=True), len(df)
+
+    def iter_chunks(
+        self,
+        config: "SchemaConfig",
+        n: Optional[int] = None,
+        seed: Optional[int] = None,
+        backend: str = "pandas",
+    ) -> Iterator[Dict[str, "pd.DataFrame"]]:
+        """
+        Bloques multi-tabla (tabla -> DataFrame).
+
+        Generadores sin `chunked` producen un solo bloque (armado en
+        `backend`); los de una tabla usan `name` como nombre de tabla. Los
+        bloques de generadores `chunked` son pandas (ver
+        `frames.convert_chunks`).
+        """
+        if self.chunked:
+            generator = self.create(config, seed)
+            yield from generator.iter_chunks(self.size(config, n), **self.kwargs(config))
+            return
+        result = self.generate(config, n, seed, backend)
+        yield result if self.tables else {self.name: result}
+
+
+REGISTRY: Dict[str, GeneratorSpec] = {}
+
+
+def register(spec: GeneratorSpec) -> GeneratorSpec:
+    """Registra un generador (reemplaza uno existente con el mismo nombre)"""
+    if isinstance(spec.generator, str):
+        if ":" not in spec.generator:
+            raise ValueError(f"generator debe ser 'modulo:Clase', recibido: {spec.generator}")
+    else:
+        from .base_generator import BaseGenerator
+
+        if not issubclass(spec.generator, BaseGenerator):
+            raise ValueError(f"{spec.generator.__name__} no es BaseGenerator")
+    REGISTRY[spec.name] = spec
+    return spec
+
+
+def get_spec(name: str) -> GeneratorSpec:
+    """Spec registrado; ValueError si el schema no tiene generador"""
+    if name not in REGISTRY:
+        raise ValueError(f"Schema no soportado: {name}. Opciones: {sorted(REGISTRY)}")
+    return REGISTRY[name]
+
+
+def find_schema(name: str, schemas_dir: Union[str, Path] = SCHEMAS_DIR) -> Optional[Path]:
+    """Ruta de `<name>.yaml` en schemas_dir o sus subdirectorios"""
+    matches = sorted(Path(schemas_dir).rglob(f"{name}.yaml"))
+    return matches[0] if matches else None
+
+
+def list_schemas(schemas_dir: Union[str, Path] = SCHEMAS_DIR) -> List[Path]:
+    """Archivos de schema disponibles (recursivo)"""
+    return sorted(Path(schemas_dir).rglob("*.yaml"))
+
+
+def schema_summaries(schemas_dir: Union[str, Path] = SCHEMAS_DIR) -> List[Dict[str, Any]]:
+    """
+    Resumen de schemas sin construir modelos ni importar generadores.
+
+    Returns:
+        Lista de dicts name, category, description, registered; incluye
+        generadores registrados sin archivo de schema (category None)
+    """
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    summaries = []
+    for path in list_schemas(schemas_dir):
+        with open(path) as f:
+            data = yaml.load(f, Loader=loader) or {}
+        summaries.append(
+            {
+                "name": path.stem,
+                "category": path.parent.name if path.parent != Path(schemas_dir) else None,
+                "description": data.get("description", ""),
+                "registered": path.stem in REGISTRY,
+            }
+        )
+    files = {summary["name"] for summary in summaries}
+    for name in sorted(set(REGISTRY) - files):
+        summaries.append(
+            {
+                "name": name,
+                "category": None,
+                "description": REGISTRY[name].description,
+                "registered": True,
+            }
+        )
+    return summaries
+
+
+def parse_schema(data: Dict[str, Any]) -> "SchemaConfig":
+    """
+    Construye SchemaConfig desde un YAML.
+
+    Acepta el formato `columns`/`parameters` y el formato `fields`/`defaults`
+    (outbreak, surveillance, encounters): `defaults.rows` y `defaults.seed`
+    pasan a n_rows/seed y el resto de `defaults` a `parameters`.
+    """
+    from .models import SchemaConfig
+
+    if "columns" not in data and "defaults" in data:
+        defaults = dict(data["defaults"])
+        data = {
+            "name": data["name"],
+            "description": data.get("description", ""),
+            "n_rows": defaults.pop("rows", 100_000),
+            "seed": defaults.pop("seed", 42),
+            "parameters": {**defaults, **data.get("parameters", {})},
+        }
+    return SchemaConfig(**data)
+
+
+def load_schema(name: str, schemas_dir: Union[str, Path] = SCHEMAS_DIR) -> "SchemaConfig":
+    """
+    Carga el schema `name`.
+
+    Generadores registrados sin archivo de schema (cohort, trajectories)
+    usan una configuracion por defecto.
+
+    Raises:
+        FileNotFoundError: Si no hay archivo ni generador registrado
+    """
+    path = find_schema(name, schemas_dir)
+    if path is not None:
+        with open(path) as f:
+            return parse_schema(yaml.safe_load(f))
+    if name in REGISTRY:
+        from .models import SchemaConfig
+
+        spec = REGISTRY[name]
+        return SchemaConfig(name=name, description=spec.description, n_rows=spec.n_rows)
+    raise FileNotFoundError(f"Schema no encontrado: {name}")
+
+
+def run(
+    name: str,
+    n: Optional[int] = None,
+    seed: Optional[int] = None,
+    output: Union[str, Path, None] = None,
+    format: str = "csv",
+    config: Optional["SchemaConfig"] = None,
+    backend: str = "pandas",
+) -> Tuple[Optional[Path], Dict[str, int]]:
+    """
+    Genera y escribe un schema.
+
+    Camino unico para API y CLI: los generadores `chunked` se escriben
+    bloque a bloque en el sink; el resto se genera en memoria y se escribe
+    como una tabla (`<name>`) o varias.
+
+    Args:
+        name: Nombre del schema
+        n: Numero de filas/unidades (default: del schema)
+        seed: Semilla (default: del schema)
+        output: Archivo `.csv` (una tabla), directorio (csv/parquet/arrow) o base
+            de datos (sqlite/duckdb); default OUTPUT_DIR (sqlite:
+            settings.DATABASE_URL)
+        format: csv, sqlite, parquet, duckdb o arrow
+        config: Schema ya cargado (default: `load_schema(name)`)
+        backend: pandas o polars (frames Polars con escritores CSV/Parquet
+            multihilo; requiere polars)
+
+    Returns:
+        (ruta de salida o None si sqlite usa settings.DATABASE_URL,
+        filas escritas por tabla)
+    """
+    from .frames import convert_chunks, validate_backend
+    from .storage import open_sink, write_chunks
+
+    validate_backend(backend)
+    config = config or load_schema(name)
+    spec = get_spec(name)
+    if output is None:
+        output = {"sqlite": None, "duckdb": OUTPUT_DIR / f"{name}.duckdb"}.get(format, OUTPUT_DIR)
+    output = Path(output) if output is not None else None
+
+    if format == "csv" and output.suffix == ".csv" and not (spec.tables or spec.chunked):
+        df = spec.generate(config, n, seed, backend)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with profiling.span("write.csv"):
+            if backend == "polars":
+                df.write_csv(output)
+            else:
+                df.to_csv(output, index=False)
+        return output, {name: len(df)}
+
+    chunks = convert_chunks(spec.iter_chunks(config, n, seed, backend), backend)
+    rows = write_chunks(chunks, open_sink(format, output))
+    return output, rows
+
+
+def _chunk_size(config: "SchemaConfig") -> Dict[str, Any]:
+    size = config.parameters.get("chunk_size")
+    return {"chunk_size": size} if size else {}
+
+
+def _cie10_catalog(config: "SchemaConfig") -> Dict[str, Any]:
+    codigo = next((c for c in config.columns if c.name == "codigo"), None)
+    return {"catalog_path": codigo.categories} if codigo and codigo.categories else {}
+
+
+def _cie10_errors(config: "SchemaConfig") -> Dict[str, Any]:
+    codigo = next((c for c in config.columns if c.name == "codigo"), None)
+    return {"error_types": codigo.error_types} if codigo and codigo.error_types else {}
+
+
+for _spec in [
+    GeneratorSpec(
+        "cie10", "generators:CIE10Generator", init=_cie10_catalog, configure=_cie10_errors
+    ),
+    GeneratorSpec("demographics", "generators:DemographicsGenerator"),
+    GeneratorSpec("comorbidity", "comorbidity:ComorbidityGenerator"),
+    GeneratorSpec(
+        "epidemic_sir", "epidemic_generators:EpidemicGenerator", options={"model": "sir"},
+        params={"population": "population", "R0": "R0", "gamma": "gamma"},
+    ),
+    GeneratorSpec(
+        "epidemic_seir", "epidemic_generators:EpidemicGenerator", options={"model": "seir"},
+        params={
+            "population": "population", "R0": "R0", "sigma": "sigma",
+            "gamma": "gamma", "latent_period": "latent_period",
+        },
+    ),
+    GeneratorSpec(
+        "timeseries_covid", "surveillance:TimeSeriesGenerator", options={"seasonality": True}
+    ),
+    GeneratorSpec(
+        "outbreak", "surveillance:OutbreakGenerator", params={"outbreak_type": "outbreak_type"}
+    ),
+    GeneratorSpec(
+        "surveillance", "surveillance:SurveillanceGenerator", params={"regions": "regions"},
+        size_param="days",
+    ),
+    GeneratorSpec(
+        "survival_cohort", "epidemic_generators:SurvivalGenerator",
+        options={"model": "kaplan_meier"},
+        params={"max_followup": "followup_days", "event_rate": "event_rate"},
+    ),
+    GeneratorSpec(
+        "case_control", "study_designs:CaseControlGenerator",
+        params={
+            k: k for k in [
+                "controls_per_case", "age_caliper", "match_on", "followup_days",
+                "baseline_rate", "exposure_prevalence", "rate_ratio",
+            ]
+        },
+    ),
+    GeneratorSpec(
+        "rct", "study_designs:RCTGenerator",
+        params={k: k for k in ["arms", "allocation", "method", "block_sizes", "strata", "n_sites"]},
+    ),
+    GeneratorSpec(
+        "linear", "regression_generator:RegressionGenerator", options={"model": "linear"},
+        params={"coefficients": "coeffs", "intercept": "intercept", "noise_level": "noise"},
+    ),
+    GeneratorSpec(
+        "logistic", "regression_generator:RegressionGenerator", options={"model": "logistic"},
+        params={"coefficients": "coeffs", "intercept": "intercept"},
+    ),
+    GeneratorSpec(
+        "poisson", "regression_generator:RegressionGenerator", options={"model": "poisson"},
+        params={"rate_lambda": "rate_lambda", "overdispersion": "overdispersion", "offset": "offset"},
+    ),
+    GeneratorSpec(
+        "cox", "regression_generator:RegressionGenerator", options={"model": "cox"},
+        params={
+            "baseline_hazard": "baseline_hazard", "hazard_ratios": "hazard_ratios",
+            "censoring_rate": "censoring_rate",
+        },
+    ),
+    GeneratorSpec(
+        "multiple", "regression_generator:RegressionGenerator", options={"model": "multiple"},
+        params={
+            "coefficients": "coeffs", "intercept": "intercept",
+            "include_interactions": "include_interactions",
+        },
+    ),
+    GeneratorSpec(
+        "high_dimensional", "regression_generator:RegressionGenerator",
+        options={"model": "high_dimensional"}, tables=True, chunked=True, init=_chunk_size,
+        params={
+            **{k: k for k in [
+                "n_dense", "n_sparse", "density", "rho", "signal_fraction", "intercept", "family",
+            ]},
+            "noise_level": "noise",
+        },
+    ),
+    GeneratorSpec(
+        "multilevel", "regression_generator:RegressionGenerator", options={"model": "multilevel"},
+        params={
+            **{k: k for k in [
+                "n_facilities", "n_regions", "n_providers", "sd_region", "sd_facility",
+                "sd_slope", "corr_intercept_slope", "sd_provider",
+            ]},
+            "coefficients": "coeffs",
+        },
+    ),
+    GeneratorSpec(
+        "cohort", "cohort:CohortPipeline", tables=True, chunked=True,
+        description="Cohorte EHR: pacientes, encuentros, diagnosticos, laboratorio, ENO",
+    ),
+    GeneratorSpec(
+        "trajectories", "trajectory:TrajectoryGenerator", tables=True, chunked=True,
+        description="Trayectorias longitudinales (Markov) de enfermedades cronicas",
+    ),
+]:
+    register(_spec)
@@ -1,26 +1,51 @@
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 import numpy as np
 import pandas as pd
-from .base_generator import BaseGenerator
+from scipy import sparse
+from .base_generator import BaseGenerator, CategoricalSampler
+from .patient_id import MAX_FACILITIES
+from .storage import concat_chunks
+
+
+STAGES = ["I", "II", "III", "IV"]
+
+DEFAULT_HAZARD_RATIOS = {
+    "age": 1.02,
+    "sex_M": 1.25,
+    "treatment_B": 0.75,
+    "stage": {"I": 1.0, "II": 1.8, "III": 2.5, "IV": 3.2},
+}
 
 
 class RegressionGenerator(BaseGenerator):
     """Generador completo de regresiones estadisticas"""
 
-    def __init__(self, seed: int = 42):
+    def __init__(self, seed: int = 42, chunk_size: int = 100_000):
+        """
+        Args:
+            seed: Semilla para reproducibilidad
+            chunk_size: Observaciones por bloque del modelo high_dimensional
+        """
         super().__init__(seed)
+        self._validate_positive_int(chunk_size, "chunk_size")
+        self.chunk_size = chunk_size
+        self._obs_counter = 0
 
-    def generate(self, n: int, model: str = "logistic", **kwargs) -> pd.DataFrame:
+    def generate(
+        self, n: int, model: str = "logistic", **kwargs
+    ) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
         """
         Genera datos para modelo de regresion.
 
         Args:
             n: Numero de observaciones
-            model: Tipo de modelo ('linear', 'logistic', 'poisson', 'cox', 'multiple')
+            model: Tipo de modelo ('linear', 'logistic', 'poisson', 'cox',
+                'multiple', 'multilevel', 'high_dimensional')
             **kwargs: Parametros del modelo
 
         Returns:
-            DataFrame con datos para regresion
+            DataFrame con datos para regresion; high_dimensional retorna
+            tabla -> DataFrame (ver `iter_chunks`)
         """
         self._validate_positive_int(n, "n")
 
@@ -51,6 +76,26 @@ class RegressionGenerator(BaseGenerator):
                 baseline_hazard=kwargs.get("baseline_hazard", 0.01),
                 durations=kwargs.get("durations", None),
                 censoring_rate=kwargs.get("censoring_rate", 0.3),
+                baseline=kwargs.get("baseline", "weibull"),
+                shape=kwargs.get("shape", 1.0),
+            )
+        elif model == "high_dimensional":
+            return concat_chunks(self.iter_chunks(n, **kwargs))
+        elif model == "multilevel":
+            return self.generate_multilevel(
+                n=n,
+                n_facilities=kwargs.get("n_facilities", MAX_FACILITIES),
+                n_regions=kwargs.get("n_regions", 16),
+                n_providers=kwargs.get("n_providers", None),
+                coeffs=kwargs.get("coeffs", {}),
+                sd_region=kwargs.get("sd_region", 0.3),
+                sd_facility=kwargs.get("sd_facility", 0.5),
+                sd_slope=kwargs.get("sd_slope", 0.2),
+                corr_intercept_slope=kwargs.get("corr_intercept_slope", 0.0),
+                sd_provider=kwargs.get("sd_provider", 0.2),
+                noise=kwargs.get("noise", 1.0),
+                family=kwargs.get("family", "gaussian"),
+                cluster_size_sd=kwargs.get("cluster_size_sd", 0.5),
             )
         elif model == "multiple":
             return self._multiple(
@@ -82,7 +127,7 @@ class RegressionGenerator(BaseGenerator):
         ages = self.rng.poisson(45, n)
         ages = np.clip(ages, 18, 85).astype(int)
 
-        sex = self.rng.choice(["M", "F"], n, p=[0.5, 0.5])
+        sex = self._sampler(["M", "F"], [0.5, 0.5]).sample_values(n)
         sex_M = (sex == "M").astype(int)
 
         bp = self.rng.normal(130, 15, n)
@@ -92,8 +137,8 @@ class RegressionGenerator(BaseGenerator):
             intercept
             + coeffs.get("age", 0) * ages
             + coeffs.get("sex_M", 0) * sex_M
-            + coeffs.get("bp", 0) * bp
-            + coeffs.get("chol", 0) * chol
+            + coeffs.get("bp", coeffs.get("blood_pressure", 0)) * bp
+            + coeffs.get("chol", coeffs.get("cholesterol", 0)) * chol
         )
         disease_prob = 1 / (1 + np.exp(-linear_pred))
         disease = self.rng.binomial(1, disease_prob, n)
@@ -129,6 +174,83 @@ class RegressionGenerator(BaseGenerator):
             }
         )
 
+    def simulate_cox(
+        self,
+        X: np.ndarray,
+        beta: np.ndarray,
+        baseline: str = "weibull",
+        scale: float = 0.01,
+        shape: float = 1.0,
+        censoring_rate: float = 0.0,
+        max_followup: Union[float, np.ndarray, None] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Simula tiempos de supervivencia bajo riesgos proporcionales.
+
+        Inversion de la hazard acumulada (Bender et al., 2005):
+        - Weibull:  H0(t) = scale * t^shape
+        - Gompertz: H0(t) = scale / shape * (exp(shape * t) - 1)
+        - Exponencial: Weibull con shape = 1
+
+        Args:
+            X: Matriz de covariables (n, k)
+            beta: Log hazard ratios (k,)
+            baseline: Hazard basal ('weibull', 'exponential', 'gompertz')
+            scale: Parametro de escala de la hazard basal (lambda)
+            shape: Forma Weibull (nu) o parametro Gompertz (alpha)
+            censoring_rate: Proporcion esperada de perdidas de seguimiento
+                antes de max_followup (censura independiente exponencial)
+            max_followup: Censura administrativa (escalar o por sujeto)
+
+        Returns:
+            (time, event): tiempo observado y 1 si el evento fue observado
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[:, None]
+        beta = np.asarray(beta, dtype=np.float64)
+        if X.shape[1] != len(beta):
+            raise ValueError(
+                f"X tiene {X.shape[1]} columnas y beta {len(beta)} coeficientes"
+            )
+        self._validate_positive_float(scale, "scale")
+        self._validate_positive_float(shape, "shape")
+        self._validate_probability(censoring_rate, "censoring_rate")
+        n = X.shape[0]
+
+        # -log(U) ~ Exp(1); se divide por lambda * exp(X beta) in-place
+        time = self.rng.standard_exponential(n)
+        risk = X @ beta
+        np.exp(risk, out=risk)
+        risk *= scale
+        time /= risk
+
+        if baseline == "weibull":
+            np.power(time, 1.0 / shape, out=time)
+        elif baseline == "exponential":
+            pass
+        elif baseline == "gompertz":
+            time *= shape
+            np.log1p(time, out=time)
+            time /= shape
+        else:
+            raise ValueError(f"Hazard basal no soportada: {baseline}")
+
+        observed = time
+        if censoring_rate > 0:
+            if max_followup is None:
+                raise ValueError("censoring_rate requiere max_followup")
+            censor_hazard = -np.log1p(-min(censoring_rate, 1 - 1e-12)) / np.asarray(
+                max_followup, dtype=np.float64
+            )
+            censor_time = self.rng.standard_exponential(n) / censor_hazard
+            observed = np.minimum(observed, censor_time)
+        if max_followup is not None:
+            observed = np.minimum(observed, max_followup)
+
+        event = (time <= observed).astype(np.int8)
+        return observed, event
+
     def _cox_ph(
         self,
         n: int,
@@ -136,54 +258,474 @@ class RegressionGenerator(BaseGenerator):
         baseline_hazard: float,
         durations: List[float] = None,
         censoring_rate: float = 0.3,
+        baseline: str = "weibull",
+        shape: float = 1.0,
     ) -> pd.DataFrame:
-        """Regresion de Cox: Hazard proporcional"""
+        """
+        Regresion de Cox: Hazard proporcional
+
+        Covariables edad, sexo, tratamiento y estadio; los hazard ratios
+        siguen el formato de schemas/regression/cox.yaml (`age` por ano,
+        `sex_M`, `treatment_B`, `stage: {II, III, IV}`). Cada sujeto recibe
+        un seguimiento administrativo tomado de `durations`.
+        """
         if durations is None:
             durations = [30, 90, 182.5, 365, 730, 1095, 1825]
 
+        hr = {**DEFAULT_HAZARD_RATIOS, **hazard_ratios}
+        stage_hr = {
+            **DEFAULT_HAZARD_RATIOS["stage"],
+            **{k: v for k, v in hazard_ratios.items() if k in STAGES},
+            **hazard_ratios.get("stage", {}),
+        }
+
         ages = self.rng.normal(60, 10, n).astype(int)
         ages = np.clip(ages, 35, 85)
 
-        sex = self.rng.choice(["M", "F"], n, p=[0.5, 0.5])
+        sex_sampler = self._sampler(["M", "F"], [0.5, 0.5])
+        sex_code = sex_sampler.sample(n)
+        stage_sampler = self._sampler(STAGES, [0.3, 0.25, 0.2, 0.25])
+        stage_code = stage_sampler.sample(n)
+        tx_sampler = self._sampler(["A", "B"], [0.5, 0.5])
+        tx_code = tx_sampler.sample(n)
+
+        # Matriz de diseno: edad centrada, sexo M, tratamiento B, log HR estadio
+        stage_log_hr = np.log([stage_hr[s] for s in STAGES])
+        X = np.empty((n, 4))
+        X[:, 0] = ages - 60
+        X[:, 1] = sex_code == 0
+        X[:, 2] = tx_code == 1
+        X[:, 3] = stage_log_hr[stage_code]
+        beta = np.array(
+            [np.log(hr["age"]), np.log(hr["sex_M"]), np.log(hr["treatment_B"]), 1.0]
+        )
 
-        stages = self.rng.choice(
-            ["I", "II", "III", "IV"], n, p=[0.3, 0.25, 0.2, 0.25]
+        followup = np.asarray(durations, dtype=np.float64)[
+            self.rng.integers(0, len(durations), n)
+        ]
+        time, events = self.simulate_cox(
+            X,
+            beta,
+            baseline=baseline,
+            scale=baseline_hazard,
+            shape=shape,
+            censoring_rate=censoring_rate,
+            max_followup=followup,
         )
-        stage_hr = np.array(
-            [
-                hazard_ratios.get(s, {"I": 1.0, "II": 1.8, "III": 2.5, "IV": 3.2}[s])
-                for s in stages
-            ]
+
+        return pd.DataFrame(
+            {
+                "subject_id": np.arange(1, n + 1),
+                "age": ages,
+                "sex": sex_sampler.categories[sex_code],
+                "treatment": tx_sampler.categories[tx_code],
+                "stage": stage_sampler.categories[stage_code],
+                "followup_days": time,
+                "event": events,
+                "censored": 1 - events,
+            }
         )
 
-        treatment = self.rng.choice(["A", "B"], n, p=[0.5, 0.5])
-        treatment_B = (treatment == "B").astype(int)
-        tx_hazard = np.where(treatment_B, 1.0, 0.75)
+    def generate_design_matrix(
+        self,
+        n: int,
+        n_dense: int = 10,
+        n_sparse: int = 100,
+        density: float = 0.02,
+        rho: float = 0.5,
+        coeffs: Optional[np.ndarray] = None,
+        intercept: float = 0.0,
+        noise: float = 1.0,
+        family: str = "gaussian",
+        signal_fraction: float = 0.1,
+        chunk_size: Optional[int] = None,
+    ) -> Tuple[sparse.csr_matrix, np.ndarray, np.ndarray]:
+        """
+        Genera matriz de diseno completa en memoria (CSR) y outcome.
+
+        Concatena los bloques de `iter_design_chunks`; para n muy grande
+        conviene consumir el iterador directamente.
 
-        base_hazard = baseline_hazard * np.exp(np.log(2) / 10 * (ages - 60) / 10)
-        cumulative_hazard = base_hazard * stage_hr + base_hazard * (1 + tx_hazard)
+        Returns:
+            (X, y, beta): X CSR (n, n_dense + n_sparse), outcome y
+            coeficientes verdaderos
+        """
+        blocks, outcomes = [], []
+        beta = None
+        for X_chunk, y_chunk, beta in self.iter_design_chunks(
+            n=n,
+            n_dense=n_dense,
+            n_sparse=n_sparse,
+            density=density,
+            rho=rho,
+            coeffs=coeffs,
+            intercept=intercept,
+            noise=noise,
+            family=family,
+            signal_fraction=signal_fraction,
+            chunk_size=chunk_size,
+            sparse_output=True,
+        ):
+            blocks.append(X_chunk)
+            outcomes.append(y_chunk)
+        return sparse.vstack(blocks, format="csr"), np.concatenate(outcomes), beta
 
-        event_prob = 1 - np.exp(-cumulative_hazard * 30 / 365)
-        events = self.rng.binomial(1, event_prob, n)
-        censored = self.rng.binomial(1, censoring_rate, n) - events
+    def iter_design_chunks(
+        self,
+        n: int,
+        n_dense: int = 10,
+        n_sparse: int = 100,
+        density: float = 0.02,
+        rho: float = 0.5,
+        coeffs: Optional[np.ndarray] = None,
+        intercept: float = 0.0,
+        noise: float = 1.0,
+        family: str = "gaussian",
+        signal_fraction: float = 0.1,
+        chunk_size: Optional[int] = None,
+        sparse_output: bool = True,
+    ) -> Iterator[Tuple[Union[sparse.csr_matrix, np.ndarray], np.ndarray, np.ndarray]]:
+        """
+        Genera matriz de diseno de alta dimension por bloques de filas.
 
-        # Assign followup from durations cyclically
-        followup = np.array([durations[i % len(durations)] for i in range(n)])
-        actual_followup = followup * self.rng.uniform(0.8, 1.2, n)
-        actual_followup = np.minimum(actual_followup, followup)
+        Columnas densas: normales con correlacion AR(1) `rho` entre columnas
+        vecinas. Columnas dispersas: indicadores binarios (diagnosticos
+        one-hot, exposiciones raras) con prevalencia media `density` y
+        heterogenea entre columnas. El outcome se calcula por bloque con
+        producto matriz-vector disperso, sin densificar X.
 
-        return pd.DataFrame(
+        Los coeficientes y prevalencias dependen solo de la semilla (ver
+        `_design_rng`); las filas siguen el RNG del generador.
+
+        Args:
+            n: Numero de observaciones
+            n_dense: Numero de covariables densas
+            n_sparse: Numero de covariables binarias dispersas
+            density: Prevalencia media de las columnas dispersas
+            rho: Correlacion AR(1) entre columnas densas consecutivas
+            coeffs: Coeficientes verdaderos (n_dense + n_sparse,)
+            intercept: Intercepto
+            noise: Desviacion estandar del error (familia gaussian)
+            family: 'gaussian', 'binomial' o 'poisson'
+            signal_fraction: Fraccion de coeficientes no nulos si coeffs es None
+            chunk_size: Filas por bloque (default: `self.chunk_size`)
+            sparse_output: Emitir bloques CSR (True) o densos (False)
+
+        Yields:
+            (X_chunk, y_chunk, beta)
+        """
+        for X_dense, X_sparse, y, beta in self._design_blocks(
+            n, n_dense, n_sparse, density, rho, coeffs, intercept, noise,
+            family, signal_fraction, chunk_size,
+        ):
+            if sparse_output:
+                X_chunk = sparse.hstack(
+                    [sparse.csr_matrix(X_dense), X_sparse], format="csr"
+                )
+            else:
+                X_chunk = np.hstack([X_dense, X_sparse.toarray()])
+            yield X_chunk, y, beta
+
+    def iter_chunks(
+        self,
+        n: int,
+        model: str = "high_dimensional",
+        n_dense: int = 10,
+        n_sparse: int = 100,
+        density: float = 0.02,
+        rho: float = 0.5,
+        coeffs: Optional[np.ndarray] = None,
+        intercept: float = 0.0,
+        noise: float = 1.0,
+        family: str = "gaussian",
+        signal_fraction: float = 0.1,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Dict[str, pd.DataFrame]]:
+        """
+        Modelo high_dimensional en bloques de `chunk_size` observaciones.
+
+        La matriz no se densifica ni se expande a una columna por
+        indicador: cada bloque tiene dos tablas de ancho acotado
+        - observations: obs_id, covariables densas x1..x{n_dense} e y
+        - indicators: indicadores dispersos en formato largo (obs_id,
+          feature s1..s{n_sparse}, value), una fila por celda no nula
+
+        `obs_id` continua entre llamadas, por lo que generar en varias
+        llamadas de `chunk_size` filas equivale a una sola llamada.
+
+        Args:
+            n: Numero de observaciones
+            model: Solo 'high_dimensional'
+            Resto: ver `iter_design_chunks`
+
+        Yields:
+            Dict tabla -> DataFrame del bloque
+        """
+        if model != "high_dimensional":
+            raise ValueError(f"iter_chunks solo soporta el modelo high_dimensional: {model}")
+        dense_columns = [f"x{i+1}" for i in range(n_dense)]
+        features = pd.CategoricalDtype([f"s{i+1}" for i in range(n_sparse)])
+
+        for X_dense, X_sparse, y, _ in self._design_blocks(
+            n, n_dense, n_sparse, density, rho, coeffs, intercept, noise,
+            family, signal_fraction, chunk_size,
+        ):
+            rows = len(y)
+            ids = np.arange(self._obs_counter + 1, self._obs_counter + rows + 1)
+            self._obs_counter += rows
+
+            observations = pd.DataFrame(X_dense, columns=dense_columns)
+            observations.insert(0, "obs_id", ids)
+            observations["y"] = y
+
+            cells = X_sparse.tocoo()
+            indicators = pd.DataFrame(
+                {
+                    "obs_id": ids[cells.row],
+                    "feature": pd.Categorical.from_codes(cells.col, dtype=features),
+                    "value": cells.data.astype(np.int8),
+                }
+            )
+            yield {"observations": observations, "indicators": indicators}
+
+    def _design_rng(self) -> np.random.Generator:
+        """
+        RNG de la estructura del diseno (coeficientes y prevalencias).
+
+        Derivado solo de la semilla, de modo que cada llamada por bloques
+        (o una reanudacion con `set_state`) usa el mismo diseno.
+        """
+        return np.random.default_rng(np.random.SeedSequence(self.seed).spawn(1)[0])
+
+    def _design_blocks(
+        self,
+        n: int,
+        n_dense: int,
+        n_sparse: int,
+        density: float,
+        rho: float,
+        coeffs: Optional[np.ndarray],
+        intercept: float,
+        noise: float,
+        family: str,
+        signal_fraction: float,
+        chunk_size: Optional[int],
+    ) -> Iterator[Tuple[np.ndarray, sparse.csr_matrix, np.ndarray, np.ndarray]]:
+        """Bloques (X_dense, X_sparse CSR, y, beta) de `iter_design_chunks`"""
+        chunk_size = self.chunk_size if chunk_size is None else chunk_size
+        self._validate_positive_int(n, "n")
+        self._validate_positive_int(chunk_size, "chunk_size")
+        self._validate_probability(density, "density")
+        self._validate_probability(signal_fraction, "signal_fraction")
+        if not -1 < rho < 1:
+            raise ValueError(f"rho debe estar en (-1, 1), recibido: {rho}")
+        if family not in ("gaussian", "binomial", "poisson"):
+            raise ValueError(f"Familia no soportada: {family}")
+
+        k = n_dense + n_sparse
+        if k <= 0:
+            raise ValueError("Se requiere al menos una covariable")
+
+        design_rng = self._design_rng()
+        if coeffs is None:
+            beta = np.where(
+                design_rng.random(k) < signal_fraction, design_rng.normal(0, 0.5, k), 0.0
+            )
+        else:
+            beta = np.asarray(coeffs, dtype=np.float64)
+            if len(beta) != k:
+                raise ValueError(f"coeffs debe tener {k} elementos, recibido: {len(beta)}")
+        beta_dense, beta_sparse = beta[:n_dense], beta[n_dense:]
+
+        # Prevalencia por columna dispersa (lognormal, media = density)
+        if n_sparse > 0 and density > 0:
+            prevalence = np.clip(
+                density * design_rng.lognormal(-0.5, 1.0, n_sparse), 0, 1
+            )
+            column_sampler = CategoricalSampler(
+                np.arange(n_sparse), prevalence, rng=self.rng
+            )
+            cells_density = prevalence.mean()
+        else:
+            column_sampler = None
+
+        innovation_sd = np.sqrt(1 - rho**2)
+        for start in range(0, n, chunk_size):
+            rows = min(chunk_size, n - start)
+
+            # Bloque denso AR(1): fila j de Z es la columna j de X
+            Z = self.rng.standard_normal((n_dense, rows))
+            for j in range(1, n_dense):
+                Z[j] *= innovation_sd
+                Z[j] += rho * Z[j - 1]
+            X_dense = Z.T
+
+            # Bloque disperso: celdas activas (filas uniformes, columnas por prevalencia)
+            if column_sampler is not None:
+                nnz = self.rng.binomial(rows * n_sparse, cells_density)
+                X_sparse = sparse.csr_matrix(
+                    (
+                        np.ones(nnz, dtype=np.float64),
+                        (self.rng.integers(0, rows, nnz), column_sampler.sample(nnz)),
+                    ),
+                    shape=(rows, n_sparse),
+                )
+                X_sparse.data[:] = 1.0
+            else:
+                X_sparse = sparse.csr_matrix((rows, n_sparse))
+
+            eta = X_dense @ beta_dense + X_sparse @ beta_sparse + intercept
+            if family == "gaussian":
+                y = eta + self.rng.normal(0, noise, rows)
+            elif family == "binomial":
+                y = (self.rng.random(rows) < 1 / (1 + np.exp(-eta))).astype(np.int8)
+            else:
+                y = self.rng.poisson(np.exp(eta))
+            yield X_dense, X_sparse, y, beta
+
+    def generate_multilevel(
+        self,
+        n: int,
+        n_facilities: int = MAX_FACILITIES,
+        n_regions: int = 16,
+        n_providers: Optional[int] = None,
+        coeffs: Dict = None,
+        sd_region: float = 0.3,
+        sd_facility: float = 0.5,
+        sd_slope: float = 0.2,
+        corr_intercept_slope: float = 0.0,
+        sd_provider: float = 0.2,
+        noise: float = 1.0,
+        family: str = "gaussian",
+        cluster_size_sd: float = 0.5,
+    ) -> pd.DataFrame:
+        """
+        Regresion multinivel: pacientes en prestadores en establecimientos en regiones.
+
+        y = b0 + u_region + u0_facility [+ u_provider]
+            + (b_x + u1_facility) * x + b_age * (age - 50) / 10 + e
+
+        Los efectos aleatorios se generan una vez por cluster y se asignan
+        a las observaciones con gathers por indice (clusters contiguos via
+        `np.repeat`); los tamanos de cluster se obtienen con `np.bincount`.
+        Los IDs siguen el formato de EncounterGenerator (FAC-001, PROV-0001);
+        los establecimientos quedan en su rango FAC-001..FAC-099.
+
+        Args:
+            n: Numero de observaciones
+            n_facilities: Numero de establecimientos (clusters, maximo 99)
+            n_regions: Numero de regiones (nivel superior)
+            n_providers: Prestadores anidados en establecimientos (None = sin nivel)
+            coeffs: Efectos fijos {'intercept', 'x', 'age'}
+            sd_region: DE del intercepto aleatorio regional
+            sd_facility: DE del intercepto aleatorio por establecimiento
+            sd_slope: DE de la pendiente aleatoria de x por establecimiento
+            corr_intercept_slope: Correlacion intercepto-pendiente
+            sd_provider: DE del intercepto aleatorio por prestador
+            noise: DE del error individual (familia gaussian)
+            family: 'gaussian', 'binomial' o 'poisson'
+            cluster_size_sd: Heterogeneidad (lognormal) del tamano de cluster
+
+        Returns:
+            DataFrame con una fila por observacion; los efectos aleatorios
+            verdaderos quedan en `df.attrs["random_effects"]` como listas
+            (comparables con ==, para que concat/merge conserven attrs)
+        """
+        self._validate_positive_int(n, "n")
+        self._validate_positive_int(n_facilities, "n_facilities")
+        if n_facilities > MAX_FACILITIES:
+            raise ValueError(
+                f"n_facilities debe ser <= {MAX_FACILITIES} (FAC-001..FAC-{MAX_FACILITIES:03d}), "
+                f"recibido: {n_facilities}"
+            )
+        self._validate_positive_int(n_regions, "n_regions")
+        if n_providers is not None:
+            self._validate_positive_int(n_providers, "n_providers")
+        if not -1 <= corr_intercept_slope <= 1:
+            raise ValueError(
+                f"corr_intercept_slope debe estar en [-1, 1], recibido: {corr_intercept_slope}"
+            )
+        if family not in ("gaussian", "binomial", "poisson"):
+            raise ValueError(f"Familia no soportada: {family}")
+
+        coeffs = {"intercept": 0.0, "x": 1.0, "age": 0.2, **(coeffs or {})}
+
+        # Nivel cluster: region de cada establecimiento y efectos aleatorios
+        facility_region = self.rng.integers(0, n_regions, n_facilities)
+        u_region = self.rng.normal(0, sd_region, n_regions)
+        z0 = self.rng.standard_normal(n_facilities)
+        z1 = self.rng.standard_normal(n_facilities)
+        u0 = sd_facility * z0
+        u1 = sd_slope * (
+            corr_intercept_slope * z0 + np.sqrt(1 - corr_intercept_slope**2) * z1
+        )
+
+        # Unidad de asignacion: prestador (si existe) o establecimiento
+        if n_providers is not None:
+            provider_facility = self.rng.integers(0, n_facilities, n_providers)
+            u_provider = self.rng.normal(0, sd_provider, n_providers)
+            n_units = n_providers
+        else:
+            n_units = n_facilities
+
+        unit_weights = self.rng.lognormal(0, cluster_size_sd, n_units)
+        unit_sizes = self.rng.multinomial(n, unit_weights / unit_weights.sum())
+        unit_idx = np.repeat(np.arange(n_units), unit_sizes)
+
+        if n_providers is not None:
+            facility_idx = provider_facility[unit_idx]
+        else:
+            facility_idx = unit_idx
+        region_idx = facility_region[facility_idx]
+        facility_sizes = np.bincount(facility_idx, minlength=n_facilities)
+
+        # Nivel individual
+        x = self.rng.standard_normal(n)
+        age = np.clip(self.rng.normal(50, 15, n), 18, 95).astype(int)
+
+        eta = coeffs["intercept"] + u_region[region_idx] + u0[facility_idx]
+        eta += (coeffs["x"] + u1[facility_idx]) * x
+        eta += coeffs["age"] * (age - 50) / 10
+        if n_providers is not None:
+            eta += u_provider[unit_idx]
+
+        if family == "gaussian":
+            y = eta + self.rng.normal(0, noise, n)
+        elif family == "binomial":
+            y = (self.rng.random(n) < 1 / (1 + np.exp(-eta))).astype(np.int8)
+        else:
+            y = self.rng.poisson(np.exp(eta))
+
+        region_labels = self._format_ids("R", np.arange(1, n_regions + 1), 2)
+        facility_labels = self._format_ids("FAC-", np.arange(1, n_facilities + 1), 3)
+
+        df = pd.DataFrame(
             {
-                "subject_id": range(1, n + 1),
-                "age": ages,
-                "sex": sex,
-                "treatment": treatment,
-                "stage": stages,
-                "followup_days": actual_followup,
-                "event": events,
-                "censored": censored,
+                "obs_id": np.arange(1, n + 1),
+                "region": pd.Categorical.from_codes(region_idx, region_labels),
+                "facility_id": pd.Categorical.from_codes(facility_idx, facility_labels),
             }
         )
+        if n_providers is not None:
+            provider_labels = self._format_ids("PROV-", np.arange(1, n_providers + 1), 4)
+            df["provider_id"] = pd.Categorical.from_codes(unit_idx, provider_labels)
+        df["facility_size"] = facility_sizes[facility_idx]
+        df["age"] = age
+        df["x"] = x
+        df["y"] = y
+
+        effects = {
+            "region": u_region,
+            "facility_intercept": u0,
+            "facility_slope": u1,
+            "facility_region": facility_region,
+        }
+        if n_providers is not None:
+            effects["provider"] = u_provider
+            effects["provider_facility"] = provider_facility
+        df.attrs["random_effects"] = {name: values.tolist() for name, values in effects.items()}
+
+        return df
 
     def _multiple(
         self,
@@ -0,0 +1,384 @@
+"""
+Destinos de escritura incremental para tablas multiples
+
+Cada sink recibe bloques (chunks) de varias tablas y los agrega al
+destino sin mantener la tabla completa en memoria:
+- CSVSink: un CSV por tabla
+- SQLiteSink: base SQLite (executemany por bloque en una transaccion,
+  indices creados al cerrar, despues de la carga)
+- ParquetSink: dataset Parquet particionado estilo hive (requiere pyarrow)
+- DuckDBSink: base DuckDB (requiere duckdb)
+- ArrowSink: un stream IPC de Arrow por tabla (requiere pyarrow)
+
+Los bloques pueden ser pandas o polars (`frames`): CSV y Parquet usan los
+escritores nativos de Polars/Arrow; SQLite convierte a pandas.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Union
+import shutil
+import sqlite3
+import numpy as np
+import pandas as pd
+from . import profiling
+from .frames import Frame, is_polars, to_pandas
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+# Columna de fecha desde la que se deriva la particion `year`
+YEAR_COLUMNS: Dict[str, str] = {
+    "encounters": "encounter_date",
+    "labs": "test_date",
+    "notifications": "notification_date",
+}
+
+
+class TableSink:
+    """Base de los destinos: `write(tabla, df)` por bloque y `close()` al final"""
+
+    def __init__(self):
+        self.rows: Dict[str, int] = {}
+
+    def __enter__(self) -> "TableSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def write(self, table: str, df: Frame) -> None:
+        """Agrega un bloque (pandas o polars) a la tabla"""
+        with profiling.span(f"write.{type(self).__name__}"):
+            self._write(table, df, table not in self.rows)
+        self.rows[table] = self.rows.get(table, 0) + len(df)
+
+    def _write(self, table: str, df: Frame, first: bool) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Finaliza la escritura"""
+        pass
+
+
+class CSVSink(TableSink):
+    """Escribe cada tabla como `<output_dir>/<tabla>.csv`, agregando por bloque"""
+
+    def __init__(self, output_dir: Union[str, Path]):
+        """
+        Args:
+            output_dir: Directorio de salida (se crea si no existe)
+        """
+        super().__init__()
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, table: str) -> Path:
+        """Ruta del archivo de una tabla"""
+        return self.output_dir / f"{table}.csv"
+
+    def _write(self, table: str, df: Frame, first: bool) -> None:
+        if is_polars(df):
+            with open(self.path(table), "wb" if first else "ab") as f:
+                df.write_csv(f, include_header=first)
+            return
+        df.to_csv(self.path(table), mode="w" if first else "a", header=first, index=False)
+
+
+def sqlite_path(database: Union[str, Path]) -> str:
+    """Ruta de archivo desde URL `sqlite:///ruta` (o ruta directa)"""
+    database = str(database)
+    if database.startswith("sqlite:///"):
+        return database[len("sqlite:///"):]
+    if database.startswith("sqlite://"):
+        return ":memory:"
+    return database
+
+
+def _sql_type(series: pd.Series) -> str:
+    """Tipo SQLite de una columna"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series):
+        return "REAL"
+    return "TEXT"
+
+
+def _sql_values(series: pd.Series) -> list:
+    """Columna como lista de valores Python aptos para sqlite3"""
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype(np.int8).tolist()
+    if pd.api.types.is_integer_dtype(series) or pd.api.types.is_float_dtype(series):
+        # sqlite guarda NaN como NULL
+        return series.tolist()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.to_numpy()
+        is_date = (values.astype("datetime64[D]") == values)[~np.isnat(values)].all()
+        series = series.dt.strftime("%Y-%m-%d" if is_date else "%Y-%m-%d %H:%M:%S")
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+class SQLiteSink(TableSink):
+    """
+    Carga tablas en una base SQLite.
+
+    Cada bloque se inserta con `executemany` dentro de una transaccion.
+    Las tablas existentes con el mismo nombre se reemplazan. Los indices
+    se crean en `close()`, cuando los datos ya estan cargados.
+    """
+
+    def __init__(
+        self,
+        database: Union[str, Path, None] = None,
+        indexes: Optional[Dict[str, List[str]]] = None,
+    ):
+        """
+        Args:
+            database: URL `sqlite:///ruta` o ruta (default: settings.DATABASE_URL)
+            indexes: Columnas a indexar por tabla (default: columnas `*_key`
+                y `patient_id`)
+        """
+        super().__init__()
+        if database is None:
+            from .config import settings
+
+            database = settings.DATABASE_URL
+        self.path = sqlite_path(database)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.indexes = indexes
+        self._columns: Dict[str, List[str]] = {}
+        self.con = sqlite3.connect(self.path, isolation_level=None)
+        self.con.execute("PRAGMA journal_mode=MEMORY")
+        self.con.execute("PRAGMA synchronous=OFF")
+
+    def _write(self, table: str, df: Frame, first: bool) -> None:
+        df = to_pandas(df)
+        if first:
+            columns = ", ".join(f'"{col}" {_sql_type(df[col])}' for col in df.columns)
+            self.con.execute(f'DROP TABLE IF EXISTS "{table}"')
+            self.con.execute(f'CREATE TABLE "{table}" ({columns})')
+            self._columns[table] = list(df.columns)
+
+        names = ", ".join(f'"{col}"' for col in df.columns)
+        params = ", ".join("?" * len(df.columns))
+        rows = zip(*(_sql_values(df[col]) for col in df.columns))
+
+        self.con.execute("BEGIN")
+        try:
+            self.con.executemany(f'INSERT INTO "{table}" ({names}) VALUES ({params})', rows)
+        except Exception:
+            self.con.execute("ROLLBACK")
+            raise
+        self.con.execute("COMMIT")
+
+    def _index_columns(self, table: str) -> List[str]:
+        if self.indexes is not None:
+            return self.indexes.get(table, [])
+        return [
+            col for col in self._columns[table] if col.endswith("_key") or col == "patient_id"
+        ]
+
+    def close(self) -> None:
+        """Crea indices, actualiza estadisticas y cierra la conexion"""
+        if self.con is None:
+            return
+        for table in self._columns:
+            for col in self._index_columns(table):
+                self.con.execute(
+                    f'CREATE INDEX IF NOT EXISTS "ix_{table}_{col}" ON "{table}" ("{col}")'
+                )
+        self.con.execute("ANALYZE")
+        self.con.close()
+        self.con = None
+
+
+class ParquetSink(TableSink):
+    """
+    Escribe cada tabla como dataset Parquet particionado estilo hive
+    (`<output_dir>/<tabla>/region=R13/year=2021/part-00000-0.parquet`).
+
+    Solo se usan las columnas de particion presentes en cada tabla; `year`
+    se deriva de la columna de fecha indicada en `year_columns`.
+    """
+
+    def __init__(
+        self,
+        output_dir: Union[str, Path],
+        partition_by: Sequence[str] = ("region", "year"),
+        year_columns: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Args:
+            output_dir: Directorio raiz del dataset
+            partition_by: Columnas de particion (en orden)
+            year_columns: Tabla -> columna de fecha para `year`
+        """
+        super().__init__()
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("ParquetSink requiere pyarrow: pip install pyarrow") from e
+        self._pa, self._pq = pa, pq
+        self.output_dir = Path(output_dir)
+        self.partition_by = list(partition_by)
+        self.year_columns = YEAR_COLUMNS if year_columns is None else year_columns
+        self._chunks: Dict[str, int] = {}
+
+    def _write(self, table: str, df: pd.DataFrame, first: bool) -> None:
+        root = self.output_dir / table
+        if first and root.exists():
+            shutil.rmtree(root)
+
+        date_col = self.year_columns.get(table)
+        if "year" in self.partition_by and "year" not in df.columns and date_col in df.columns:
+            if is_polars(df):
+                df = df.with_columns(year=df[date_col].dt.year())
+            else:
+                df = df.assign(year=df[date_col].dt.year.astype(np.int16))
+        partition_cols = [col for col in self.partition_by if col in df.columns]
+        if is_polars(df):
+            data = df.to_arrow()
+        else:
+            data = self._pa.Table.from_pandas(df, preserve_index=False)
+
+        chunk = self._chunks.get(table, 0)
+        self._chunks[table] = chunk + 1
+        self._pq.write_to_dataset(
+            data,
+            root_path=str(root),
+            partition_cols=partition_cols or None,
+            basename_template=f"part-{chunk:05d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+
+class DuckDBSink(TableSink):
+    """Carga tablas en una base DuckDB (reemplaza tablas existentes)"""
+
+    def __init__(self, database: Union[str, Path]):
+        """
+        Args:
+            database: Ruta del archivo `.duckdb`
+        """
+        super().__init__()
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("DuckDBSink requiere duckdb: pip install duckdb") from e
+        Path(database).parent.mkdir(parents=True, exist_ok=True)
+        self.con = duckdb.connect(str(database))
+
+    def _write(self, table: str, df: Frame, first: bool) -> None:
+        self.con.register("_chunk", df)
+        if first:
+            self.con.execute(f'CREATE OR REPLACE TABLE "{table}" AS SELECT * FROM _chunk')
+        else:
+            self.con.execute(f'INSERT INTO "{table}" SELECT * FROM _chunk')
+        self.con.unregister("_chunk")
+
+    def close(self) -> None:
+        """Cierra la conexion"""
+        if self.con is not None:
+            self.con.close()
+            self.con = None
+
+
+class ArrowSink(TableSink):
+    """
+    Escribe cada tabla como stream IPC de Arrow `<output_dir>/<tabla>.arrows`.
+
+    Los bloques se convierten con `arrow_io.to_record_batch` (diccionarios
+    para categorias y codigos, date32 para fechas); el primer bloque fija
+    el schema de la tabla.
+    """
+
+    def __init__(self, output_dir: Union[str, Path]):
+        """
+        Args:
+            output_dir: Directorio de salida (se crea si no existe)
+        """
+        super().__init__()
+        from .arrow_io import _pyarrow
+
+        self._pa = _pyarrow()
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._writers: Dict[str, "pa.ipc.RecordBatchStreamWriter"] = {}
+        self._schemas: Dict[str, "pa.Schema"] = {}
+
+    def path(self, table: str) -> Path:
+        """Ruta del archivo de una tabla"""
+        return self.output_dir / f"{table}.arrows"
+
+    def _write(self, table: str, df: Frame, first: bool) -> None:
+        from .arrow_io import to_record_batch
+
+        batch = to_record_batch(df, self._schemas.get(table))
+        if table not in self._writers:
+            self._schemas[table] = batch.schema
+            self._writers[table] = self._pa.ipc.new_stream(str(self.path(table)), batch.schema)
+        self._writers[table].write_batch(batch)
+
+    def close(self) -> None:
+        """Cierra los streams"""
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+SINKS = {
+    "csv": CSVSink,
+    "sqlite": SQLiteSink,
+    "parquet": ParquetSink,
+    "duckdb": DuckDBSink,
+    "arrow": ArrowSink,
+}
+
+
+def open_sink(format: str, output: Union[str, Path, None] = None, **kwargs) -> TableSink:
+    """
+    Crea un sink por nombre de formato.
+
+    Args:
+        format: csv, sqlite, parquet, duckdb o arrow
+        output: Directorio (csv/parquet/arrow) o base de datos (sqlite/duckdb);
+            sqlite usa settings.DATABASE_URL si se omite
+        **kwargs: Parametros adicionales del sink
+
+    Returns:
+        TableSink
+    """
+    if format not in SINKS:
+        raise ValueError(f"Formato no soportado: {format}. Opciones: {list(SINKS)}")
+    if output is None and format != "sqlite":
+        raise ValueError(f"Se requiere output para formato {format}")
+    return SINKS[format](output, **kwargs)
+
+
+def write_chunks(chunks: Iterable[Dict[str, pd.DataFrame]], sink: TableSink) -> Dict[str, int]:
+    """
+    Escribe bloques multi-tabla en un sink y lo cierra.
+
+    Returns:
+        Filas escritas por tabla
+    """
+    rows: Dict[str, int] = {}
+    try:
+        for tables in chunks:
+            for table, df in tables.items():
+                sink.write(table, df)
+                rows[table] = rows.get(table, 0) + len(df)
+    finally:
+        sink.close()
+    return rows
+
+
+def concat_chunks(chunks: Iterable[Dict[str, pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+    """Concatena bloques multi-tabla en memoria (tabla -> DataFrame)"""
+    parts: Dict[str, List[pd.DataFrame]] = {}
+    for tables in chunks:
+        for table, df in tables.items():
+            parts.setdefault(table, []).append(df)
+    return {table: pd.concat(dfs, ignore_index=True) for table, dfs in parts.items()}
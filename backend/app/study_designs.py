@@ -0,0 +1,372 @@
+"""
+Generadores de disenos de estudio
+
+- CaseControlGenerator: casos-controles anidado en una poblacion fuente,
+  con muestreo por densidad de incidencia (risk-set sampling): cada caso
+  se empareja con k controles en riesgo a la fecha del caso, del mismo
+  sexo/region y edad dentro de un caliper. El emparejamiento usa un
+  indice ordenado (estrato, edad) y `searchsorted`, sin loops por caso.
+- RCTGenerator: ensayo clinico aleatorizado con aleatorizacion simple,
+  por bloques permutados o por bloques estratificados.
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from .base_generator import BaseGenerator, ColumnBuffer, code_dtype
+from .generators import REGIONS
+
+
+class CaseControlGenerator(BaseGenerator):
+    """Generador de estudios casos-controles con emparejamiento por densidad"""
+
+    def __init__(self, seed: int = 42):
+        super().__init__(seed)
+
+    def generate(self, n: int, **kwargs) -> pd.DataFrame:
+        """
+        Genera un estudio casos-controles emparejado.
+
+        El emparejamiento necesita la poblacion fuente completa, por lo que
+        la tabla no tiene acceso aleatorio por filas (`random_access`).
+
+        Args:
+            n: Tamano de la poblacion fuente
+            **kwargs: Parametros de `source_population` y `match`
+
+        Returns:
+            DataFrame de conjuntos emparejados (ver `match`)
+        """
+        match_keys = ("controls_per_case", "age_caliper", "match_on", "max_rounds")
+        match_kwargs = {k: kwargs.pop(k) for k in match_keys if k in kwargs}
+        population = self.source_population(n, **kwargs)
+        return self.match(population, **match_kwargs)
+
+    def source_population(
+        self,
+        n: int,
+        followup_days: int = 3650,
+        baseline_rate: float = 0.005,
+        exposure_prevalence: float = 0.3,
+        rate_ratio: float = 2.5,
+        age_hr: float = 1.04,
+    ) -> pd.DataFrame:
+        """
+        Genera la cohorte fuente con tiempos de evento exponenciales.
+
+        Tasa individual = baseline_rate (anual) * rate_ratio^expuesto *
+        age_hr^(edad - 50). Bajo muestreo por densidad el OR del estudio
+        estima `rate_ratio`.
+
+        Los sujetos son independientes: se generan por bloques de
+        `BLOCK_SIZE` con RNG Philox (`_block_rows`), asi la poblacion de
+        tamano n es prefijo de la de tamano m > n para la misma semilla.
+
+        Args:
+            n: Numero de sujetos
+            followup_days: Seguimiento de la cohorte
+            baseline_rate: Tasa anual de evento en no expuestos de 50 anios
+            exposure_prevalence: Prevalencia de exposicion
+            rate_ratio: Razon de tasas expuestos / no expuestos
+            age_hr: Hazard ratio por anio de edad
+
+        Returns:
+            DataFrame con subject_id, age, sex, region, exposed, exit_day, event
+        """
+        self._validate_positive_int(n, "n")
+        self._validate_positive_int(followup_days, "followup_days")
+        self._validate_positive_float(baseline_rate, "baseline_rate")
+        self._validate_probability(exposure_prevalence, "exposure_prevalence")
+        self._validate_positive_float(rate_ratio, "rate_ratio")
+        self._validate_positive_float(age_hr, "age_hr")
+        return self._block_rows(
+            self._population_block, 0, n, followup_days=followup_days,
+            baseline_rate=baseline_rate, exposure_prevalence=exposure_prevalence,
+            rate_ratio=rate_ratio, age_hr=age_hr,
+        )
+
+    def _population_block(
+        self,
+        rng: np.random.Generator,
+        start: int,
+        n: int,
+        followup_days: int,
+        baseline_rate: float,
+        exposure_prevalence: float,
+        rate_ratio: float,
+        age_hr: float,
+    ) -> pd.DataFrame:
+        """Sujetos start+1..start+n de `source_population` con `rng`"""
+        buf = ColumnBuffer(n)
+        buf.arange("subject_id", start + 1)
+        age = buf.put("age", rng.integers(18, 90, n))
+        sex = self._sampler(["M", "F"])
+        region = self._sampler(REGIONS)
+        buf.alloc("sex", code_dtype(len(sex)))
+        buf.alloc("region", code_dtype(len(region)))
+        exposed = buf.alloc("exposed", np.int8)
+        exit_day = buf.alloc("exit_day", np.int64)
+        event = buf.alloc("event", np.int8)
+
+        np.less(rng.random(n), exposure_prevalence, out=exposed, casting="unsafe")
+        daily = baseline_rate / 365.25
+        rate = np.power(age_hr, age - 50)
+        rate *= np.where(exposed == 1, daily * rate_ratio, daily)
+        time = rng.standard_exponential(n)
+        time /= rate
+        del rate
+        np.less_equal(time, followup_days, out=event, casting="unsafe")
+        np.floor(time, out=time)
+        np.minimum(time, followup_days, out=time)
+        exit_day[:] = time
+        del time
+
+        buf.categorical("sex", sex, rng)
+        buf.categorical("region", region, rng)
+        return buf.to_frame()
+
+    def match(
+        self,
+        population: pd.DataFrame,
+        controls_per_case: int = 2,
+        age_caliper: int = 2,
+        match_on: Sequence[str] = ("sex", "region"),
+        max_rounds: int = 10,
+    ) -> pd.DataFrame:
+        """
+        Empareja k controles por caso por densidad de incidencia.
+
+        Elegibles para el caso i: sujetos con exit_day > dia del caso
+        (en riesgo; incluye futuros casos), mismo estrato `match_on` y
+        |edad - edad_i| <= age_caliper. Un sujeto puede ser control de
+        varios casos (muestreo con reemplazo entre conjuntos), pero no
+        se repite dentro de un conjunto.
+
+        La poblacion se ordena por (estrato, edad); los elegibles de cada
+        caso quedan en un rango contiguo [lo, hi) obtenido con
+        `searchsorted`. Se muestrean posiciones al azar del rango y se
+        rechazan las no elegibles, en rondas vectorizadas sobre los casos
+        pendientes.
+
+        Args:
+            population: Cohorte con age, exit_day, event y columnas match_on
+            controls_per_case: Controles por caso (k)
+            age_caliper: Diferencia maxima de edad
+            match_on: Columnas de emparejamiento exacto
+            max_rounds: Rondas de muestreo por rechazo
+
+        Returns:
+            DataFrame con set_id, case (1/0), index_day y atributos del sujeto;
+            `attrs["unmatched"]` cuenta controles faltantes
+        """
+        self._validate_positive_int(controls_per_case, "controls_per_case")
+        self._validate_positive_int(max_rounds, "max_rounds")
+        if not isinstance(age_caliper, int) or age_caliper < 0:
+            raise ValueError(f"age_caliper debe ser entero >= 0, recibido: {age_caliper}")
+        for col in ["age", "exit_day", "event", *match_on]:
+            if col not in population.columns:
+                raise ValueError(f"Columna no encontrada: {col}")
+
+        age = population["age"].to_numpy().astype(np.int64)
+        exit_day = population["exit_day"].to_numpy()
+        if match_on:
+            stratum = pd.MultiIndex.from_frame(population[list(match_on)]).factorize()[0]
+        else:
+            stratum = np.zeros(len(population), dtype=np.int64)
+
+        # Clave ordenable: el caliper nunca cruza de estrato
+        span = int(age.max() - age.min()) + 2 * age_caliper + 1
+        key = stratum.astype(np.int64) * span + (age - age.min())
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+
+        cases = np.flatnonzero(population["event"].to_numpy() == 1)
+        case_day = exit_day[cases]
+        lo = np.searchsorted(sorted_key, key[cases] - age_caliper, side="left")
+        hi = np.searchsorted(sorted_key, key[cases] + age_caliper, side="right")
+
+        n = len(population)
+        k = controls_per_case
+        need = np.full(len(cases), k)
+        accepted = np.empty(0, dtype=np.int64)  # case_pos * n + control
+
+        for _ in range(max_rounds):
+            pending = np.flatnonzero(need > 0)
+            if len(pending) == 0:
+                break
+            draws = 2 * need[pending] + 2
+            case_pos = np.repeat(pending, draws)
+            width = (hi - lo)[case_pos]
+            control = order[lo[case_pos] + (self.rng.random(len(case_pos)) * width).astype(np.int64)]
+
+            ok = exit_day[control] > case_day[case_pos]
+            pair = case_pos[ok].astype(np.int64) * n + control[ok]
+            pair = np.unique(pair)
+            pair = pair[~np.isin(pair, accepted)]
+
+            # Orden aleatorio dentro de cada caso; se toman hasta need[caso]
+            pair = pair[np.lexsort((self.rng.random(len(pair)), pair // n))]
+            pos = pair // n
+            counts = np.bincount(pos, minlength=len(cases))
+            rank = np.arange(len(pair)) - np.repeat(np.cumsum(counts) - counts, counts)[: len(pair)]
+            take = pair[rank < need[pos]]
+
+            accepted = np.concatenate([accepted, take])
+            need -= np.bincount(take // n, minlength=len(cases))
+
+        ctrl_case = accepted // n
+        ctrl = accepted % n
+        set_id = np.concatenate([np.arange(len(cases)), ctrl_case])
+        subject = np.concatenate([cases, ctrl])
+        is_case = np.concatenate([np.ones(len(cases), np.int8), np.zeros(len(ctrl), np.int8)])
+
+        out_order = np.lexsort((1 - is_case, set_id))
+        set_id, subject, is_case = set_id[out_order], subject[out_order], is_case[out_order]
+
+        df = population.iloc[subject].drop(columns=["event"]).reset_index(drop=True)
+        df.insert(0, "set_id", set_id + 1)
+        df.insert(1, "case", is_case)
+        df.insert(2, "index_day", case_day[set_id])
+        df.attrs["unmatched"] = int(need.sum())
+        return df
+
+
+class RCTGenerator(BaseGenerator):
+    """Generador de ensayos clinicos aleatorizados"""
+
+    def __init__(self, seed: int = 42):
+        super().__init__(seed)
+
+    def generate(
+        self,
+        n: int,
+        arms: Sequence[str] = ("A", "B"),
+        allocation: Sequence[int] = (1, 1),
+        method: str = "stratified",
+        block_sizes: Sequence[int] = (4, 6),
+        strata: Sequence[str] = ("site", "sex", "age_group"),
+        n_sites: int = 10,
+        enrollment_days: int = 365,
+        start_date: str = "2024-01-01",
+        outcome_prob: Optional[Dict[str, float]] = None,
+    ) -> pd.DataFrame:
+        """
+        Genera un ensayo clinico aleatorizado.
+
+        Args:
+            n: Numero de participantes
+            arms: Brazos del ensayo
+            allocation: Razon de asignacion por brazo (ej: (2, 1))
+            method: 'simple', 'block' (bloques permutados) o 'stratified'
+                (bloques permutados dentro de cada estrato)
+            block_sizes: Tamanos de bloque posibles (multiplos de sum(allocation))
+            strata: Variables de estratificacion (site, sex, age_group)
+            n_sites: Numero de centros
+            enrollment_days: Duracion del reclutamiento
+            start_date: Inicio del reclutamiento
+            outcome_prob: Probabilidad de outcome binario por brazo
+
+        Returns:
+            DataFrame con un participante por fila en orden de ingreso
+        """
+        self._validate_positive_int(n, "n")
+        self._validate_positive_int(n_sites, "n_sites")
+        self._validate_positive_int(enrollment_days, "enrollment_days")
+        arms = list(arms)
+        allocation = np.asarray(allocation, dtype=np.int64)
+        if len(arms) < 2 or len(allocation) != len(arms) or (allocation <= 0).any():
+            raise ValueError("Se requieren >= 2 brazos con razon de asignacion positiva")
+        if outcome_prob is None:
+            outcome_prob = {arm: 0.3 if i == 0 else 0.2 for i, arm in enumerate(arms)}
+
+        age = np.clip(self.rng.normal(55, 14, n), 18, 90).astype(np.int64)
+        df = pd.DataFrame(
+            {
+                "subject_id": self._format_ids("RCT-", np.arange(1, n + 1), 6),
+                "site": self._format_ids("SITE-", self.rng.integers(1, n_sites + 1, n), 2),
+                "sex": self._sampler(["M", "F"]).sample_values(n),
+                "age": age,
+                "age_group": np.where(age < 65, "<65", ">=65"),
+                "enrollment_date": np.datetime64(start_date, "D")
+                + np.sort(self.rng.integers(0, enrollment_days, n)).astype("timedelta64[D]"),
+            }
+        )
+
+        if method == "simple":
+            arm_idx = self._sampler(np.arange(len(arms)), allocation / allocation.sum()).sample(n)
+            block_id = np.zeros(n, dtype=np.int64)
+        elif method in ("block", "stratified"):
+            if method == "stratified":
+                for col in strata:
+                    if col not in df.columns:
+                        raise ValueError(f"Variable de estratificacion no soportada: {col}")
+                stratum = (
+                    pd.MultiIndex.from_frame(df[list(strata)]).factorize()[0]
+                    if strata
+                    else np.zeros(n, dtype=np.int64)
+                )
+            else:
+                stratum = np.zeros(n, dtype=np.int64)
+            arm_idx, block_id = self.block_randomize(stratum, allocation, block_sizes)
+            df["stratum"] = stratum
+        else:
+            raise ValueError(f"Metodo de aleatorizacion no soportado: {method}")
+
+        df["block_id"] = block_id
+        df["arm"] = np.asarray(arms)[arm_idx]
+        p = np.array([outcome_prob.get(arm, 0.0) for arm in arms])[arm_idx]
+        df["outcome"] = (self.rng.random(n) < p).astype(np.int8)
+        return df
+
+    def block_randomize(
+        self,
+        stratum: np.ndarray,
+        allocation: Sequence[int],
+        block_sizes: Sequence[int],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aleatorizacion por bloques permutados dentro de cada estrato.
+
+        Para cada estrato se genera una secuencia de bloques de tamano
+        aleatorio (de `block_sizes`), cada uno con los brazos en la razon
+        `allocation` y permutados al azar. El i-esimo participante del
+        estrato (en orden de ingreso) recibe la i-esima posicion.
+
+        Args:
+            stratum: Codigo de estrato por participante (orden de ingreso)
+            allocation: Razon de asignacion por brazo
+            block_sizes: Tamanos de bloque posibles
+
+        Returns:
+            (indice de brazo, id global de bloque) por participante
+        """
+        allocation = np.asarray(allocation, dtype=np.int64)
+        sizes = np.asarray(block_sizes, dtype=np.int64)
+        unit = allocation.sum()
+        if len(sizes) == 0 or (sizes <= 0).any() or (sizes % unit).any():
+            raise ValueError(f"block_sizes deben ser multiplos positivos de {unit}")
+
+        stratum = np.asarray(stratum, dtype=np.int64)
+        counts = np.bincount(stratum)
+        n_blocks = -(-counts // sizes.min())  # ceil: bloques suficientes por estrato
+        block_size = sizes[self.rng.integers(0, len(sizes), n_blocks.sum())]
+        block_stratum = np.repeat(np.arange(len(counts)), n_blocks)
+
+        # Brazos de cada posicion de bloque (sin permutar), luego permutados
+        slot_block = np.repeat(np.arange(len(block_size)), block_size)
+        slot_pos = np.arange(len(slot_block)) - np.repeat(
+            np.cumsum(block_size) - block_size, block_size
+        )
+        pattern = np.repeat(np.arange(len(allocation)), allocation)
+        slot_arm = pattern[(slot_pos * unit) // block_size[slot_block]]
+        slot_arm = slot_arm[np.lexsort((self.rng.random(len(slot_block)), slot_block))]
+
+        # Posicion de cada participante dentro de su estrato
+        order = np.argsort(stratum, kind="stable")
+        within = np.empty(len(stratum), dtype=np.int64)
+        within[order] = np.arange(len(stratum)) - np.repeat(np.cumsum(counts) - counts, counts)
+        slots_per_stratum = np.bincount(block_stratum, weights=block_size, minlength=len(counts))
+        stratum_start = (np.cumsum(slots_per_stratum) - slots_per_stratum).astype(np.int64)
+        slot = stratum_start[stratum] + within
+
+        return slot_arm[slot], slot_block[slot]
@@ -11,10 +11,38 @@ Modelos para sistemas de vigilancia en salud publica:
 from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from scipy import stats
+from datetime import timedelta
 from dataclasses import dataclass
-from .base_generator import BaseGenerator
+from .base_generator import BaseGenerator, ColumnBuffer
+from . import frames
+
+
+# Enfermedades de Notificacion Obligatoria (ENO) Chile: (codigo, nombre, urgencia)
+NOTIFIABLE_DISEASES = [
+    ("A00", "Colera", "inmediata"),
+    ("A01", "Fiebre tifoidea", "diaria"),
+    ("A90", "Dengue", "inmediata"),
+    ("A91", "Dengue hemorragico", "inmediata"),
+    ("B05", "Sarampion", "inmediata"),
+    ("B06", "Rubeola", "inmediata"),
+    ("B15", "Hepatitis A", "diaria"),
+    ("B16", "Hepatitis B", "diaria"),
+    ("B17", "Hepatitis C", "diaria"),
+    ("A37", "Tos ferina", "diaria"),
+    ("A39", "Meningococo", "inmediata"),
+    ("J09", "Influenza", "semanal"),
+    ("U07.1", "COVID-19", "diaria"),
+]
+
+
+# Niveles de alerta por z-score (indice = codigo de nivel)
+ALERT_LEVELS = ["GREEN", "YELLOW", "ORANGE", "RED"]
+
+
+def _normal_pdf(x: np.ndarray, loc: float, scale: float) -> np.ndarray:
+    """Densidad normal (equivale a scipy.stats.norm.pdf, sin importar scipy)"""
+    z = (x - loc) / scale
+    return np.exp(-0.5 * z * z) / (scale * np.sqrt(2 * np.pi))
 
 
 @dataclass
@@ -122,32 +150,39 @@ class SurveillanceGenerator(BaseGenerator):
 
         # Calculate z-scores and alert levels
         zscore = np.where(baselines > 0, (cases - baselines) / np.sqrt(baselines), 0)
-        alert_level = np.select(
-            [zscore >= 3.0, zscore >= 2.0, zscore >= 1.5],
-            ["RED", "ORANGE", "YELLOW"],
-            default="GREEN",
-        )
-
-        # Generate dates
-        start_date = datetime.now() - timedelta(days=days)
-        dates = [
-            (start_date + timedelta(days=int(d))).strftime("%Y-%m-%d")
-            for d in day_flat
-        ]
-        epi_weeks = [
-            (start_date + timedelta(days=int(d))).isocalendar()[1] for d in day_flat
-        ]
+        alert_code = np.select([zscore >= 3.0, zscore >= 2.0, zscore >= 1.5], [3, 2, 1], default=0)
+
+        # Fechas y semana epidemiologica: una vez por dia, luego por indice
+        start_date = self._today() - timedelta(days=days)
+        day_dates = [start_date + timedelta(days=d) for d in range(days)]
+        epi_weeks = np.array([d.isocalendar()[1] for d in day_dates])[day_flat]
+
+        if frames.active_backend() == "polars":
+            buf = ColumnBuffer(total_records)
+            buf.put("date", np.datetime64(start_date, "D") + day_flat)
+            buf.put("epi_week", epi_weeks)
+            buf.codes("region", region_flat - 1, [f"R{r:02d}" for r in region_idx])
+            if len(set(diseases)) == n_diseases:
+                buf.codes("disease_code", disease_flat, diseases)
+            else:
+                buf.put("disease_code", disease_codes)
+            buf.put("cases", cases)
+            buf.put("expected_cases", np.round(expected, 2))
+            buf.put("zscore", np.round(zscore, 2))
+            buf.codes("alert_level", alert_code, ALERT_LEVELS)
+            buf.put("outbreak_flag", outbreak_mask)
+            return buf.to_polars()
 
         return pd.DataFrame(
             {
-                "date": dates,
+                "date": np.array([d.strftime("%Y-%m-%d") for d in day_dates])[day_flat],
                 "epi_week": epi_weeks,
                 "region": [f"R{r:02d}" for r in region_flat],
                 "disease_code": disease_codes,
                 "cases": cases,
                 "expected_cases": np.round(expected, 2),
                 "zscore": np.round(zscore, 2),
-                "alert_level": alert_level,
+                "alert_level": np.array(ALERT_LEVELS)[alert_code],
                 "outbreak_flag": outbreak_mask,
             }
         )
@@ -182,62 +217,45 @@ class SurveillanceGenerator(BaseGenerator):
         self._validate_positive_int(n_notifications, "n_notifications")
 
         if diseases is None:
-            # Enfermedades de Notificacion Obligatoria (ENO) Chile
-            diseases = [
-                ("A00", "Colera", "inmediata"),
-                ("A01", "Fiebre tifoidea", "diaria"),
-                ("A90", "Dengue", "inmediata"),
-                ("A91", "Dengue hemorragico", "inmediata"),
-                ("B05", "Sarampion", "inmediata"),
-                ("B06", "Rubeola", "inmediata"),
-                ("B15", "Hepatitis A", "diaria"),
-                ("B16", "Hepatitis B", "diaria"),
-                ("B17", "Hepatitis C", "diaria"),
-                ("A37", "Tos ferina", "diaria"),
-                ("A39", "Meningococo", "inmediata"),
-                ("J09", "Influenza", "semanal"),
-                ("U07.1", "COVID-19", "diaria"),
-            ]
+            diseases = NOTIFIABLE_DISEASES
 
         start = pd.Timestamp(date_range[0])
         end = pd.Timestamp(date_range[1])
         days_range = (end - start).days
 
         # Vectorized generation
-        disease_indices = self.rng.integers(0, len(diseases), n_notifications)
+        disease_indices = self._sampler(np.arange(len(diseases))).sample(n_notifications)
         days_offset = self.rng.integers(0, days_range, n_notifications)
         onset_offset = self.rng.integers(1, 14, n_notifications)
 
         notif_dates = start + pd.to_timedelta(days_offset, unit="D")
         onset_dates = notif_dates - pd.to_timedelta(onset_offset, unit="D")
 
-        notifications = []
-        for i in range(n_notifications):
-            disease = diseases[disease_indices[i]]
-            code, name, urgency = disease
-
-            notifications.append(
-                {
-                    "notification_id": f"NOT-{self.rng.integers(100000, 999999)}",
-                    "notification_date": notif_dates[i].strftime("%Y-%m-%d"),
-                    "onset_date": onset_dates[i].strftime("%Y-%m-%d"),
-                    "disease_code": code,
-                    "disease_name": name,
-                    "urgency": urgency,
-                    "patient_age": int(self.rng.integers(0, 95)),
-                    "patient_sex": self.rng.choice(["M", "F"]),
-                    "region": f"R{self.rng.integers(1, 17):02d}",
-                    "comuna": f"C{self.rng.integers(1, 350):03d}",
-                    "hospitalized": bool(self.rng.choice([True, False], p=[0.15, 0.85])),
-                    "icu": bool(self.rng.choice([True, False], p=[0.03, 0.97])),
-                    "deceased": bool(self.rng.choice([True, False], p=[0.02, 0.98])),
-                    "lab_confirmed": bool(self.rng.choice([True, False], p=[0.7, 0.3])),
-                    "travel_history": bool(self.rng.choice([True, False], p=[0.1, 0.9])),
-                    "contact_traced": bool(self.rng.choice([True, False], p=[0.6, 0.4])),
-                }
-            )
+        codes, names, urgencies = (np.array(col) for col in zip(*diseases))
 
-        return pd.DataFrame(notifications)
+        return pd.DataFrame(
+            {
+                "notification_id": np.char.add(
+                    "NOT-",
+                    self.rng.integers(100000, 999999, n_notifications).astype(str),
+                ),
+                "notification_date": notif_dates.strftime("%Y-%m-%d"),
+                "onset_date": onset_dates.strftime("%Y-%m-%d"),
+                "disease_code": codes[disease_indices],
+                "disease_name": names[disease_indices],
+                "urgency": urgencies[disease_indices],
+                "patient_age": self.rng.integers(0, 95, n_notifications),
+                "patient_sex": self._sampler(["M", "F"]).sample_values(n_notifications),
+                "region": self._format_ids("R", self.rng.integers(1, 17, n_notifications), 2),
+                "comuna": self._format_ids("C", self.rng.integers(1, 350, n_notifications), 3),
+                "hospitalized": self.rng.random(n_notifications) < 0.15,
+                "icu": self.rng.random(n_notifications) < 0.03,
+                "deceased": self.rng.random(n_notifications) < 0.02,
+                "lab_confirmed": self.rng.random(n_notifications) < 0.7,
+                "travel_history": self.rng.random(n_notifications) < 0.1,
+                "contact_traced": self.rng.random(n_notifications) < 0.6,
+            }
+        )
 
 
 class OutbreakGenerator(BaseGenerator):
@@ -303,22 +321,23 @@ class OutbreakGenerator(BaseGenerator):
         notif_dates = onset_dates + pd.to_timedelta(notif_delays, unit="D")
 
         ages = self.rng.integers(1, 90, n_cases)
-        sexes = self.rng.choice(["M", "F"], n_cases)
-        hospitalized = self.rng.choice([True, False], n_cases, p=[0.2, 0.8])
-        severities = self.rng.choice(
-            ["mild", "moderate", "severe"], n_cases, p=[0.7, 0.2, 0.1]
-        )
+        sexes = self._sampler(["M", "F"]).sample_values(n_cases)
+        hospitalized = self.rng.random(n_cases) < 0.2
+        severities = self._sampler(
+            ["mild", "moderate", "severe"], [0.7, 0.2, 0.1]
+        ).sample_values(n_cases)
 
         generations = np.array(
             [self._assign_generation(d, outbreak_type) for d in delays]
         )
         secondary_cases = delays > 7 if outbreak_type == "propagated" else np.zeros(n_cases, dtype=bool)
 
-        exposure_locations = np.where(
-            outbreak_type == "point_source",
-            [f"LOC-{self.rng.integers(1, 5):02d}" for _ in range(n_cases)],
-            None,
-        )
+        if outbreak_type == "point_source":
+            exposure_locations = np.char.add(
+                "LOC-0", self.rng.integers(1, 5, n_cases).astype(str)
+            )
+        else:
+            exposure_locations = np.full(n_cases, None)
 
         return pd.DataFrame(
             {
@@ -423,7 +442,7 @@ class TimeSeriesGenerator(BaseGenerator):
         self._validate_positive_int(days, "days")
         self._validate_positive_float(baseline, "baseline")
 
-        dates = pd.date_range(end=datetime.now(), periods=days, freq="D")
+        dates = pd.date_range(end=self._today(), periods=days, freq="D")
 
         # Componente tendencia
         trend_component = baseline + trend * np.arange(days)
@@ -441,14 +460,14 @@ class TimeSeriesGenerator(BaseGenerator):
         incidence = trend_component + seasonal_component + noise
 
         # Agregar brotes
-        if outbreaks > 0:
+        if outbreaks > 0 and days > 60:
             outbreak_days = self.rng.choice(
                 range(30, days - 30), min(outbreaks, days - 60), replace=False
             )
             for day in outbreak_days:
                 outbreak_duration = int(self.rng.integers(7, 21))
                 outbreak_magnitude = self.rng.uniform(2, 5) * baseline
-                outbreak_shape = stats.norm.pdf(
+                outbreak_shape = _normal_pdf(
                     np.arange(outbreak_duration),
                     outbreak_duration / 2,
                     outbreak_duration / 4,
@@ -506,7 +525,7 @@ class TimeSeriesGenerator(BaseGenerator):
         weekly_rate = baseline_rate / 52
         expected_deaths = population * weekly_rate / 1000
 
-        dates = pd.date_range(end=datetime.now(), periods=weeks, freq="W")
+        dates = pd.date_range(end=self._today(), periods=weeks, freq="W")
 
         # Mortalidad basal con estacionalidad (mayor en invierno)
         seasonal = 0.15 * np.sin(2 * np.pi * (np.arange(weeks) - 26) / 52)
@@ -0,0 +1,443 @@
+"""
+Trayectorias longitudinales de pacientes
+
+Cada paciente evoluciona en uno o mas modelos de enfermedad (cadenas de
+Markov mensuales). En cada paso de tiempo se actualizan los estados de
+todos los pacientes a la vez (vectorizado) y se emiten encuentros,
+diagnosticos y examenes condicionados al estado vigente:
+- frecuencia de encuentros segun gravedad
+- diagnosticos CIE-10 del estado de cada modelo
+- valores de laboratorio con media por estado, efecto individual y
+  deriva con el tiempo en el estado (ej: HbA1c en diabetes, creatinina
+  en ERC)
+
+La salida se entrega por bloque de pacientes (los pasos del bloque se
+acumulan y se emiten juntos), con las mismas tablas y claves que
+`CohortPipeline`.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+import numpy as np
+import pandas as pd
+from .base_generator import BaseGenerator
+from .patient_id import ENCOUNTER_TYPES, PatientIDGenerator
+from .storage import concat_chunks, open_sink, write_chunks
+
+
+GENERAL_EXAM_CODE = "Z00.0"
+
+
+@dataclass
+class DiseaseModel:
+    """Modelo de Markov de una enfermedad cronica (paso mensual)"""
+
+    name: str
+    states: List[str]
+    transitions: List[List[float]]  # Matriz k x k de probabilidades mensuales
+    initial: List[float]  # Distribucion inicial de estados
+    cie10: List[Optional[str]]  # Codigo por estado (None = sin diagnostico)
+    encounter_rate: List[float]  # Encuentros esperados por mes segun estado
+    age_effect: float = 0.0  # log-HR de progresion por decada sobre 50 anios
+    lab: Optional[str] = None
+    lab_unit: str = ""
+    lab_mean: List[float] = field(default_factory=list)
+    lab_sd: float = 0.0  # Dispersion entre pacientes
+    lab_noise: float = 0.0  # Variabilidad entre mediciones
+    lab_drift: float = 0.0  # Cambio anual dentro de estados con enfermedad
+
+    def __post_init__(self):
+        k = len(self.states)
+        T = np.asarray(self.transitions, dtype=np.float64)
+        if T.shape != (k, k):
+            raise ValueError(f"{self.name}: transitions debe ser {k}x{k}")
+        if (T < 0).any() or not np.allclose(T.sum(axis=1), 1.0):
+            raise ValueError(f"{self.name}: filas de transitions deben sumar 1")
+        if len(self.initial) != k or not np.isclose(sum(self.initial), 1.0):
+            raise ValueError(f"{self.name}: initial debe tener {k} probabilidades que sumen 1")
+        if len(self.cie10) != k or len(self.encounter_rate) != k:
+            raise ValueError(f"{self.name}: cie10 y encounter_rate deben tener {k} elementos")
+        if self.lab is not None and len(self.lab_mean) != k:
+            raise ValueError(f"{self.name}: lab_mean debe tener {k} elementos")
+        self.transitions = T
+
+
+DEFAULT_MODELS: List[DiseaseModel] = [
+    DiseaseModel(
+        name="diabetes",
+        states=["sano", "prediabetes", "diabetes", "diabetes_complicada"],
+        transitions=[
+            [0.998, 0.002, 0.0, 0.0],
+            [0.0, 0.994, 0.006, 0.0],
+            [0.0, 0.0, 0.996, 0.004],
+            [0.0, 0.0, 0.0, 1.0],
+        ],
+        initial=[0.75, 0.12, 0.11, 0.02],
+        cie10=[None, "R73.0", "E11.9", "E11.2"],
+        encounter_rate=[0.15, 0.2, 0.35, 0.6],
+        age_effect=0.3,
+        lab="HbA1c",
+        lab_unit="%",
+        lab_mean=[5.2, 6.0, 7.4, 8.6],
+        lab_sd=0.3,
+        lab_noise=0.2,
+        lab_drift=0.15,
+    ),
+    DiseaseModel(
+        name="erc",
+        states=["normal", "erc_3", "erc_4", "erc_5"],
+        transitions=[
+            [0.9985, 0.0015, 0.0, 0.0],
+            [0.0, 0.996, 0.004, 0.0],
+            [0.0, 0.0, 0.995, 0.005],
+            [0.0, 0.0, 0.0, 1.0],
+        ],
+        initial=[0.9, 0.07, 0.02, 0.01],
+        cie10=[None, "N18.3", "N18.4", "N18.5"],
+        encounter_rate=[0.15, 0.3, 0.5, 1.0],
+        age_effect=0.4,
+        lab="Creatinina",
+        lab_unit="mg/dL",
+        lab_mean=[0.9, 1.6, 2.8, 5.5],
+        lab_sd=0.1,
+        lab_noise=0.1,
+        lab_drift=0.1,
+    ),
+    DiseaseModel(
+        name="hipertension",
+        states=["normotenso", "hipertenso"],
+        transitions=[[0.997, 0.003], [0.0, 1.0]],
+        initial=[0.75, 0.25],
+        cie10=[None, "I10"],
+        encounter_rate=[0.15, 0.25],
+        age_effect=0.35,
+    ),
+]
+
+
+class TrajectoryGenerator(BaseGenerator):
+    """Generador de trayectorias de enfermedad con cadenas de Markov por paciente"""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        models: Optional[List[DiseaseModel]] = None,
+        chunk_size: int = 100_000,
+    ):
+        """
+        Args:
+            seed: Semilla para reproducibilidad
+            models: Modelos de enfermedad (default: DEFAULT_MODELS)
+            chunk_size: Pacientes por bloque
+        """
+        super().__init__(seed)
+        self._validate_positive_int(chunk_size, "chunk_size")
+        self.models = DEFAULT_MODELS if models is None else models
+        if not self.models:
+            raise ValueError("Se requiere al menos un modelo de enfermedad")
+        self.chunk_size = chunk_size
+        patient_seed = np.random.SeedSequence(seed).generate_state(1)[0]
+        self.patients = PatientIDGenerator(seed=int(patient_seed))
+        self._encounter_counter = 0
+
+    def generate(self, n: int, **kwargs) -> Dict[str, pd.DataFrame]:
+        """
+        Genera las trayectorias completas en memoria.
+
+        Args:
+            n: Numero de pacientes
+            **kwargs: Parametros de `iter_chunks`
+
+        Returns:
+            Dict tabla -> DataFrame
+        """
+        return concat_chunks(self.iter_chunks(n, **kwargs))
+
+    def run(
+        self,
+        n_patients: int,
+        output: Union[str, Path, None] = None,
+        format: str = "csv",
+        sink=None,
+        **kwargs,
+    ) -> Dict[str, int]:
+        """
+        Genera las trayectorias y las escribe por bloque de pacientes.
+
+        Args:
+            n_patients: Numero de pacientes
+            output: Directorio (csv/parquet) o base de datos (sqlite/duckdb)
+            format: Formato de salida si no se entrega `sink`
+            sink: Destino con `write(tabla, df)` y `close()`
+            **kwargs: Parametros de `iter_chunks`
+
+        Returns:
+            Filas escritas por tabla
+        """
+        if sink is None:
+            sink = open_sink(format, output)
+        return write_chunks(self.iter_chunks(n_patients, **kwargs), sink)
+
+    def iter_chunks(
+        self,
+        n_patients: int,
+        years: int = 10,
+        start_date: str = "2015-01-01",
+        lab_probability: float = 0.7,
+    ) -> Iterator[Dict[str, pd.DataFrame]]:
+        """
+        Simula trayectorias por bloque de pacientes (pasos mensuales).
+
+        Args:
+            n_patients: Numero de pacientes
+            years: Anios simulados
+            start_date: Inicio de la simulacion (se usa el mes)
+            lab_probability: Probabilidad de examen por modelo con
+                laboratorio en cada encuentro
+
+        Yields:
+            Dict tabla -> DataFrame por bloque de pacientes: patients,
+            encounters, diagnoses, labs y state_changes de todos los pasos
+        """
+        self._validate_positive_int(n_patients, "n_patients")
+        self.patients._check_keys(self.patients._counter + n_patients)
+        self._validate_positive_int(years, "years")
+        self._validate_probability(lab_probability, "lab_probability")
+
+        start_month = np.datetime64(start_date, "M")
+        for start in range(0, n_patients, self.chunk_size):
+            rows = min(self.chunk_size, n_patients - start)
+            patients = self.patients.generate_cohort(rows, render_ids=False)
+            patients.insert(1, "patient_id", self.patients.render_patient_ids(patients))
+            yield self._simulate(patients, years * 12, start_month, lab_probability)
+
+    def _simulate(
+        self,
+        patients: pd.DataFrame,
+        n_steps: int,
+        start_month: np.datetime64,
+        lab_probability: float,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Evoluciona estados de un bloque de pacientes.
+
+        Las tablas de cada paso se acumulan y se concatenan al final, para
+        que los sinks escriban una parte por tabla y bloque (no una por mes).
+        """
+        n = len(patients)
+        keys = patients["patient_key"].to_numpy()
+        birth_day = patients["birth_date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        n_models = len(self.models)
+
+        state = np.empty((n, n_models), dtype=np.int8)
+        entered = np.zeros((n, n_models), dtype=np.int32)
+        offset = np.zeros((n, n_models))
+        for j, model in enumerate(self.models):
+            state[:, j] = self._sampler(np.arange(len(model.states)), model.initial).sample(n)
+            offset[:, j] = self.rng.normal(0, model.lab_sd, n)
+
+        steps: Dict[str, List[pd.DataFrame]] = {
+            "encounters": [],
+            "diagnoses": [],
+            "labs": [],
+            "state_changes": [self._state_rows(keys, state, np.arange(n), None, start_month)],
+        }
+        for step in range(n_steps):
+            month = start_month + step
+            age = (month.astype("datetime64[D]").astype(np.int64) - birth_day) / 365.25
+            born = age >= 0
+            if step > 0:
+                steps["state_changes"].append(
+                    self._transition(keys, age, born, state, entered, step, month)
+                )
+
+            encounters, enc_patient = self._encounters(keys, state, month, born=born)
+            steps["encounters"].append(encounters)
+            steps["diagnoses"].append(self._diagnoses(encounters, state[enc_patient]))
+            steps["labs"].append(
+                self._labs(
+                    encounters,
+                    state[enc_patient],
+                    (step - entered[enc_patient]) / 12,
+                    offset[enc_patient],
+                    lab_probability,
+                )
+            )
+
+        return {
+            "patients": patients,
+            **{table: pd.concat(parts, ignore_index=True) for table, parts in steps.items()},
+        }
+
+    def _transition(
+        self,
+        keys: np.ndarray,
+        age: np.ndarray,
+        born: np.ndarray,
+        state: np.ndarray,
+        entered: np.ndarray,
+        step: int,
+        month: np.datetime64,
+    ) -> pd.DataFrame:
+        """
+        Un paso de Markov para todos los pacientes (in-place sobre state).
+
+        Los pacientes aun no nacidos (`born` False) conservan su estado.
+        """
+        previous = state.copy()
+        for j, model in enumerate(self.models):
+            k = len(model.states)
+            current = state[:, j].astype(np.intp)
+            rows = model.transitions[current]
+            if model.age_effect:
+                # Escala probabilidades de salida segun edad y recalcula permanencia
+                hr = np.exp(model.age_effect * (age - 50) / 10)
+                stay = rows[np.arange(len(current)), current]
+                leave = np.minimum((1 - stay) * hr, 1.0)
+                scale = np.divide(leave, 1 - stay, out=np.zeros_like(leave), where=stay < 1)
+                rows = rows * scale[:, None]
+                rows[np.arange(len(current)), current] = 1 - leave
+            cum = np.cumsum(rows, axis=1)
+            u = self.rng.random(len(current))
+            drawn = np.minimum((u[:, None] >= cum).sum(axis=1), k - 1)
+            state[:, j] = np.where(born, drawn, current)
+
+        changed_patient, changed_model = np.nonzero(state != previous)
+        entered[changed_patient, changed_model] = step
+        return self._state_rows(
+            keys, state, changed_patient, (changed_model, previous), month
+        )
+
+    def _state_rows(
+        self,
+        keys: np.ndarray,
+        state: np.ndarray,
+        patient_idx: np.ndarray,
+        changed: Optional[tuple],
+        month: np.datetime64,
+    ) -> pd.DataFrame:
+        """Tabla de cambios de estado (o estado inicial si changed es None)"""
+        if changed is None:
+            n_models = len(self.models)
+            patient_idx = np.repeat(patient_idx, n_models)
+            model_idx = np.tile(np.arange(n_models), len(keys))
+            from_state = np.full(len(patient_idx), "")
+        else:
+            model_idx, previous = changed
+            from_state = self._state_names(model_idx, previous[patient_idx, model_idx])
+
+        names = np.array([m.name for m in self.models])
+        return pd.DataFrame(
+            {
+                "patient_key": keys[patient_idx],
+                "model": names[model_idx],
+                "from_state": from_state,
+                "to_state": self._state_names(model_idx, state[patient_idx, model_idx]),
+                "change_date": np.full(len(patient_idx), month.astype("datetime64[D]")),
+            }
+        )
+
+    def _state_names(self, model_idx: np.ndarray, state: np.ndarray) -> np.ndarray:
+        """Nombre del estado por fila (modelo, estado)"""
+        width = max(len(m.states) for m in self.models)
+        table = np.array(
+            [m.states + [""] * (width - len(m.states)) for m in self.models], dtype=object
+        )
+        return table[model_idx, state.astype(np.intp)].astype(str)
+
+    def _encounters(
+        self, keys: np.ndarray, state: np.ndarray, month: np.datetime64, born: np.ndarray
+    ) -> tuple:
+        """Encuentros del mes: tasa Poisson = maxima tasa entre modelos segun estado"""
+        rate = np.zeros(len(keys))
+        for j, model in enumerate(self.models):
+            rate = np.maximum(rate, np.asarray(model.encounter_rate)[state[:, j]])
+        counts = self.rng.poisson(rate * born)
+        patient_idx = np.repeat(np.arange(len(keys)), counts)
+        n = len(patient_idx)
+
+        encounter_keys = np.arange(
+            self._encounter_counter, self._encounter_counter + n, dtype=np.int64
+        )
+        self._encounter_counter += n
+
+        first_day = month.astype("datetime64[D]")
+        days_in_month = ((month + 1).astype("datetime64[D]") - first_day).astype(np.int64)
+        days = first_day + self.rng.integers(0, days_in_month, n).astype("timedelta64[D]")
+
+        encounters = pd.DataFrame(
+            {
+                "encounter_key": encounter_keys,
+                "patient_key": keys[patient_idx],
+                "encounter_date": days,
+                "encounter_type": self._sampler(
+                    ENCOUNTER_TYPES, [0.7, 0.15, 0.05, 0.1]
+                ).sample_values(n),
+            }
+        )
+        return encounters, patient_idx
+
+    def _diagnoses(self, encounters: pd.DataFrame, state: np.ndarray) -> pd.DataFrame:
+        """Diagnosticos del estado vigente de cada modelo; Z00.0 si no hay enfermedad"""
+        codes = np.empty(state.shape, dtype=object)
+        for j, model in enumerate(self.models):
+            table = np.array([c or "" for c in model.cie10], dtype=object)
+            codes[:, j] = table[state[:, j]]
+        has_code = codes != ""
+        none = ~has_code.any(axis=1)
+        codes[none, 0] = GENERAL_EXAM_CODE
+        has_code[none, 0] = True
+
+        enc_idx, _ = np.nonzero(has_code)
+        counts = has_code.sum(axis=1)
+        starts = np.cumsum(counts) - counts
+        rank = np.arange(len(enc_idx)) - np.repeat(starts, counts) + 1
+
+        return pd.DataFrame(
+            {
+                "encounter_key": encounters["encounter_key"].to_numpy()[enc_idx],
+                "patient_key": encounters["patient_key"].to_numpy()[enc_idx],
+                "dx_rank": rank.astype(np.int16),
+                "cie10_code": codes[has_code].astype(str),
+            }
+        )
+
+    def _labs(
+        self,
+        encounters: pd.DataFrame,
+        state: np.ndarray,
+        years_in_state: np.ndarray,
+        offset: np.ndarray,
+        probability: float,
+    ) -> pd.DataFrame:
+        """Examenes por modelo con media segun estado, efecto individual y deriva"""
+        parts = []
+        for j, model in enumerate(self.models):
+            if model.lab is None:
+                continue
+            idx = np.flatnonzero(self.rng.random(len(encounters)) < probability)
+            s = state[idx, j]
+            value = (
+                np.asarray(model.lab_mean)[s]
+                + model.lab_drift * years_in_state[idx, j] * (s > 0)
+                + offset[idx, j]
+                + self.rng.normal(0, model.lab_noise, len(idx))
+            )
+            parts.append(
+                pd.DataFrame(
+                    {
+                        "encounter_key": encounters["encounter_key"].to_numpy()[idx],
+                        "patient_key": encounters["patient_key"].to_numpy()[idx],
+                        "test_date": encounters["encounter_date"].to_numpy()[idx],
+                        "test_name": model.lab,
+                        "value": np.round(np.maximum(value, 0), 2),
+                        "unit": model.lab_unit,
+                    }
+                )
+            )
+        if not parts:
+            return pd.DataFrame(
+                columns=["encounter_key", "patient_key", "test_date", "test_name", "value", "unit"]
+            )
+        return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,12 @@
+"""
+Benchmarks de rendimiento de los generadores
+
+Mide filas/segundo y RSS maximo de cada generador registrado
+(`app.registry`) en tamanos 10^3..10^7, de los modelos SIR/SEIR por numero
+de dias y de la API end-to-end. Resultados en JSON para comparar entre
+versiones:
+
+    cd backend
+    python -m benchmarks.run -o benchmarks/results/actual.json
+    python -m benchmarks.run --compare benchmarks/results/v0.3.json
+"""
@@ -0,0 +1,332 @@
+"""
+Runner de benchmarks
+
+Cada caso corre en un proceso hijo (fork) para que el RSS maximo sea
+propio del caso y no acumule los anteriores. El tiempo reportado es el
+minimo de `repeat` ejecuciones; los tamanos cuyo tiempo estimado supera
+`max_seconds` se omiten.
+
+Uso (desde backend/):
+    python -m benchmarks.run --sizes 1e3,1e4,1e5 -k rct
+    python -m benchmarks.run --compare benchmarks/results/base.json
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+import json
+import multiprocessing as mp
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import click
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app import registry  # noqa: E402
+
+
+SIZES = tuple(10**k for k in range(3, 8))
+# Generadores cuyo n es numero de dias
+DAY_SIZES = {
+    "epidemic_sir": (100, 1_000, 10_000, 100_000),
+    "epidemic_seir": (100, 1_000, 10_000, 100_000),
+    "timeseries_covid": (100, 1_000, 10_000, 100_000),
+    "surveillance": (30, 365, 3_650),
+}
+API_SCHEMAS = ("demographics", "rct", "cohort")
+BACKEND = Path(__file__).resolve().parents[1]
+API_SIZES = (10**3, 10**4, 10**5)
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+@dataclass
+class Case:
+    """Caso de benchmark: `fn(n)` ejecuta y retorna filas producidas"""
+
+    name: str
+    n: int
+    fn: Callable[[int], int]
+
+
+def generator_case(name: str) -> Callable[[int], int]:
+    """Genera el schema por bloques sin escribir (mide solo generacion)"""
+    spec = registry.get_spec(name)
+    config = registry.load_schema(name)
+
+    def fn(n: int) -> int:
+        return sum(
+            len(df) for tables in spec.iter_chunks(config, n, seed=42) for df in tables.values()
+        )
+
+    return fn
+
+
+def api_case(name: str) -> Callable[[int], int]:
+    """POST /api/v1/generate end-to-end (incluye escritura CSV en directorio temporal)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+
+    def fn(n: int) -> int:
+        with tempfile.TemporaryDirectory() as tmp:
+            registry.OUTPUT_DIR = Path(tmp)  # solo en el proceso hijo
+            response = client.post(
+                "/api/v1/generate", json={"schema_name": name, "rows": n}
+            )
+            response.raise_for_status()
+        return int(re.search(r"Generado (\d+) filas", response.json()["message"]).group(1))
+
+    return fn
+
+
+def startup_case() -> Callable[[int], int]:
+    """`schemas list` en un interprete nuevo (arranque de la CLI; 1 fila por ejecucion)"""
+
+    def fn(n: int) -> int:
+        for _ in range(n):
+            subprocess.run(
+                [sys.executable, "__main__.py", "schemas", "list"],
+                cwd=BACKEND, capture_output=True, check=True,
+            )
+        return n
+
+    return fn
+
+
+def build_cases(
+    sizes: Optional[Sequence[int]] = None,
+    pattern: Optional[str] = None,
+    api: bool = True,
+) -> List[Case]:
+    """
+    Casos para todos los generadores registrados y la API.
+
+    Args:
+        sizes: Tamanos (default: SIZES; los generadores por dias usan DAY_SIZES)
+        pattern: Subcadena que debe contener el nombre del caso
+        api: Incluir casos end-to-end de la API y el arranque de la CLI
+
+    Returns:
+        Lista de casos ordenados por nombre y tamano
+    """
+    cases = []
+    for name in sorted(registry.REGISTRY):
+        fn = generator_case(name)
+        for n in DAY_SIZES.get(name, sizes or SIZES):
+            cases.append(Case(f"generator:{name}", n, fn))
+    if api:
+        cases.append(Case("startup:schemas_list", 1, startup_case()))
+        for name in API_SCHEMAS:
+            fn = api_case(name)
+            for n in API_SIZES if sizes is None else sizes:
+                cases.append(Case(f"api:{name}", n, fn))
+    if pattern:
+        cases = [case for case in cases if pattern in case.name]
+    return cases
+
+
+def _peak_rss_mb() -> float:
+    """RSS maximo del proceso (ru_maxrss es KB en Linux, bytes en macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _measure(case: Case, repeat: int, conn) -> None:
+    try:
+        base = _peak_rss_mb()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = case.fn(case.n)
+            times.append(time.perf_counter() - start)
+        conn.send(
+            {"rows": rows, "seconds": min(times), "peak_rss_mb": _peak_rss_mb(), "base_rss_mb": base}
+        )
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def measure(case: Case, repeat: int = 3) -> Dict:
+    """
+    Ejecuta un caso en un proceso hijo.
+
+    Returns:
+        dict con name, n, rows, seconds, rows_per_sec, peak_rss_mb y
+        base_rss_mb (RSS heredado al iniciar el caso), o error
+    """
+    ctx = mp.get_context("fork")
+    parent, child = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_measure, args=(case, repeat, child))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {"error": "proceso terminado sin resultado"}
+    process.join()
+    if process.exitcode not in (0, None) and "error" not in result:
+        result = {"error": f"exit code {process.exitcode}"}
+
+    result = {"name": case.name, "n": case.n, **result}
+    if "seconds" in result:
+        result["rows_per_sec"] = result["rows"] / result["seconds"] if result["seconds"] else None
+    return result
+
+
+def run(
+    cases: Sequence[Case],
+    repeat: int = 3,
+    max_seconds: float = 60.0,
+    echo: Callable[[str], None] = lambda line: None,
+) -> List[Dict]:
+    """
+    Ejecuta casos en orden, omitiendo tamanos que excederian `max_seconds`.
+
+    El tiempo de un tamano se estima escalando linealmente el ultimo
+    tamano medido del mismo caso.
+    """
+    results = []
+    last: Dict[str, Dict] = {}
+    for case in cases:
+        prev = last.get(case.name)
+        if prev is not None and (
+            "error" in prev
+            or prev.get("skipped")
+            or prev["seconds"] * case.n / prev["n"] > max_seconds
+        ):
+            result = {"name": case.name, "n": case.n, "skipped": True}
+        else:
+            result = measure(case, repeat)
+        last[case.name] = result
+        results.append(result)
+        echo(format_result(result))
+    return results
+
+
+def format_result(result: Dict) -> str:
+    """Linea legible de un resultado"""
+    head = f"{result['name']:<30} n={result['n']:>10,}"
+    if result.get("skipped"):
+        return f"{head}  omitido"
+    if "error" in result:
+        return f"{head}  error: {result['error']}"
+    return (
+        f"{head}  {result['seconds']:9.4f}s  {result['rows_per_sec'] or 0:>14,.0f} filas/s"
+        f"  {result['peak_rss_mb']:9.1f} MB"
+    )
+
+
+def environment() -> Dict:
+    """Metadatos del entorno para comparar resultados entre versiones"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=Path(__file__).parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.2) -> List[Dict]:
+    """
+    Regresiones de `current` respecto de `baseline`.
+
+    Un caso (name, n) regresa si filas/s cae mas de `threshold` o si el
+    RSS maximo crece mas de `threshold`.
+
+    Args:
+        baseline: JSON de resultados de referencia
+        current: JSON de resultados actuales
+        threshold: Tolerancia relativa
+
+    Returns:
+        Lista de dicts name, n, metric, baseline, current, change
+    """
+    reference = {
+        (r["name"], r["n"]): r for r in baseline["results"] if "rows_per_sec" in r
+    }
+    regressions = []
+    for result in current["results"]:
+        ref = reference.get((result["name"], result["n"]))
+        if ref is None or "rows_per_sec" not in result:
+            continue
+        for metric, worse in [
+            ("rows_per_sec", lambda new, old: new < old * (1 - threshold)),
+            ("peak_rss_mb", lambda new, old: new > old * (1 + threshold)),
+        ]:
+            old, new = ref[metric], result[metric]
+            if old and new is not None and worse(new, old):
+                regressions.append(
+                    {
+                        "name": result["name"],
+                        "n": result["n"],
+                        "metric": metric,
+                        "baseline": old,
+                        "current": new,
+                        "change": new / old - 1,
+                    }
+                )
+    return regressions
+
+
+def _parse_sizes(value: Optional[str]) -> Optional[List[int]]:
+    if not value:
+        return None
+    return [int(float(size)) for size in value.split(",")]
+
+
+@click.command()
+@click.option("--output", "-o", default=None, help="JSON de salida (default: results/<fecha>.json)")
+@click.option("--sizes", default=None, help="Tamanos separados por coma (ej: 1e3,1e5)")
+@click.option("--filter", "-k", "pattern", default=None, help="Solo casos cuyo nombre contiene")
+@click.option("--repeat", default=3, help="Repeticiones por caso (se reporta el minimo)")
+@click.option("--max-seconds", default=60.0, help="Tiempo maximo estimado por caso")
+@click.option("--no-api", is_flag=True, help="Omitir casos de la API")
+@click.option("--compare", "baseline", default=None, help="JSON de referencia")
+@click.option("--threshold", default=0.2, help="Tolerancia de regresion")
+def main(output, sizes, pattern, repeat, max_seconds, no_api, baseline, threshold):
+    """Benchmarks de generadores y API"""
+    cases = build_cases(_parse_sizes(sizes), pattern, api=not no_api)
+    report = {"environment": environment(), "results": run(cases, repeat, max_seconds, click.echo)}
+
+    if output is None:
+        output = RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    click.echo(f"✓ Resultados: {output}")
+
+    if baseline:
+        regressions = compare(json.loads(Path(baseline).read_text()), report, threshold)
+        for r in regressions:
+            click.echo(
+                f"✗ {r['name']} n={r['n']:,} {r['metric']}: "
+                f"{r['baseline']:,.1f} -> {r['current']:,.1f} ({r['change']:+.0%})"
+            )
+        if regressions:
+            sys.exit(1)
+        click.echo(f"✓ Sin regresiones respecto de {baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,3 +16,12 @@ def sample_patient_ids():
 def sample_diseases():
     """Fixture providing sample disease codes"""
     return ["J09", "A00", "B05", "E11.9", "I10"]
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    """Redirect default generation output to a temporary directory"""
+    from app import registry
+
+    monkeypatch.setattr(registry, "OUTPUT_DIR", tmp_path / "output")
+    return tmp_path / "output"
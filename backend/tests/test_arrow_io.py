@@ -0,0 +1,111 @@
+import pytest
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+pa = pytest.importorskip("pyarrow")
+
+from app import registry  # noqa: E402
+from app.arrow_io import MEDIA_TYPE, ipc_stream, iter_record_batches, to_record_batch  # noqa: E402
+from app.generators import DemographicsGenerator  # noqa: E402
+from app.main import app  # noqa: E402
+from app.storage import open_sink, write_chunks  # noqa: E402
+
+
+class TestRecordBatch:
+    """Tests for DataFrame -> RecordBatch conversion"""
+
+    def test_types(self):
+        """Categories and low-cardinality text are dictionaries; dates are date32"""
+        df = pd.DataFrame(
+            {
+                "id": np.arange(6),
+                "sex": pd.Categorical(["M", "F", "M", "F", "M", "F"]),
+                "code": ["A00", "A00", "B20", "A00", "B20", "A00"],
+                "name": ["a", "b", "c", "d", "e", "f"],
+                "date": pd.to_datetime(["2024-01-01"] * 5 + [None]),
+                "ts": pd.to_datetime(["2024-01-01 10:30"] * 6),
+            }
+        )
+        batch = to_record_batch(df)
+
+        assert batch.schema.field("id").type == pa.int64()
+        assert pa.types.is_dictionary(batch.schema.field("sex").type)
+        assert pa.types.is_dictionary(batch.schema.field("code").type)
+        assert not pa.types.is_dictionary(batch.schema.field("name").type)
+        assert batch.schema.field("date").type == pa.date32()
+        assert batch.column("date").null_count == 1
+        assert pa.types.is_timestamp(batch.schema.field("ts").type)
+        assert batch.column("code").to_pylist() == df["code"].tolist()
+
+    def test_zero_copy_numeric(self):
+        """Numeric columns and category codes share memory with the generator output"""
+        df = DemographicsGenerator(seed=1).generate(1000)
+        batch = to_record_batch(df)
+
+        assert np.shares_memory(batch.column("edad").to_numpy(), df["edad"].to_numpy())
+        assert np.shares_memory(batch.column("genero").indices.to_numpy(), df["genero"].array.codes)
+
+    def test_generate_arrow(self):
+        """generate_arrow returns the same data as generate"""
+        batch = DemographicsGenerator(seed=3).generate_arrow(500)
+        df = DemographicsGenerator(seed=3).generate(500)
+
+        pd.testing.assert_frame_equal(
+            batch.to_pandas().astype(str), df.astype(str)
+        )
+
+    def test_stream_unifies_schema(self):
+        """Later chunks are cast to the first chunk's schema"""
+        chunks = [
+            {"t": pd.DataFrame({"c": ["x", "x", "x", "y"]})},
+            {"t": pd.DataFrame({"c": ["p", "q", "r"]})},
+        ]
+        batches = [batch for _, batch in iter_record_batches(chunks)]
+        table = pa.ipc.open_stream(b"".join(ipc_stream(batches))).read_all()
+
+        assert table.num_rows == 7
+        assert table.column("c").to_pylist() == ["x", "x", "x", "y", "p", "q", "r"]
+
+
+class TestArrowSink:
+    """Tests for Arrow IPC output format"""
+
+    def test_cohort_to_arrow(self, tmp_path):
+        """Chunked multi-table generation writes one stream per table"""
+        spec = registry.get_spec("cohort")
+        config = registry.load_schema("cohort")
+        rows = write_chunks(spec.iter_chunks(config, 300, seed=1), open_sink("arrow", tmp_path))
+
+        for table, n in rows.items():
+            with pa.ipc.open_stream(tmp_path / f"{table}.arrows") as reader:
+                assert reader.read_all().num_rows == n
+
+
+class TestArrowEndpoint:
+    """Tests for GET /api/v1/arrow/{schema}"""
+
+    def test_stream(self):
+        """Single-table schema streams as Arrow IPC"""
+        response = TestClient(app).get("/api/v1/arrow/rct", params={"rows": 200, "seed": 1})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == MEDIA_TYPE
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.num_rows == 200
+        assert table.schema.field("enrollment_date").type == pa.date32()
+
+    def test_multi_table(self):
+        """Multi-table schemas require a table name"""
+        client = TestClient(app)
+
+        assert client.get("/api/v1/arrow/cohort", params={"rows": 50}).status_code == 400
+        assert client.get(
+            "/api/v1/arrow/cohort", params={"rows": 50, "table": "missing"}
+        ).status_code == 400
+        response = client.get("/api/v1/arrow/cohort", params={"rows": 50, "table": "patients"})
+        assert pa.ipc.open_stream(response.content).read_all().num_rows == 50
+
+    def test_unknown_schema(self):
+        """Unknown schema returns 404"""
+        assert TestClient(app).get("/api/v1/arrow/nope").status_code == 404
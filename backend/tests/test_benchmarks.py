@@ -0,0 +1,57 @@
+import pytest
+from app.registry import REGISTRY
+from benchmarks.run import Case, build_cases, compare, measure, run
+
+
+def _report(rows_per_sec, peak_rss_mb=100.0):
+    return {
+        "results": [
+            {"name": "generator:rct", "n": 1000, "rows": 1000,
+             "rows_per_sec": rows_per_sec, "peak_rss_mb": peak_rss_mb}
+        ]
+    }
+
+
+class TestBenchmarks:
+    """Tests for benchmark runner and regression comparison"""
+
+    def test_cases_cover_registry(self):
+        """Every registered generator gets a benchmark case"""
+        names = {case.name for case in build_cases(sizes=[1000], api=False)}
+
+        assert names == {f"generator:{name}" for name in REGISTRY}
+
+    def test_startup_case(self):
+        """CLI startup is timed by the benchmark suite, not the unit tests"""
+        case = next(c for c in build_cases(sizes=[1000]) if c.name == "startup:schemas_list")
+
+        assert case.fn(1) == 1
+
+    def test_measure(self):
+        """A case reports rows, throughput and peak RSS from a child process"""
+        result = measure(build_cases(sizes=[500], pattern="generator:rct", api=False)[0], repeat=1)
+
+        assert result["rows"] == 500
+        assert result["rows_per_sec"] > 0
+        assert result["peak_rss_mb"] >= result["base_rss_mb"] > 0
+
+    def test_errors_and_budget(self):
+        """Failing cases are reported and larger sizes skipped"""
+        def fail(n):
+            raise RuntimeError("boom")
+
+        results = run([Case("bad", 10, fail), Case("bad", 100, fail)], repeat=1)
+
+        assert "boom" in results[0]["error"]
+        assert results[1]["skipped"]
+
+    def test_compare_detects_regressions(self):
+        """Throughput drops and memory growth beyond threshold are flagged"""
+        assert compare(_report(1000.0), _report(900.0), threshold=0.2) == []
+
+        slower = compare(_report(1000.0), _report(700.0), threshold=0.2)
+        assert [r["metric"] for r in slower] == ["rows_per_sec"]
+        assert slower[0]["change"] == pytest.approx(-0.3)
+
+        bigger = compare(_report(1000.0), _report(1000.0, 150.0), threshold=0.2)
+        assert [r["metric"] for r in bigger] == ["peak_rss_mb"]
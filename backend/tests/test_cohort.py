@@ -0,0 +1,110 @@
+import pytest
+import pandas as pd
+from app.cohort import CohortPipeline, TABLES
+from app.storage import CSVSink
+from app.surveillance import NOTIFIABLE_DISEASES
+
+
+class TestCohortPipeline:
+    """Tests for CohortPipeline"""
+
+    def test_generate_tables(self):
+        """All tables are generated"""
+        tables = CohortPipeline(seed=42, chunk_size=50).generate(120)
+
+        assert set(tables) == set(TABLES)
+        assert len(tables["patients"]) == 120
+        assert tables["patients"]["patient_id"].is_unique
+
+    def test_foreign_keys(self):
+        """Child tables reference existing parents across chunks"""
+        tables = CohortPipeline(seed=42, chunk_size=40).generate(150)
+        patients, encounters = tables["patients"], tables["encounters"]
+
+        assert patients["patient_key"].is_unique
+        assert encounters["encounter_key"].is_unique
+        assert encounters["patient_key"].isin(patients["patient_key"]).all()
+        for table in ["diagnoses", "labs"]:
+            child = tables[table].merge(
+                encounters[["encounter_key", "patient_key"]],
+                on="encounter_key",
+                suffixes=("", "_enc"),
+            )
+            assert len(child) == len(tables[table])
+            assert (child["patient_key"] == child["patient_key_enc"]).all()
+
+    def test_encounters_after_birth(self):
+        """Encounter dates fall after birth and within range"""
+        tables = CohortPipeline(seed=1).generate(200)
+        enc = tables["encounters"].merge(
+            tables["patients"][["patient_key", "birth_date"]], on="patient_key"
+        )
+
+        assert (enc["encounter_date"] >= enc["birth_date"]).all()
+        assert enc["encounter_date"].max() <= pd.Timestamp("2024-12-31")
+
+    def test_primary_diagnosis_per_encounter(self):
+        """Each encounter has exactly one primary diagnosis"""
+        tables = CohortPipeline(seed=42).generate(100)
+        primary = tables["diagnoses"].query("dx_rank == 1")
+
+        assert primary["encounter_key"].is_unique
+        assert len(primary) == len(tables["encounters"])
+
+    def test_labs_dated_at_encounter(self):
+        """Lab results share the encounter date"""
+        tables = CohortPipeline(seed=42).generate(100, lab_probability=1.0)
+        labs = tables["labs"].merge(tables["encounters"], on="encounter_key")
+
+        assert len(tables["labs"]) > 0
+        assert (labs["test_date"] == labs["encounter_date"]).all()
+
+    def test_notifications_are_notifiable(self):
+        """Notifications come from ENO diagnoses of existing encounters"""
+        tables = CohortPipeline(seed=42).generate(500)
+        notif = tables["notifications"]
+
+        assert len(notif) > 0
+        assert notif["encounter_key"].isin(tables["encounters"]["encounter_key"]).all()
+        assert notif["disease_code"].isin([c for c, _, _ in NOTIFIABLE_DISEASES]).all()
+
+    def test_chunks_bounded(self):
+        """Chunks never exceed chunk_size patients"""
+        pipeline = CohortPipeline(seed=42, chunk_size=30)
+        sizes = [len(t["patients"]) for t in pipeline.iter_chunks(100)]
+
+        assert sizes == [30, 30, 30, 10]
+
+    def test_run_writes_csv(self, tmp_path):
+        """Streaming run writes one CSV per table"""
+        rows = CohortPipeline(seed=42, chunk_size=25).run(60, tmp_path)
+
+        for table in TABLES:
+            df = pd.read_csv(tmp_path / f"{table}.csv")
+            assert len(df) == rows[table]
+        assert rows["patients"] == 60
+
+    def test_run_matches_generate(self, tmp_path):
+        """Streamed output equals in-memory generation"""
+        tables = CohortPipeline(seed=7, chunk_size=20).generate(50)
+        CohortPipeline(seed=7, chunk_size=20).run(50, sink=CSVSink(tmp_path))
+
+        written = pd.read_csv(tmp_path / "encounters.csv")
+        assert written["encounter_key"].tolist() == tables["encounters"]["encounter_key"].tolist()
+
+    def test_reproducibility(self):
+        """Same seed yields same cohort"""
+        a = CohortPipeline(seed=42).generate(80)
+        b = CohortPipeline(seed=42).generate(80)
+
+        for table in TABLES:
+            pd.testing.assert_frame_equal(a[table], b[table])
+
+    def test_invalid_params(self):
+        """Invalid parameters raise ValueError"""
+        with pytest.raises(ValueError):
+            CohortPipeline(chunk_size=0)
+        with pytest.raises(ValueError):
+            CohortPipeline().run(10)
+        with pytest.raises(ValueError):
+            list(CohortPipeline().iter_chunks(10, lab_probability=1.5))
@@ -0,0 +1,122 @@
+import pytest
+import pandas as pd
+import numpy as np
+from app.comorbidity import ComorbidityGenerator, CHARLSON, ELIXHAUSER
+
+
+class TestComorbidityIndex:
+    """Tests for Charlson/Elixhauser lookup and scoring"""
+
+    def test_lookup_full_code_and_block(self):
+        """Codes match by full code or 3-character block"""
+        cats = CHARLSON.lookup(np.array(["I21.9", "E11.2", "E11.9", "R51", "N18.4"]))
+        names = [CHARLSON.categories[c] if c >= 0 else None for c in cats]
+
+        assert names == ["mi", "diab_c", "diab_nc", None, "renal"]
+
+    def test_hierarchy(self):
+        """Complicated diabetes supersedes uncomplicated"""
+        codes = np.array(["E11.9", "E11.2"])
+        present = CHARLSON.flags(np.array([0, 0]), CHARLSON.lookup(codes), 1)
+
+        assert CHARLSON.score(present)[0] == 2
+
+    def test_duplicates_count_once(self):
+        """Repeated codes for a patient count once"""
+        codes = np.array(["I21.0", "I21.9", "I21.0"])
+        present = CHARLSON.flags(np.zeros(3, dtype=int), CHARLSON.lookup(codes), 1)
+
+        assert present.sum() == 1
+
+    def test_van_walraven_weights(self):
+        """Elixhauser score uses van Walraven weights"""
+        codes = np.array(["I50.9", "E66.9"])
+        present = ELIXHAUSER.flags(np.array([0, 0]), ELIXHAUSER.lookup(codes), 1)
+
+        assert ELIXHAUSER.score(present)[0] == 7 - 4
+
+
+class TestComorbidityGenerator:
+    """Tests for ComorbidityGenerator"""
+
+    def test_basic_generation(self):
+        """One row per patient with both indices"""
+        df = ComorbidityGenerator(seed=42).generate(500)
+
+        assert len(df) == 500
+        assert df["id"].is_unique
+        assert {"charlson_index", "elixhauser_index"} <= set(df.columns)
+        assert df["n_codes"].between(1, 6).all()
+
+    def test_codes_consistent_with_count(self):
+        """Joined codes match n_codes"""
+        df = ComorbidityGenerator(seed=42).generate(200)
+
+        assert (df["codes"].str.split(";").str.len() == df["n_codes"]).all()
+
+    def test_score_matches_generate(self):
+        """Scoring the long table reproduces generated indices"""
+        gen = ComorbidityGenerator(seed=42)
+        df = gen.generate(300)
+        long = df.assign(diag=df["codes"].str.split(";")).explode("diag")
+        scored = gen.score(long)
+
+        assert (scored["charlson_index"].to_numpy() == df["charlson_index"].to_numpy()).all()
+        assert (scored["elixhauser_index"].to_numpy() == df["elixhauser_index"].to_numpy()).all()
+
+    def test_generate_diagnoses_unique(self):
+        """Long diagnoses have no duplicates per patient"""
+        diag = ComorbidityGenerator(seed=42).generate_diagnoses(300)
+
+        assert not diag.duplicated(["id", "diag"]).any()
+        assert diag["id"].nunique() == 300
+
+    def test_generate_diagnoses_matches_generate(self):
+        """Long diagnoses are the codes of generate(), also across blocks"""
+        n = ComorbidityGenerator.BLOCK_SIZE + 20
+        df = ComorbidityGenerator(seed=42).generate(n, indices=())
+        diag = ComorbidityGenerator(seed=42).generate_diagnoses(n)
+        long = df.assign(diag=df["codes"].str.split(";")).explode("diag")
+
+        assert (diag["id"].to_numpy() == long["id"].to_numpy()).all()
+        assert (diag["diag"].astype(str).to_numpy() == long["diag"].astype(str).to_numpy()).all()
+
+    def test_random_access(self):
+        """generate(n) is the row range [0, n) of the seed's table"""
+        full = ComorbidityGenerator(seed=42).generate(1050)
+        page = ComorbidityGenerator(seed=42).generate_rows(1000, 1050)
+
+        assert page["id"].tolist() == list(range(1001, 1051))
+        pd.testing.assert_frame_equal(page, full.iloc[1000:].reset_index(drop=True))
+        pd.testing.assert_frame_equal(ComorbidityGenerator(seed=42).generate(50), full.head(50))
+
+    def test_comorbid_fraction(self):
+        """More comorbid codes raise the Charlson index"""
+        gen_low = ComorbidityGenerator(seed=1).generate(2000, comorbid_fraction=0.1)
+        gen_high = ComorbidityGenerator(seed=1).generate(2000, comorbid_fraction=0.9)
+
+        assert gen_high["charlson_index"].mean() > gen_low["charlson_index"].mean()
+
+    def test_flags(self):
+        """Category flags are optional"""
+        df = ComorbidityGenerator(seed=42).generate(50, indices=("charlson",))
+
+        assert "charlson_mi" in df.columns
+        assert "elixhauser_index" not in df.columns
+
+    def test_reproducibility(self):
+        """Same seed yields same output"""
+        a = ComorbidityGenerator(seed=42).generate(100)
+        b = ComorbidityGenerator(seed=42).generate(100)
+
+        pd.testing.assert_frame_equal(a, b)
+
+    def test_invalid_params(self):
+        """Invalid parameters raise ValueError"""
+        gen = ComorbidityGenerator(seed=42)
+        with pytest.raises(ValueError):
+            gen.generate(10, codes_per_patient=(6, 2))
+        with pytest.raises(ValueError):
+            gen.generate(10, indices=("unknown",))
+        with pytest.raises(ValueError):
+            gen.score(pd.DataFrame({"x": [1]}))
@@ -1,7 +1,11 @@
 import pytest
 import pandas as pd
 import numpy as np
-from app.epidemic_generators import EpidemicGenerator, SurvivalGenerator
+from app.epidemic_generators import (
+    EpidemicGenerator,
+    SurvivalGenerator,
+    inverse_cumulative_hazard,
+)
 
 
 class TestEpidemicGenerator:
@@ -152,3 +156,121 @@ class TestSurvivalGenerator:
         df2 = gen2.kaplan_meier(n_subjects=50, followup_days=365, event_rate=0.2)
 
         pd.testing.assert_frame_equal(df1, df2)
+
+    def test_event_consistent_with_followup(self):
+        """Events are observed exactly when time falls within follow-up"""
+        gen = SurvivalGenerator(seed=42)
+        df = gen.kaplan_meier(n_subjects=2000, followup_days=365, event_rate=0.2)
+
+        assert (df.loc[df["event"] == 1, "followup_days"] <= 365).all()
+        assert (df.loc[df["event"] == 0, "followup_days"] == 365).all()
+
+
+class TestParametricSurvival:
+    """Tests for SurvivalGenerator.simulate"""
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            {"distribution": "exponential", "rate": 0.01},
+            {"distribution": "weibull", "scale": 100.0, "shape": 1.5},
+            {"distribution": "loglogistic", "scale": 100.0, "shape": 2.0},
+            {"distribution": "piecewise", "breaks": [0, 50], "rates": [0.02, 0.005]},
+        ],
+    )
+    def test_inverse_cumulative_hazard(self, spec):
+        """Inverse transform reproduces S(t) = exp(-H(t))"""
+        x = np.random.default_rng(0).standard_exponential(200_000)
+        t = inverse_cumulative_hazard(x, spec)
+        # H(t) en t = inverse(1) debe ser 1 => S = exp(-1)
+        t1 = inverse_cumulative_hazard(np.array([1.0]), spec)[0]
+
+        assert abs((t > t1).mean() - np.exp(-1)) < 0.01
+
+    def test_invalid_distribution(self):
+        """Unknown distributions raise ValueError"""
+        with pytest.raises(ValueError):
+            inverse_cumulative_hazard(np.ones(3), {"distribution": "gamma"})
+        with pytest.raises(ValueError):
+            inverse_cumulative_hazard(
+                np.ones(3), {"distribution": "piecewise", "breaks": [10, 5], "rates": [1, 1]}
+            )
+
+    def test_administrative_censoring(self):
+        """Observed time never exceeds the study end"""
+        df = SurvivalGenerator(seed=42).simulate(5000, accrual_days=365, followup_days=730)
+        study_end = pd.Timestamp("2020-01-01") + pd.Timedelta(days=365 + 730)
+
+        assert (df["exit_date"] <= study_end).all()
+        assert (df.loc[df["event"] == 0, "censor_reason"] != "").all()
+
+    def test_competing_risks(self):
+        """Status identifies the cause in order of definition"""
+        causes = {
+            "death": {"distribution": "exponential", "rate": 0.001},
+            "relapse": {"distribution": "exponential", "rate": 0.002},
+        }
+        df = SurvivalGenerator(seed=42).simulate(20000, causes=causes)
+        counts = df["cause"].value_counts()
+
+        assert set(df["status"]) == {0, 1, 2}
+        assert (df.loc[df["status"] == 1, "cause"] == "death").all()
+        # Hazards constantes: razon de causas = razon de tasas
+        assert 1.8 < counts["relapse"] / counts["death"] < 2.2
+
+    def test_hazard_ratio(self):
+        """Treatment B reduces the event rate"""
+        causes = {"event": {"distribution": "weibull", "scale": 1000.0, "shape": 1.0,
+                            "hr": {"treatment_B": 0.5}}}
+        df = SurvivalGenerator(seed=42).simulate(20000, causes=causes)
+        rates = df.groupby("treatment")["event"].mean()
+
+        assert rates["B"] < rates["A"]
+
+    def test_dropout(self):
+        """Dropout produces loss-to-follow-up censoring"""
+        df = SurvivalGenerator(seed=42).simulate(5000, dropout_rate=0.3)
+
+        assert (df["censor_reason"] == "dropout").sum() > 0
+
+    def test_chunks(self):
+        """Chunks have consecutive subject ids"""
+        gen = SurvivalGenerator(seed=42)
+        chunks = [c["survival"] for c in gen.iter_chunks(250, chunk_size=100)]
+
+        assert [len(c) for c in chunks] == [100, 100, 50]
+        ids = pd.concat(chunks)["subject_id"]
+        assert (ids.to_numpy() == np.arange(1, 251)).all()
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks, ignore_index=True), SurvivalGenerator(seed=42).simulate(250)
+        )
+
+    def test_size_independent(self):
+        """Subjects do not depend on n: smaller tables are prefixes"""
+        size = SurvivalGenerator.BLOCK_SIZE
+        km = SurvivalGenerator(seed=42).kaplan_meier(size + 10, followup_days=365, event_rate=0.2)
+        pd.testing.assert_frame_equal(
+            SurvivalGenerator(seed=42).kaplan_meier(100, followup_days=365, event_rate=0.2),
+            km.head(100),
+        )
+        pd.testing.assert_frame_equal(
+            SurvivalGenerator(seed=42).generate(size + 10, followup_days=365, event_rate=0.2), km
+        )
+        assert SurvivalGenerator(seed=42).random_access
+
+    def test_chunks_write(self, tmp_path):
+        """Chunks follow the table-dict protocol of the shared sinks"""
+        from app.storage import open_sink, write_chunks
+
+        chunks = SurvivalGenerator(seed=42).iter_chunks(250, chunk_size=100)
+        rows = write_chunks(chunks, open_sink("csv", tmp_path))
+
+        assert rows == {"survival": 250}
+        assert len(pd.read_csv(tmp_path / "survival.csv")) == 250
+
+    def test_generate_parametric(self):
+        """generate dispatches to simulate"""
+        df = SurvivalGenerator(seed=42).generate(100, model="parametric")
+
+        assert {"status", "cause", "entry_date"} <= set(df.columns)
+
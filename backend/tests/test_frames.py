@@ -0,0 +1,121 @@
+import pytest
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from app import arrow_io, registry
+from app.frames import active_backend, convert, is_polars, validate_backend
+from app.generators import CIE10Generator, DemographicsGenerator
+from app.main import app
+from app.patient_id import EncounterGenerator
+from app.surveillance import SurveillanceGenerator
+
+pl = pytest.importorskip("polars")
+
+NATIVE = [
+    (CIE10Generator, {"include_hierarchy": True}),
+    (DemographicsGenerator, {}),
+    (EncounterGenerator, {"include_procedures": True}),
+    (SurveillanceGenerator, {"diseases": ["J09", "A00"]}),
+]
+
+
+def _text(df):
+    """Polars frame with every column cast to text (dtype-independent comparison)"""
+    return df.select(pl.all().cast(pl.String))
+
+
+class TestPolarsBackend:
+    """Tests for polars frame backend"""
+
+    def test_generate_polars(self):
+        """backend='polars' returns the same data as pandas"""
+        df = DemographicsGenerator(seed=1).generate(1000)
+        out = DemographicsGenerator(seed=1).generate(1000, backend="polars")
+
+        assert is_polars(out)
+        assert out.schema["genero"] == pl.Categorical
+        pd.testing.assert_frame_equal(out.to_pandas().astype(str), df.astype(str))
+
+    @pytest.mark.parametrize("generator,kwargs", NATIVE)
+    def test_native_polars(self, generator, kwargs, monkeypatch):
+        """Generators named for the polars backend build frames from their buffers"""
+        df = generator(seed=4).generate(300, **kwargs)
+
+        def fail(*args, **kw):
+            raise AssertionError("pandas -> Arrow conversion used")
+
+        monkeypatch.setattr(arrow_io, "to_record_batch", fail)
+        out = generator(seed=4).generate(300, backend="polars", **kwargs)
+        monkeypatch.undo()
+
+        assert is_polars(out)
+        assert _text(out).equals(_text(convert(df, "polars")))
+        assert active_backend() == "pandas"
+
+    def test_native_types(self):
+        """Native frames keep codes as categoricals and dates as pl.Date"""
+        out = EncounterGenerator(seed=1).generate(200, backend="polars")
+
+        assert out.schema["encounter_date"] == pl.Date
+        assert out.schema["encounter_type"] == pl.Categorical
+        assert out["secondary_dx"].null_count() > 0
+        assert out["encounter_id"][0] == "ENC-00000001"
+
+    def test_errors_fall_back_to_pandas(self):
+        """CIE-10 error injection runs on pandas strings, then converts"""
+        errors = {"lowercase": 0.5}
+        df = CIE10Generator(seed=2).generate(200, error_types=errors)
+        out = CIE10Generator(seed=2).generate(200, error_types=errors, backend="polars")
+
+        assert _text(out).equals(_text(convert(df, "polars")))
+
+    def test_shares_numpy_buffers(self):
+        """Numeric columns are wrapped, not copied"""
+        df = DemographicsGenerator(seed=1).generate(1000)
+        out = convert(df, "polars")
+
+        assert np.shares_memory(out["edad"].to_numpy(), df["edad"].to_numpy())
+
+    def test_invalid_backend(self):
+        """Unknown backends raise ValueError"""
+        with pytest.raises(ValueError):
+            validate_backend("spark")
+        with pytest.raises(ValueError):
+            CIE10Generator(seed=1).generate(10, backend="spark")
+
+    @pytest.mark.parametrize("name", ["cie10", "demographics", "surveillance", "cohort"])
+    def test_csv_matches_pandas(self, name, tmp_path):
+        """Polars CSV writer produces the same data as pandas"""
+        _, rows = registry.run(name, n=300, seed=2, output=tmp_path / "pandas")
+        _, rows_pl = registry.run(name, n=300, seed=2, output=tmp_path / "polars", backend="polars")
+
+        assert rows == rows_pl
+        for table in rows:
+            pd.testing.assert_frame_equal(
+                pd.read_csv(tmp_path / "polars" / f"{table}.csv"),
+                pd.read_csv(tmp_path / "pandas" / f"{table}.csv"),
+            )
+
+    def test_parquet(self, tmp_path):
+        """Polars chunks write hive-partitioned Parquet with year partitions"""
+        pytest.importorskip("pyarrow")
+        registry.run("cohort", n=200, seed=1, output=tmp_path, format="parquet", backend="polars")
+
+        assert list((tmp_path / "encounters").glob("region=*/year=*/*.parquet"))
+        patients = pl.read_parquet(tmp_path / "patients", hive_partitioning=True)
+        assert patients.height == 200
+
+    def test_api_backend(self, tmp_path, monkeypatch):
+        """POST /generate accepts backend"""
+        monkeypatch.setattr(registry, "OUTPUT_DIR", tmp_path)
+        response = TestClient(app).post(
+            "/api/v1/generate",
+            json={"schema_name": "cie10", "rows": 100, "backend": "polars"},
+        )
+
+        assert response.status_code == 200
+        assert len(pd.read_csv(tmp_path / "cie10.csv")) == 100
+        response = TestClient(app).post(
+            "/api/v1/generate", json={"schema_name": "cie10", "rows": 100, "backend": "spark"}
+        )
+        assert response.status_code == 400
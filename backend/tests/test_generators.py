@@ -2,7 +2,11 @@ import pytest
 import pandas as pd
 import numpy as np
 from app.generators import CIE10Generator, DemographicsGenerator
-from app.base_generator import BaseGenerator
+from app.base_generator import BaseGenerator, CategoricalSampler, ColumnBuffer
+from app import cie10_catalog
+from app.cie10_catalog import load_catalog, chapter_of
+from app.comorbidity import ComorbidityGenerator
+from app.epidemic_generators import SurvivalGenerator
 
 
 class TestBaseGenerator:
@@ -31,6 +35,193 @@ class TestBaseGenerator:
         assert not df1["codigo"].equals(df2["codigo"])
 
 
+class TestCategoricalSampler:
+    """Tests for alias-method CategoricalSampler"""
+
+    def test_frequencies(self):
+        """Sampled frequencies should match probabilities"""
+        sampler = CategoricalSampler(
+            ["a", "b", "c", "d"], [0.55, 0.2, 0.1, 0.15], rng=np.random.default_rng(0)
+        )
+        codes = sampler.sample(200000)
+        assert codes.min() >= 0 and codes.max() <= 3
+        freq = np.bincount(codes, minlength=4) / len(codes)
+        np.testing.assert_allclose(freq, [0.55, 0.2, 0.1, 0.15], atol=0.005)
+
+    def test_unnormalized_weights(self):
+        """Weights are normalized; zero-weight categories never appear"""
+        sampler = CategoricalSampler(["x", "y", "z"], [3, 0, 1], rng=np.random.default_rng(0))
+        values = sampler.sample_values(10000)
+        assert "y" not in set(values)
+        np.testing.assert_allclose(sampler.p, [0.75, 0.0, 0.25])
+
+    def test_invalid_probabilities(self):
+        """Negative or mismatched weights should raise"""
+        with pytest.raises(ValueError):
+            CategoricalSampler(["a", "b"], [0.5, -0.5])
+        with pytest.raises(ValueError):
+            CategoricalSampler(["a", "b"], [1.0])
+
+    def test_cached_per_instance(self):
+        """Generators should reuse the sampler for the same distribution"""
+        gen = DemographicsGenerator(seed=42)
+        first = gen._sampler(["M", "F"], [0.5, 0.5])
+        assert gen._sampler(["M", "F"], [0.5, 0.5]) is first
+        assert gen._sampler(["M", "F"], [0.4, 0.6]) is not first
+        assert DemographicsGenerator(seed=42)._sampler(["M", "F"], [0.5, 0.5]) is not first
+
+
+class TestColumnBuffer:
+    """Tests for preallocated columnar buffers"""
+
+    def test_sample_into_buffer(self):
+        """Sampling into a compact buffer matches the default int64 draw"""
+        sampler = CategoricalSampler(["a", "b", "c"], [0.2, 0.5, 0.3])
+        codes = sampler.sample(1000, rng=np.random.default_rng(1))
+        out = np.empty(1000, dtype=np.int8)
+        result = sampler.sample(1000, rng=np.random.default_rng(1), out=out)
+
+        assert result is out
+        np.testing.assert_array_equal(out, codes)
+
+    def test_frame_shares_buffers(self):
+        """to_frame wraps buffers without copying; categoricals keep int8 codes"""
+        buf = ColumnBuffer(100)
+        buf.arange("id")
+        values = buf.alloc("x")
+        np.random.default_rng(0).random(out=values)
+        codes = buf.categorical("sex", CategoricalSampler(["M", "F"], rng=np.random.default_rng(0)))
+        df = buf.to_frame()
+
+        assert list(df.columns) == ["id", "x", "sex"]
+        assert np.shares_memory(df["x"].to_numpy(), values)
+        assert np.shares_memory(df["sex"].array.codes, codes)
+        assert codes.dtype == np.int8
+        assert set(df["sex"]) <= {"M", "F"}
+
+    def test_to_arrow(self):
+        """Arrow table keeps numeric buffers and dictionary-encodes categoricals"""
+        pa = pytest.importorskip("pyarrow")
+        buf = ColumnBuffer(10)
+        ids = buf.arange("id")
+        buf.categorical("region", CategoricalSampler(["R01", "R02"], rng=np.random.default_rng(0)))
+        table = buf.to_arrow()
+
+        assert pa.types.is_dictionary(table.schema.field("region").type)
+        assert np.shares_memory(table.column("id").chunk(0).to_numpy(), ids)
+        assert table.column("region").to_pylist() == list(buf.to_frame()["region"])
+
+    def test_put_checks_length(self):
+        """Columns must have exactly n rows"""
+        with pytest.raises(ValueError):
+            ColumnBuffer(5).put("x", np.zeros(4))
+
+
+class TestRandomAccess:
+    """Tests for block-addressable generation (generate_rows)"""
+
+    @pytest.mark.parametrize("cls", [DemographicsGenerator, CIE10Generator])
+    def test_ranges_compose(self, cls):
+        """Any split of a row range reproduces the same rows"""
+        size = cls.BLOCK_SIZE
+        full = cls(seed=42).generate_rows(size - 100, 2 * size + 50)
+        parts = pd.concat(
+            [
+                cls(seed=42).generate_rows(size - 100, size + 7),
+                cls(seed=42).generate_rows(size + 7, 2 * size + 50),
+            ],
+            ignore_index=True,
+        )
+
+        pd.testing.assert_frame_equal(full, parts)
+        assert full["id"].tolist() == list(range(size - 99, 2 * size + 51))
+
+    @pytest.mark.parametrize("cls", [DemographicsGenerator, CIE10Generator])
+    def test_generate_is_row_range(self, cls):
+        """generate(n) is the same table as generate_rows(0, n), across blocks"""
+        n = cls.BLOCK_SIZE + 10
+        pd.testing.assert_frame_equal(cls(seed=42).generate(n), cls(seed=42).generate_rows(0, n))
+        pd.testing.assert_frame_equal(
+            cls(seed=42).generate(5), cls(seed=42).generate_rows(0, 5)
+        )
+
+    @pytest.mark.parametrize(
+        "cls,kwargs",
+        [
+            (DemographicsGenerator, {}),
+            (CIE10Generator, {"error_types": {"spaces": 0.2, "lowercase": 0.2}}),
+            (ComorbidityGenerator, {}),
+            (SurvivalGenerator, {"model": "parametric"}),
+        ],
+    )
+    def test_prefix_stable(self, cls, kwargs):
+        """Blocks are generated only up to the requested row, with the same values"""
+        full = cls(seed=3).generate_rows(0, 3000, **kwargs)
+        pd.testing.assert_frame_equal(cls(seed=3).generate_rows(0, 7, **kwargs), full.head(7))
+
+    def test_small_generate_draws_only_needed_rows(self, monkeypatch):
+        """generate(n) does not build a whole BLOCK_SIZE block"""
+        sizes = []
+        block = DemographicsGenerator._generate_block
+
+        def spy(self, rng, start, n, **kwargs):
+            sizes.append(n)
+            return block(self, rng, start, n, **kwargs)
+
+        monkeypatch.setattr(DemographicsGenerator, "_generate_block", spy)
+        DemographicsGenerator(seed=1).generate(10)
+        assert sizes == [10]
+
+    def test_repeated_generate_same_table(self):
+        """generate() does not advance self.rng: repeated calls return the same table"""
+        gen = DemographicsGenerator(seed=5)
+        state = gen.rng.bit_generator.state
+
+        pd.testing.assert_frame_equal(gen.generate(100), gen.generate(100))
+        assert gen.rng.bit_generator.state == state
+
+    def test_generate_rows_polars(self):
+        """Blocks are sliced and concatenated in the active backend"""
+        pytest.importorskip("polars")
+        n = DemographicsGenerator.BLOCK_SIZE + 10
+        df = DemographicsGenerator(seed=42).generate(n, backend="polars")
+
+        assert len(df) == n
+        pd.testing.assert_frame_equal(
+            df.to_pandas()[["id", "edad"]], DemographicsGenerator(seed=42).generate(n)[["id", "edad"]]
+        )
+
+    def test_far_page(self):
+        """A page deep in the table only depends on its own block"""
+        gen = DemographicsGenerator(seed=42)
+        page = gen.generate_rows(5_000_000, 5_001_000)
+
+        assert len(page) == 1000
+        assert page["id"].iloc[0] == 5_000_001
+        pd.testing.assert_frame_equal(
+            page.iloc[10:20].reset_index(drop=True),
+            DemographicsGenerator(seed=42).generate_rows(5_000_010, 5_000_020),
+        )
+        assert not page.equals(DemographicsGenerator(seed=7).generate_rows(5_000_000, 5_001_000))
+
+    def test_kwargs_forwarded(self):
+        """generate() parameters apply per block"""
+        df = CIE10Generator(seed=1).generate_rows(0, 200, chapter=9, include_hierarchy=True)
+        assert (df["capitulo"] == 9).all()
+
+    def test_invalid(self):
+        """Bad ranges and generators without blocks raise ValueError"""
+        from app.study_designs import RCTGenerator
+
+        with pytest.raises(ValueError):
+            DemographicsGenerator(seed=1).generate_rows(10, 10)
+        with pytest.raises(ValueError):
+            DemographicsGenerator(seed=1).generate_rows(-1, 10)
+        assert not RCTGenerator(seed=1).random_access
+        with pytest.raises(ValueError):
+            RCTGenerator(seed=1).generate_rows(0, 10)
+
+
 class TestCIE10Generator:
     """Tests for CIE10Generator"""
 
@@ -125,3 +316,83 @@ class TestDemographicsGenerator:
         df = gen.generate(1000)
         valid_regions = {f"R{i:02d}" for i in range(1, 16)}
         assert set(df["region"].unique()).issubset(valid_regions)
+
+
+class TestCIE10Catalog:
+    """Tests for compiled CIE-10 catalog"""
+
+    def _write_catalog(self, tmp_path, lines):
+        path = tmp_path / "codes.txt"
+        path.write_text("# Titulo\n\n" + "\n".join(lines) + "\n", encoding="utf-8")
+        return path
+
+    def test_loads_data_file(self):
+        """Default catalog should read data/cie10_valid_codes.txt"""
+        catalog = load_catalog()
+        assert len(catalog) > 17
+        assert "I10" in set(catalog.codes)
+        assert "Muestra" not in " ".join(catalog.codes)
+
+    def test_chapters(self):
+        """Codes should map to their CIE-10 chapter"""
+        codes = np.array(["A00.0", "D50.9", "I10", "S06.0", "T78.4", "U07.1", "Z00.0"])
+        assert chapter_of(codes).tolist() == [1, 3, 9, 19, 19, 22, 21]
+
+    def test_weighted_sampling(self, tmp_path):
+        """Explicit weights should drive sampling frequencies"""
+        path = self._write_catalog(tmp_path, ["I10 70", "E11.9 20", "J44.9 10"])
+        catalog = load_catalog(path)
+        codes = catalog.sample_codes(np.random.default_rng(1), 100000)
+        freq = pd.Series(codes).value_counts(normalize=True)
+        assert abs(freq["I10"] - 0.7) < 0.01
+        assert abs(freq["J44.9"] - 0.1) < 0.01
+
+    def test_compiled_cache_is_memory_mapped(self, tmp_path):
+        """Second load should reuse the compiled .npy table"""
+        path = self._write_catalog(tmp_path, ["I10", "E11.9"])
+        load_catalog(path)
+        cached = list((tmp_path / ".cache").glob("codes.*.npy"))
+        assert len(cached) == 1
+
+        table = np.load(cached[0], mmap_mode="r")
+        assert isinstance(table, np.memmap)
+        assert table["cum_weight"][-1] == pytest.approx(table["weight"].sum())
+
+    def test_codes_are_not_copied(self, tmp_path):
+        """Catalog codes should be a view of the memory-mapped table"""
+        path = self._write_catalog(tmp_path, ["I10", "E11.9"])
+        load_catalog(path)
+        cie10_catalog._LOADED.clear()
+        catalog = load_catalog(path)
+
+        assert np.shares_memory(catalog.codes, catalog.table)
+        assert catalog.codes.tolist() == ["I10", "E11.9"]
+        assert catalog.blocks.tolist() == ["I10", "E11"]
+
+    def test_cache_validated_by_stat(self, tmp_path, monkeypatch):
+        """Source is re-hashed only when its size or mtime changes"""
+        path = self._write_catalog(tmp_path, ["I10", "E11.9"])
+        load_catalog(path)
+        cie10_catalog._LOADED.clear()
+
+        calls = []
+        sha256 = cie10_catalog.hashlib.sha256
+        monkeypatch.setattr(
+            cie10_catalog.hashlib, "sha256", lambda data: calls.append(1) or sha256(data)
+        )
+        load_catalog(path)
+        assert calls == []
+
+        cie10_catalog._LOADED.clear()
+        path.write_text("I10\nE11.9\nJ44.9\n", encoding="utf-8")
+        catalog = load_catalog(path)
+        assert calls == [1]
+        assert catalog.codes.tolist() == ["I10", "E11.9", "J44.9"]
+
+    def test_chapter_restriction(self):
+        """Sampling restricted to a chapter should only return its codes"""
+        gen = CIE10Generator(seed=42)
+        df = gen.generate(500, chapter=9, include_hierarchy=True)
+        assert (df["capitulo"] == 9).all()
+        assert df["codigo"].str.startswith("I").all()
+        assert (df["bloque"] == df["codigo"].str[:3]).all()
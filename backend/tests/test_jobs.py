@@ -0,0 +1,210 @@
+import json
+from datetime import date
+import pytest
+import pandas as pd
+from fastapi.testclient import TestClient
+from app import base_generator, jobs, registry
+from app.jobs import MANIFEST, GenerationJob
+from app.main import app
+
+
+def _run_interrupted(path, name, **kw):
+    """Run a job one chunk per process-like call, each with a fresh job object"""
+    calls = 0
+    while True:
+        rows = GenerationJob(name, path, **kw).run(max_chunks=1)
+        calls += 1
+        if json.loads((path / MANIFEST).read_text())["done"]:
+            return rows, calls
+
+
+def _set_today(monkeypatch, today):
+    """Fix date.today() for generators and jobs"""
+
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return today
+
+    monkeypatch.setattr(base_generator, "date", FixedDate)
+    monkeypatch.setattr(jobs, "date", FixedDate)
+
+
+class TestGenerationJob:
+    """Tests for resumable checkpointed generation"""
+
+    @pytest.mark.parametrize(
+        "name,chunk_rows",
+        [("cohort", 70), ("demographics", 300), ("rct", None)],
+    )
+    def test_resume_matches_full_run(self, name, chunk_rows, tmp_path):
+        """Interrupted jobs produce byte-identical output to uninterrupted ones"""
+        kw = dict(n=1000, seed=7, chunk_rows=chunk_rows)
+        rows = GenerationJob(name, tmp_path / "full", **kw).run()
+        resumed, calls = _run_interrupted(tmp_path / "resumed", name, **kw)
+
+        assert resumed == rows
+        if chunk_rows is not None:
+            assert calls > 2
+        for table in rows:
+            assert (tmp_path / "resumed" / f"{table}.csv").read_bytes() == (
+                tmp_path / "full" / f"{table}.csv"
+            ).read_bytes()
+        assert not (tmp_path / "resumed" / "parts").exists()
+
+    @pytest.mark.parametrize(
+        "name,chunk_rows", [("cohort", None), ("demographics", 100), ("comorbidity", 70)]
+    )
+    def test_matches_registry_run(self, name, chunk_rows, tmp_path):
+        """Jobs write the same tables as registry.run (default chunk size if sequential)"""
+        _, rows = registry.run(name, n=300, seed=3, output=tmp_path / "run")
+        job = GenerationJob(name, tmp_path / "job", n=300, seed=3, chunk_rows=chunk_rows)
+        job_rows = job.run()
+
+        assert job_rows == rows
+        for table in rows:
+            pd.testing.assert_frame_equal(
+                pd.read_csv(tmp_path / "job" / f"{table}.csv"),
+                pd.read_csv(tmp_path / "run" / f"{table}.csv"),
+            )
+
+    def test_resume_on_another_day(self, tmp_path, monkeypatch):
+        """Resuming later reuses the job's reference date, not the clock"""
+        kw = dict(n=200, seed=1, chunk_rows=50)
+        _set_today(monkeypatch, date(2026, 3, 1))
+        GenerationJob("cohort", tmp_path / "full", **kw).run()
+        GenerationJob("cohort", tmp_path / "resumed", **kw).run(max_chunks=1)
+
+        _set_today(monkeypatch, date(2027, 1, 15))
+        GenerationJob("cohort", tmp_path / "resumed", **kw).run()
+        for table in ("patients", "encounters"):
+            assert (tmp_path / "resumed" / f"{table}.csv").read_bytes() == (
+                tmp_path / "full" / f"{table}.csv"
+            ).read_bytes()
+        manifest = json.loads((tmp_path / "resumed" / MANIFEST).read_text())
+        assert manifest["params"]["reference_date"] == "2026-03-01"
+        # A new job on the later day differs: the date is part of the output
+        GenerationJob("cohort", tmp_path / "later", **kw).run()
+        assert (tmp_path / "later" / "patients.csv").read_bytes() != (
+            tmp_path / "full" / "patients.csv"
+        ).read_bytes()
+
+        with pytest.raises(ValueError):
+            GenerationJob("cohort", tmp_path / "resumed", reference_date="2027-01-15", **kw).run()
+
+    def test_polars_backend(self, tmp_path):
+        """backend="polars" is passed through and matches registry.run"""
+        pytest.importorskip("polars")
+        _, rows = registry.run("cie10", n=300, seed=3, output=tmp_path / "run", backend="polars")
+        job = GenerationJob(
+            "cie10", tmp_path / "job", n=300, seed=3, chunk_rows=128, backend="polars"
+        )
+
+        assert job.run() == rows
+        assert (tmp_path / "job" / "cie10.csv").read_bytes() == (
+            tmp_path / "run" / "cie10.csv"
+        ).read_bytes()
+        with pytest.raises(ValueError):
+            GenerationJob("cie10", backend="spark")
+
+    def test_cohort_columns(self, tmp_path):
+        """Resumed cohort jobs write patient_id like the cohort CLI"""
+        from app.cohort import CohortPipeline
+
+        kw = dict(n=300, seed=4, chunk_rows=100)
+        _run_interrupted(tmp_path / "job", "cohort", **kw)
+        CohortPipeline(seed=4, chunk_size=100).run(300, output=tmp_path / "cli")
+
+        for table in ("patients", "encounters", "diagnoses"):
+            job = pd.read_csv(tmp_path / "job" / f"{table}.csv")
+            cli = pd.read_csv(tmp_path / "cli" / f"{table}.csv")
+            assert job.columns.tolist() == cli.columns.tolist()
+        assert "patient_id" in pd.read_csv(tmp_path / "job" / "patients.csv").columns
+
+    def test_manifest(self, tmp_path):
+        """The manifest records completed chunks, parts and generator state"""
+        job = GenerationJob("cohort", tmp_path, n=200, seed=1, chunk_rows=50)
+        job.run(max_chunks=2)
+        manifest = json.loads((tmp_path / MANIFEST).read_text())
+
+        assert manifest["completed"] == [0, 1]
+        assert manifest["params"]["chunks"] == 4
+        assert manifest["parts"]["patients"] == [
+            "parts/patients/part-00000.csv", "parts/patients/part-00001.csv"
+        ]
+        assert manifest["rows"]["patients"] == 100
+        assert manifest["state"] is not None
+        assert not manifest["done"]
+
+        random_access = GenerationJob("demographics", tmp_path / "ra", n=100, seed=1)
+        random_access.run()
+        manifest = json.loads((tmp_path / "ra" / MANIFEST).read_text())
+        assert manifest["rng"]["bit_generator"] == "Philox"
+        assert manifest["done"]
+
+    def test_leftover_tmp_parts_are_overwritten(self, tmp_path):
+        """Parts left half-written by a crash are regenerated"""
+        kw = dict(n=200, seed=1, chunk_rows=50)
+        GenerationJob("cohort", tmp_path / "full", **kw).run()
+        GenerationJob("cohort", tmp_path / "crash", **kw).run(max_chunks=1)
+        leftover = tmp_path / "crash" / "parts" / "patients" / "part-00001.csv.tmp"
+        leftover.write_text("garbage\n")
+
+        GenerationJob("cohort", tmp_path / "crash", **kw).run()
+        assert (tmp_path / "crash" / "patients.csv").read_bytes() == (
+            tmp_path / "full" / "patients.csv"
+        ).read_bytes()
+
+    def test_manifest_mismatch(self, tmp_path):
+        """Resuming with different parameters raises ValueError"""
+        GenerationJob("cohort", tmp_path, n=200, seed=1, chunk_rows=50).run(max_chunks=1)
+
+        with pytest.raises(ValueError):
+            GenerationJob("cohort", tmp_path, n=200, seed=2, chunk_rows=50).run()
+
+    def test_invalid_format(self):
+        """Only csv and parquet are resumable"""
+        with pytest.raises(ValueError):
+            GenerationJob("cohort", format="sqlite")
+
+    def test_parquet_resume(self, tmp_path):
+        """Parquet jobs resume into the same dataset"""
+        pytest.importorskip("pyarrow")
+        kw = dict(n=300, seed=5, format="parquet", chunk_rows=100)
+        rows = GenerationJob("cohort", tmp_path / "full", **kw).run()
+        resumed, _ = _run_interrupted(tmp_path / "resumed", "cohort", **kw)
+
+        assert resumed == rows
+        for table in rows:
+            full = sorted((tmp_path / "full" / table).glob("*.parquet"))
+            parts = sorted((tmp_path / "resumed" / table).glob("*.parquet"))
+            assert [p.read_bytes() for p in parts] == [p.read_bytes() for p in full]
+
+    def test_api_resumable(self, tmp_path, monkeypatch):
+        """POST /generate with resumable writes into the job directory"""
+        monkeypatch.setattr(registry, "OUTPUT_DIR", tmp_path)
+        response = TestClient(app).post(
+            "/api/v1/generate",
+            json={"schema_name": "rct", "rows": 100, "seed": 1, "resumable": True},
+        )
+
+        assert response.status_code == 200
+        job_dir = tmp_path / "jobs" / "rct_100_1"
+        assert len(pd.read_csv(job_dir / "rct.csv")) == 100
+        assert json.loads((job_dir / MANIFEST).read_text())["done"]
+
+    def test_api_resumable_backend(self, tmp_path, monkeypatch):
+        """The requested backend reaches the job"""
+        pytest.importorskip("polars")
+        monkeypatch.setattr(registry, "OUTPUT_DIR", tmp_path)
+        response = TestClient(app).post(
+            "/api/v1/generate",
+            json={
+                "schema_name": "demographics", "rows": 100, "seed": 1,
+                "resumable": True, "backend": "polars",
+            },
+        )
+
+        assert response.status_code == 200
+        manifest = json.loads((tmp_path / "jobs" / "demographics_100_1" / MANIFEST).read_text())
+        assert manifest["params"]["backend"] == "polars"
@@ -1,7 +1,12 @@
 import pytest
 import pandas as pd
 import numpy as np
-from app.patient_id import PatientIDGenerator, EncounterGenerator, LaboratoryGenerator
+from app.patient_id import (
+    PatientIDGenerator,
+    EncounterGenerator,
+    LaboratoryGenerator,
+    DatasetLinker,
+)
 
 
 class TestPatientIDGenerator:
@@ -104,6 +109,90 @@ class TestPatientIDGenerator:
         assert len(registry) == 50
 
 
+class TestPatientKeys:
+    """Tests for integer surrogate keys and lazy ID rendering"""
+
+    def test_cohort_has_patient_key(self):
+        """Cohorts carry consecutive int64 patient_key values"""
+        gen = PatientIDGenerator(seed=42)
+        first = gen.generate_cohort(n=10)
+        second = gen.generate_cohort(n=5, render_ids=False)
+
+        assert first["patient_key"].dtype == np.int64
+        assert first["patient_key"].tolist() == list(range(10))
+        assert second["patient_key"].tolist() == list(range(10, 15))
+
+    def test_lazy_cohort_has_no_strings(self):
+        """render_ids=False skips patient_id, uuid and the registry"""
+        gen = PatientIDGenerator(seed=42)
+        df = gen.generate_cohort(n=1000, age_range=(30, 50), render_ids=False)
+
+        assert "patient_id" not in df.columns
+        assert len(gen.get_registry()) == 0
+        assert df["age"].between(29, 51).all()
+        assert pd.api.types.is_datetime64_any_dtype(df["birth_date"])
+
+    def test_render_patient_ids(self):
+        """Rendered IDs follow the SHDB format and are unique"""
+        gen = PatientIDGenerator(seed=42)
+        df = gen.generate_cohort(n=5000, render_ids=False)
+        ids = gen.render_patient_ids(df)
+
+        assert len(set(ids)) == 5000
+        assert pd.Series(ids).str.match(r"^SHDB-\d{4}-[MF]-\d{2}-[0-9A-F]{6}$").all()
+        first = df.iloc[0]
+        assert ids[0].startswith(f"SHDB-{first['birth_date'].year}-{first['sex']}-{first['region']}-")
+
+    def test_render_matches_legacy_path(self):
+        """Both cohort paths give the same patient the same patient_id"""
+        legacy = PatientIDGenerator(seed=7).generate_cohort(n=300)
+        gen = PatientIDGenerator(seed=7)
+        keyed = gen.generate_cohort(n=300, render_ids=False)
+
+        assert (legacy["patient_key"] == keyed["patient_key"]).all()
+        assert (legacy["patient_id"].to_numpy() == gen.render_patient_ids(keyed)).all()
+
+    def test_hash_key_limit(self):
+        """Keys beyond the 24-bit hash space are rejected instead of colliding"""
+        from app.patient_id import MAX_PATIENT_KEYS
+
+        gen = PatientIDGenerator(seed=1)
+        hashes = gen._hash_keys(np.arange(MAX_PATIENT_KEYS - 1000, MAX_PATIENT_KEYS))
+        assert len(set(hashes)) == 1000
+        with pytest.raises(ValueError):
+            gen._hash_keys(np.array([MAX_PATIENT_KEYS]))
+        gen._counter = MAX_PATIENT_KEYS - 5
+        with pytest.raises(ValueError):
+            gen.generate_cohort(n=10, render_ids=False)
+
+    def test_attach_patient_ids(self):
+        """Fact tables get categorical patient_id from patient_key at export"""
+        gen = PatientIDGenerator(seed=42)
+        cohort = gen.generate_cohort(n=20, render_ids=False)
+        labs = LaboratoryGenerator(seed=42).generate_labs(
+            None, n_results=50, patient_keys=cohort["patient_key"]
+        )
+        assert "patient_id" not in labs.columns
+
+        exported = gen.attach_patient_ids(labs, cohort)
+        assert isinstance(exported["patient_id"].dtype, pd.CategoricalDtype)
+        expected = dict(zip(cohort["patient_key"], gen.render_patient_ids(cohort)))
+        assert (exported["patient_id"].astype(str) == exported["patient_key"].map(expected)).all()
+
+    def test_encounters_with_patient_keys(self):
+        """Encounters sampled from keys link back to the cohort"""
+        gen = PatientIDGenerator(seed=42)
+        cohort = gen.generate_cohort(n=30, render_ids=False)
+        enc = EncounterGenerator(seed=42).generate_encounters(
+            None, n_encounters=200, patient_keys=cohort["patient_key"]
+        )
+
+        assert enc["patient_key"].dtype == np.int64
+        assert enc["patient_key"].isin(cohort["patient_key"]).all()
+        wide = gen.link_datasets([cohort, enc], key="patient_key")
+        assert wide["n_t2"].sum() == 200
+
+
 class TestEncounterGenerator:
     """Tests for EncounterGenerator"""
 
@@ -186,6 +275,15 @@ class TestLaboratoryGenerator:
             else:
                 assert row["low_normal"] <= row["value"] <= row["high_normal"]
 
+    def test_reference_date(self):
+        """Test dates count back from the reference date, not the clock"""
+        gen = LaboratoryGenerator(seed=42)
+        gen.set_reference_date("2020-06-30")
+        df = gen.generate_labs([f"PAT-{i:06d}" for i in range(10)], n_results=500)
+
+        assert df["test_date"].max() <= "2020-06-30"
+        assert df["test_date"].min() >= "2017-07-01"
+
     def test_reproducibility(self):
         """Same seed should produce identical results"""
         gen1 = LaboratoryGenerator(seed=42)
@@ -196,3 +294,98 @@ class TestLaboratoryGenerator:
         df2 = gen2.generate_labs(patient_ids, n_results=50)
 
         pd.testing.assert_frame_equal(df1, df2)
+
+
+class TestDatasetLinker:
+    """Tests for star-schema linkage"""
+
+    def _tables(self):
+        patients = pd.DataFrame({"patient_id": ["P1", "P2", "P3"], "age": [30, 40, 50]})
+        encounters = pd.DataFrame(
+            {"patient_id": ["P1", "P1", "P2", "P4"], "cost": [10.0, 20.0, 5.0, 1.0]}
+        )
+        labs = pd.DataFrame({"patient_id": ["P1", "P2", "P2"], "value": [1.0, 2.0, 4.0]})
+        return patients, encounters, labs
+
+    def test_wide_no_cartesian_product(self):
+        """1:N tables are summarized, not cross-multiplied"""
+        patients, encounters, labs = self._tables()
+        gen = PatientIDGenerator(seed=42)
+        wide = gen.link_datasets({"pat": patients, "enc": encounters, "lab": labs})
+
+        assert len(wide) == 4  # P1-P3 + P4 only in encounters
+        assert wide["patient_id"].tolist() == ["P1", "P2", "P3", "P4"]
+        assert wide["n_enc"].tolist() == [2, 1, 0, 1]
+        assert wide["n_lab"].tolist() == [1, 2, 0, 0]
+        assert wide["enc_cost_mean"].tolist()[:2] == [15.0, 5.0]
+        assert wide["lab_value_mean"][1] == 3.0
+        assert np.isnan(wide["age"][3])
+
+    def test_wide_one_to_one_columns(self):
+        """Unique-key tables contribute their columns by position"""
+        patients, _, _ = self._tables()
+        extra = pd.DataFrame({"patient_id": ["P3", "P1"], "age": [51, 31], "bmi": [25.0, 22.0]})
+        wide = PatientIDGenerator(seed=42).link_datasets([patients, extra])
+
+        assert len(wide) == 3
+        assert wide["bmi"].tolist()[0] == 22.0
+        assert np.isnan(wide["bmi"][1])
+        assert wide["t2_age"].tolist()[2] == 51
+
+    def test_normalized_consistent_keys(self):
+        """Normalized tables share integer patient_key values"""
+        patients, encounters, labs = self._tables()
+        tables = PatientIDGenerator(seed=42).link_datasets(
+            {"pat": patients, "enc": encounters, "lab": labs}, how="normalized"
+        )
+
+        keys = tables["patient_keys"]
+        assert keys["patient_key"].dtype == np.int64
+        for name in ("pat", "enc", "lab"):
+            mapped = keys["patient_id"].to_numpy()[tables[name]["patient_key"]]
+            assert (mapped == tables[name]["patient_id"].to_numpy()).all()
+
+    def test_missing_key_column(self):
+        """Tables without the key column should raise"""
+        with pytest.raises(ValueError):
+            DatasetLinker([pd.DataFrame({"x": [1]})])
+
+
+class TestAddEncounters:
+    """Tests for vectorized per-patient encounter expansion"""
+
+    def test_sequence_numbers_per_patient(self):
+        """Encounter numbers restart at 1 for each patient"""
+        gen = PatientIDGenerator(seed=42)
+        df = gen.generate_cohort(n=200, with_encounters=True, encounters_per_patient=(1, 6))
+
+        seq = df["encounter_id"].str[-4:].astype(int)
+        expected = df.groupby("patient_key").cumcount() + 1
+        assert (seq == expected).all()
+        assert df["encounter_id"].is_unique
+
+    def test_encounter_id_uses_patient_hash(self):
+        """Encounter IDs embed the patient hash suffix"""
+        gen = PatientIDGenerator(seed=42)
+        df = gen.generate_cohort(n=50, with_encounters=True)
+
+        assert (df["encounter_id"].str[4:10] == df["patient_id"].str[-6:]).all()
+
+    def test_patients_without_encounters_kept(self):
+        """Patients with 0 encounters keep one row, like a left join"""
+        gen = PatientIDGenerator(seed=42)
+        df = gen.generate_cohort(n=300, with_encounters=True, encounters_per_patient=(0, 2))
+
+        assert df["patient_key"].nunique() == 300
+        empty = df["encounter_id"].isna()
+        assert empty.any()
+        assert (df[empty].groupby("patient_key").size() == 1).all()
+        assert df.loc[empty, "encounter_date"].isna().all()
+
+    def test_lazy_cohort_encounters(self):
+        """Encounters also work on cohorts without rendered patient_id"""
+        gen = PatientIDGenerator(seed=42)
+        df = gen.generate_cohort(n=100, with_encounters=True, render_ids=False)
+
+        assert "patient_id" not in df.columns
+        assert df["encounter_id"].str.match(r"^ENC-[0-9A-F]{6}-\d{4}$").all()
@@ -0,0 +1,86 @@
+import time
+from fastapi.testclient import TestClient
+from app import profiling
+from app.generators import DemographicsGenerator
+from app.main import app
+from app.profiling import METRICS, profile, span
+
+
+class TestProfiler:
+    """Tests for spans, profiles and Prometheus metrics"""
+
+    def test_span_noop_without_profile(self):
+        """Spans outside a profile record nothing"""
+        assert profiling.active_profiler() is None
+        with span("idle"):
+            pass
+
+    def test_nested_spans(self):
+        """Nested spans accumulate time and memory in both stages"""
+        with profile() as prof:
+            with span("outer"):
+                with span("inner"):
+                    data = bytearray(4 * 2**20)
+                    time.sleep(0.01)
+                del data
+
+        report = prof.report()
+        assert report["outer"]["seconds"] >= report["inner"]["seconds"] >= 0.01
+        assert report["inner"]["alloc_bytes"] >= 4 * 2**20
+        assert report["outer"]["peak_bytes"] >= 4 * 2**20
+        assert report["outer"]["alloc_bytes"] < 2**20
+
+    def test_generate_profile_flag(self):
+        """generate(profile=True) stores stage timings on the generator"""
+        gen = DemographicsGenerator(seed=1)
+        df = gen.generate(1000, profile=True)
+
+        assert len(df) == 1000
+        assert {"DemographicsGenerator.generate", "dataframe", "rng.alias"} <= set(
+            gen.last_profile.report()
+        )
+        assert "etapa" in gen.last_profile.summary()
+
+    def test_generate_metrics(self):
+        """Every generate() call is counted without profiling"""
+        METRICS.reset()
+        DemographicsGenerator(seed=1).generate(250)
+        DemographicsGenerator(seed=2).generate(250)
+
+        calls, rows, seconds = METRICS.generate["DemographicsGenerator"]
+        assert (calls, rows) == (2, 500)
+        assert 'shdb_generate_rows_total{generator="DemographicsGenerator"} 500' in METRICS.render()
+
+    def test_profile_without_tracemalloc(self):
+        """trace_memory=False only records time"""
+        with profile(trace_memory=False) as prof:
+            with span("stage"):
+                bytearray(2**20)
+
+        assert prof.report()["stage"]["alloc_bytes"] == 0
+        assert prof.top_allocations() == []
+
+
+class TestMetricsEndpoint:
+    """Tests for /metrics and API profiling"""
+
+    def test_metrics_endpoint(self):
+        """/metrics serves Prometheus text format"""
+        DemographicsGenerator(seed=1).generate(10)
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE shdb_generate_calls_total counter" in response.text
+
+    def test_generate_with_profile(self, tmp_path, monkeypatch):
+        """profile=true returns per-stage timings"""
+        from app import registry
+
+        monkeypatch.setattr(registry, "OUTPUT_DIR", tmp_path)
+        response = TestClient(app).post(
+            "/api/v1/generate", json={"schema_name": "demographics", "rows": 100, "profile": True}
+        )
+
+        assert response.status_code == 200
+        assert "write.CSVSink" in response.json()["profile"]
@@ -0,0 +1,56 @@
+import pytest
+import pandas as pd
+from app.r_bridge import RBridge, RBridgeError, RGenerator, find_rscript
+
+requires_r = pytest.mark.skipif(find_rscript() is None, reason="Rscript no disponible")
+
+
+class TestRBridgeWithoutR:
+    """Tests that run without an R installation"""
+
+    def test_missing_rscript(self, monkeypatch):
+        """Missing Rscript raises RBridgeError"""
+        monkeypatch.setenv("PATH", "")
+        bridge = RBridge(rscript="/nonexistent/Rscript")
+        with pytest.raises(RBridgeError):
+            bridge.start()
+
+    def test_unknown_generator(self):
+        """Unknown R generator raises ValueError"""
+        with pytest.raises(ValueError):
+            RGenerator("unknown")
+
+
+@requires_r
+class TestRBridge:
+    """Tests against a live Rscript worker"""
+
+    def test_cie10(self):
+        """cie10.R returns a data.frame through Arrow IPC"""
+        with RBridge() as bridge:
+            df = bridge.generate("cie10", 100, seed=42)
+
+        assert len(df) == 100
+        assert list(df.columns) == ["id", "codigo"]
+
+    def test_worker_reused(self):
+        """Multiple calls share one worker process"""
+        with RBridge() as bridge:
+            pid = bridge._process.pid
+            bridge.generate("cie10", 10)
+            bridge.generate("comorbid", 10)
+            assert bridge._process.pid == pid
+
+    def test_reproducible(self):
+        """Same seed yields same data"""
+        with RBridge() as bridge:
+            a = bridge.generate("cie10", 50, seed=1)
+            b = bridge.generate("cie10", 50, seed=1)
+
+        pd.testing.assert_frame_equal(a, b)
+
+    def test_r_error(self):
+        """Errors inside R are raised as RBridgeError"""
+        with RBridge() as bridge:
+            with pytest.raises(RBridgeError):
+                bridge.call("generators/cie10.R", "no_such_function")
@@ -0,0 +1,183 @@
+import pytest
+import pandas as pd
+from fastapi.testclient import TestClient
+from app import registry
+from app.main import app
+from app.registry import REGISTRY, GeneratorSpec, get_spec, load_schema, parse_schema
+
+
+class TestRegistry:
+    """Tests for generator registry and schema loading"""
+
+    @pytest.mark.parametrize("name", sorted(REGISTRY))
+    def test_every_spec_generates(self, name):
+        """Every registered generator runs with its schema parameters"""
+        spec = get_spec(name)
+        config = load_schema(name)
+        n = 20_000 if name == "case_control" else 50
+        chunks = list(spec.iter_chunks(config, n=n if not spec.size_param else 30, seed=1))
+
+        assert chunks
+        for tables in chunks:
+            for df in tables.values():
+                assert isinstance(df, pd.DataFrame)
+
+    def test_schema_in_subdirectory(self):
+        """Schemas are found under schemas/<category>/"""
+        config = load_schema("epidemic_seir")
+
+        assert config.parameters["latent_period"] == 5
+
+    def test_parameters_mapped(self):
+        """Schema parameters are renamed to generate() kwargs"""
+        kwargs = get_spec("survival_cohort").kwargs(load_schema("survival_cohort"))
+
+        assert kwargs == {"model": "kaplan_meier", "followup_days": 1095, "event_rate": 0.15}
+
+    def test_defaults_format(self):
+        """fields/defaults schemas map rows and seed"""
+        config = parse_schema(
+            {"name": "x", "description": "", "fields": [], "defaults": {"rows": 10, "seed": 3, "days": 7}}
+        )
+
+        assert (config.n_rows, config.seed, config.parameters) == (10, 3, {"days": 7})
+        assert get_spec("surveillance").size(load_schema("surveillance")) == 365
+
+    def test_unknown(self):
+        """Unknown schema or generator raises"""
+        with pytest.raises(FileNotFoundError):
+            load_schema("nonexistent_schema_xyz")
+        with pytest.raises(ValueError):
+            get_spec("encounters")
+        with pytest.raises(ValueError):
+            registry.register(GeneratorSpec("bad", dict))
+
+    def test_run_csv(self, tmp_path):
+        """run() writes one CSV per table"""
+        path, rows = registry.run("rct", n=40, output=tmp_path)
+
+        assert rows == {"rct": 40}
+        assert len(pd.read_csv(path / "rct.csv")) == 40
+
+    def test_run_chunked(self, tmp_path):
+        """Chunked generators stream every table"""
+        _, rows = registry.run("cohort", n=100, output=tmp_path)
+
+        assert rows["patients"] == 100
+        assert (tmp_path / "encounters.csv").exists()
+
+    def test_cohort_patient_ids(self, tmp_path):
+        """The registry path writes the same patients columns as the cohort CLI"""
+        from app.cohort import CohortPipeline
+
+        registry.run("cohort", n=50, seed=2, output=tmp_path / "run")
+        CohortPipeline(seed=2).run(50, output=tmp_path / "cli")
+        patients = pd.read_csv(tmp_path / "run" / "patients.csv")
+
+        assert patients.columns[:2].tolist() == ["patient_key", "patient_id"]
+        assert patients["patient_id"].is_unique
+        assert (tmp_path / "run" / "patients.csv").read_bytes() == (
+            tmp_path / "cli" / "patients.csv"
+        ).read_bytes()
+
+    def test_run_high_dimensional_streams(self, tmp_path):
+        """high_dimensional streams chunk_size blocks instead of one wide frame"""
+        spec = get_spec("high_dimensional")
+        config = load_schema("high_dimensional")
+        config.parameters["chunk_size"] = 400
+        chunks = list(spec.iter_chunks(config, n=1000, seed=1))
+
+        assert spec.chunked
+        assert [len(c["observations"]) for c in chunks] == [400, 400, 200]
+        assert chunks[0]["indicators"].shape[1] == 3
+
+        _, rows = registry.run("high_dimensional", n=1000, seed=1, output=tmp_path, config=config)
+        assert rows["observations"] == 1000
+        assert rows["indicators"] == sum(len(c["indicators"]) for c in chunks)
+        assert len(pd.read_csv(tmp_path / "observations.csv").columns) == 52
+
+
+class TestGenerateEndpoint:
+    """Tests for /generate dispatch through the registry"""
+
+    def test_generate_epidemic(self, tmp_path, monkeypatch):
+        """Previously unreachable schemas now generate"""
+        monkeypatch.setattr(registry, "OUTPUT_DIR", tmp_path)
+        response = TestClient(app).post(
+            "/api/v1/generate", json={"schema_name": "epidemic_sir", "rows": 30}
+        )
+
+        assert response.status_code == 200
+        assert len(pd.read_csv(tmp_path / "epidemic_sir.csv")) == 30
+
+    def test_schema_without_generator(self):
+        """Existing schema without generator returns 400"""
+        response = TestClient(app).post(
+            "/api/v1/generate", json={"schema_name": "encounters", "rows": 10}
+        )
+
+        assert response.status_code == 400
+
+
+class TestPreviewEndpoint:
+    """Tests for /preview pagination"""
+
+    def test_random_access_page(self, tmp_path, monkeypatch):
+        """Pages come from block generation and nothing is written"""
+        monkeypatch.setattr(registry, "OUTPUT_DIR", tmp_path)
+        client = TestClient(app)
+        response = client.get(
+            "/api/v1/preview/demographics",
+            params={"page": 50_001, "page_size": 100, "rows": 10**9, "seed": 42},
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["random_access"] and body["total_rows"] == 10**9
+        assert body["rows"][0]["id"] == 5_000_001 and len(body["rows"]) == 100
+        assert body["stats"]["edad"]["count"] == 100
+        assert set(body["stats"]["genero"]["top"]) <= {"M", "F"}
+        assert not list(tmp_path.iterdir())
+
+        # Misma fila absoluta con otro tamano de pagina y de tabla
+        other = client.get(
+            "/api/v1/preview/demographics",
+            params={"page": 5_001, "page_size": 1000, "rows": 10**7, "seed": 42},
+        ).json()
+        assert other["rows"][0] == body["rows"][0]
+
+    @pytest.mark.parametrize(
+        "name,id_col", [("survival_cohort", "subject_id"), ("comorbidity", "id")]
+    )
+    def test_block_generators(self, name, id_col):
+        """Survival and comorbidity pages do not generate the whole table"""
+        client = TestClient(app)
+        params = {"page": 1_001, "page_size": 50, "seed": 3}
+        body = client.get(f"/api/v1/preview/{name}", params={**params, "rows": 10**9}).json()
+        small = client.get(f"/api/v1/preview/{name}", params={**params, "rows": 60_000}).json()
+
+        assert body["random_access"] and body["total_rows"] == 10**9
+        assert body["rows"][0][id_col] == 50_001
+        assert small["rows"] == body["rows"]
+
+    def test_fallback_and_last_page(self):
+        """Generators without random access are sliced in memory"""
+        body = TestClient(app).get(
+            "/api/v1/preview/rct", params={"rows": 25, "page": 3, "page_size": 10}
+        ).json()
+
+        assert not body["random_access"]
+        assert body["pages"] == 3
+        assert [row["subject_id"] for row in body["rows"]] == [
+            f"RCT-{i:06d}" for i in range(21, 26)
+        ]
+
+    def test_errors(self):
+        """Out-of-range pages, multi-table and oversized fallbacks are rejected"""
+        client = TestClient(app)
+
+        assert client.get("/api/v1/preview/demographics", params={"page": 10**6}).status_code == 404
+        assert client.get("/api/v1/preview/cohort").status_code == 400
+        assert client.get("/api/v1/preview/rct", params={"rows": 10**7}).status_code == 400
+        assert client.get("/api/v1/preview/cie10", params={"page_size": 10**5}).status_code == 422
+        assert client.get("/api/v1/preview/nope").status_code == 404
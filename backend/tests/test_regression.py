@@ -1,6 +1,7 @@
 import pytest
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from app.regression_generator import RegressionGenerator
 
 
@@ -117,3 +118,211 @@ class TestRegressionGenerator:
 
         treatment_a_pct = (df["treatment"] == "A").mean()
         assert 0.45 < treatment_a_pct < 0.55
+
+    def test_cox_valid_time_event_pairs(self):
+        """Events only before administrative censoring; censored is 0/1"""
+        gen = RegressionGenerator(seed=42)
+        df = gen._cox_ph(
+            n=10000, hazard_ratios={}, baseline_hazard=0.01, censoring_rate=0.3
+        )
+
+        assert set(df["censored"].unique()).issubset({0, 1})
+        assert (df["event"] + df["censored"] == 1).all()
+        assert (df["followup_days"] > 0).all()
+        assert df["followup_days"].max() <= 1825
+
+    def test_cox_hazard_ratio_recovered(self):
+        """Exponential baseline: event rate ratio should match exp(beta)"""
+        gen = RegressionGenerator(seed=42)
+        x = (np.arange(200000) % 2).astype(float)
+        time, event = gen.simulate_cox(
+            x, [np.log(2.0)], baseline="exponential", scale=0.01, max_followup=100.0
+        )
+
+        rate_1 = event[x == 1].sum() / time[x == 1].sum()
+        rate_0 = event[x == 0].sum() / time[x == 0].sum()
+        assert rate_1 / rate_0 == pytest.approx(2.0, rel=0.05)
+        assert rate_0 == pytest.approx(0.01, rel=0.05)
+
+    @pytest.mark.parametrize(
+        "baseline,shape,expected_median",
+        [
+            ("weibull", 1.5, (np.log(2) / 0.01) ** (1 / 1.5)),
+            ("gompertz", 0.05, np.log1p(0.05 * np.log(2) / 0.01) / 0.05),
+        ],
+    )
+    def test_cox_baseline_inversion(self, baseline, shape, expected_median):
+        """Uncensored median should match the inverted baseline hazard"""
+        gen = RegressionGenerator(seed=42)
+        time, event = gen.simulate_cox(
+            np.zeros((100000, 1)), [0.0], baseline=baseline, scale=0.01, shape=shape
+        )
+
+        assert event.all()
+        assert np.median(time) == pytest.approx(expected_median, rel=0.03)
+
+    def test_cox_invalid_baseline(self):
+        """Unknown baseline hazard should raise"""
+        gen = RegressionGenerator(seed=42)
+        with pytest.raises(ValueError):
+            gen.simulate_cox(np.zeros((10, 1)), [0.0], baseline="lognormal")
+
+    def test_design_matrix_shape_and_sparsity(self):
+        """Sparse block should be binary with the requested mean density"""
+        gen = RegressionGenerator(seed=42)
+        X, y, beta = gen.generate_design_matrix(
+            n=20000, n_dense=5, n_sparse=500, density=0.01, chunk_size=3000
+        )
+
+        assert sparse.isspmatrix_csr(X)
+        assert X.shape == (20000, 505)
+        assert len(y) == 20000
+        assert len(beta) == 505
+        indicators = X[:, 5:]
+        assert set(np.unique(indicators.data)) == {1.0}
+        assert indicators.nnz / (20000 * 500) == pytest.approx(0.01, rel=0.1)
+
+    def test_design_matrix_dense_correlation(self):
+        """Neighbouring dense columns should follow AR(1) correlation"""
+        gen = RegressionGenerator(seed=42)
+        X, _, _ = gen.generate_design_matrix(
+            n=50000, n_dense=3, n_sparse=0, rho=0.6
+        )
+
+        dense = X.toarray()
+        assert np.corrcoef(dense[:, 0], dense[:, 1])[0, 1] == pytest.approx(0.6, abs=0.02)
+        assert np.corrcoef(dense[:, 0], dense[:, 2])[0, 1] == pytest.approx(0.36, abs=0.02)
+
+    def test_design_matrix_coefficients_recovered(self):
+        """OLS on the generated design should recover the true coefficients"""
+        gen = RegressionGenerator(seed=42)
+        coeffs = np.array([1.0, -0.5, 0.0, 2.0, 0.8])
+        X, y, beta = gen.generate_design_matrix(
+            n=50000, n_dense=2, n_sparse=3, density=0.2, coeffs=coeffs, noise=0.1
+        )
+
+        estimate = np.linalg.lstsq(X.toarray(), y, rcond=None)[0]
+        np.testing.assert_allclose(beta, coeffs)
+        np.testing.assert_allclose(estimate, coeffs, atol=0.01)
+
+    def test_design_chunks_dense_output(self):
+        """Chunks should respect chunk_size and optionally be dense arrays"""
+        gen = RegressionGenerator(seed=42)
+        chunks = list(
+            gen.iter_design_chunks(
+                n=2500, n_dense=2, n_sparse=10, chunk_size=1000, sparse_output=False
+            )
+        )
+
+        assert [c[0].shape[0] for c in chunks] == [1000, 1000, 500]
+        assert isinstance(chunks[0][0], np.ndarray)
+
+    def test_high_dimensional_model(self):
+        """generate() should return dense covariates and long-format indicators"""
+        gen = RegressionGenerator(seed=42)
+        tables = gen.generate(
+            200, model="high_dimensional", n_dense=3, n_sparse=20, density=0.1, family="binomial"
+        )
+        observations, indicators = tables["observations"], tables["indicators"]
+
+        assert list(observations.columns) == ["obs_id", "x1", "x2", "x3", "y"]
+        assert observations["obs_id"].tolist() == list(range(1, 201))
+        assert set(observations["y"].unique()).issubset({0, 1})
+        assert list(indicators.columns) == ["obs_id", "feature", "value"]
+        assert indicators["obs_id"].isin(observations["obs_id"]).all()
+        assert set(indicators["feature"].cat.categories) == {f"s{i}" for i in range(1, 21)}
+        assert (indicators["value"] == 1).all()
+        assert not indicators.duplicated(["obs_id", "feature"]).any()
+
+    def test_high_dimensional_matches_design_matrix(self):
+        """Long-format indicators should be the nonzero cells of the CSR design"""
+        kw = dict(n_dense=2, n_sparse=50, density=0.05, chunk_size=300)
+        X, y, _ = RegressionGenerator(seed=3).generate_design_matrix(n=1000, **kw)
+        tables = RegressionGenerator(seed=3).generate(1000, model="high_dimensional", **kw)
+
+        cells = X[:, 2:].tocoo()
+        indicators = tables["indicators"]
+        assert len(indicators) == cells.nnz
+        assert set(zip(indicators["obs_id"] - 1, indicators["feature"].cat.codes)) == set(
+            zip(cells.row, cells.col)
+        )
+        np.testing.assert_allclose(tables["observations"]["y"], y)
+
+    def test_high_dimensional_chunks_continue(self):
+        """Generating in chunk_size calls equals a single call (same design, obs_id)"""
+        kw = dict(n_dense=2, n_sparse=30, density=0.1)
+        whole = RegressionGenerator(seed=5, chunk_size=100).generate(
+            300, model="high_dimensional", **kw
+        )
+        gen = RegressionGenerator(seed=5, chunk_size=100)
+        parts = [next(gen.iter_chunks(100, **kw)) for _ in range(3)]
+
+        for table in whole:
+            pd.testing.assert_frame_equal(
+                pd.concat([p[table] for p in parts], ignore_index=True), whole[table]
+            )
+
+    def test_multilevel_structure(self):
+        """Clusters should be nested: provider -> facility -> region"""
+        gen = RegressionGenerator(seed=42)
+        df = gen.generate_multilevel(
+            n=20000, n_facilities=50, n_regions=5, n_providers=200
+        )
+
+        assert len(df) == 20000
+        assert df.groupby("provider_id", observed=True)["facility_id"].nunique().max() == 1
+        assert df.groupby("facility_id", observed=True)["region"].nunique().max() == 1
+        sizes = df["facility_id"].value_counts()
+        assert (df["facility_size"] == df["facility_id"].map(sizes).astype(int)).all()
+
+    def test_multilevel_ids_link_to_encounters(self):
+        """Facility IDs should use the EncounterGenerator format"""
+        gen = RegressionGenerator(seed=42)
+        df = gen.generate(1000, model="multilevel", n_facilities=99)
+
+        assert df["facility_id"].astype(str).str.match(r"^FAC-\d{3}$").all()
+        assert df["region"].astype(str).str.match(r"^R\d{2}$").all()
+
+    def test_multilevel_random_intercept_variance(self):
+        """Between-facility variance should reflect sd_facility"""
+        gen = RegressionGenerator(seed=42)
+        df = gen.generate_multilevel(
+            n=200000,
+            n_facilities=99,
+            n_regions=1,
+            coeffs={"x": 0.0, "age": 0.0},
+            sd_region=0.0,
+            sd_facility=0.8,
+            sd_slope=0.0,
+            noise=0.5,
+            cluster_size_sd=0.0,
+        )
+
+        facility_means = df.groupby("facility_id", observed=True)["y"].mean()
+        effects = df.attrs["random_effects"]["facility_intercept"]
+        # 99 clusters: the realized SD is a noisy estimate of sd_facility
+        assert np.std(effects, ddof=1) == pytest.approx(0.8, rel=0.25)
+        assert facility_means.std() == pytest.approx(np.std(effects, ddof=1), rel=0.05)
+        assert np.corrcoef(facility_means.values, effects)[0, 1] > 0.95
+
+    def test_multilevel_attrs_survive_concat(self):
+        """Random effects are plain lists, so pandas can compare attrs on concat"""
+        gen = RegressionGenerator(seed=42)
+        df = gen.generate_multilevel(n=500, n_facilities=20, n_providers=40)
+        effects = df.attrs["random_effects"]
+
+        assert all(isinstance(values, list) for values in effects.values())
+        assert len(effects["facility_intercept"]) == 20
+        assert len(effects["provider"]) == 40
+        combined = pd.concat([df, df], ignore_index=True)
+        assert combined.attrs["random_effects"] == effects
+
+    def test_multilevel_facility_range(self):
+        """Facilities stay within the FAC-001..FAC-099 range of the encounters"""
+        gen = RegressionGenerator(seed=42)
+        df = gen.generate(5000, model="multilevel", cluster_size_sd=0.0)
+
+        assert df["facility_id"].nunique() == 99
+        assert df["facility_id"].astype(str).max() == "FAC-099"
+        with pytest.raises(ValueError, match="n_facilities"):
+            gen.generate_multilevel(n=100, n_facilities=100)
@@ -0,0 +1,58 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("numpy", "pandas", "scipy", "pyarrow")
+
+
+def _run(code: str) -> dict:
+    """Ejecuta codigo en un interprete limpio y retorna su salida JSON"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestStartup:
+    """Heavy dependencies load only when a generator runs (timing: benchmarks.run)"""
+
+    def test_schemas_list_is_light(self):
+        """`schemas list` loads no heavy module"""
+        out = _run(
+            "import contextlib, io, json, runpy, sys\n"
+            "cli = runpy.run_path('__main__.py', run_name='cli')['cli']\n"
+            "buf = io.StringIO()\n"
+            "with contextlib.redirect_stdout(buf):\n"
+            "    cli.main(['schemas', 'list'], standalone_mode=False)\n"
+            f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+            "print(json.dumps({'heavy': heavy, 'output': buf.getvalue()}))"
+        )
+
+        assert out["heavy"] == []
+        assert "medical/demographics" in out["output"]
+
+    def test_api_import_is_light(self):
+        """Importing the FastAPI app does not import generators"""
+        out = _run(
+            "import json, sys\n"
+            "import app.main\n"
+            f"heavy = [m for m in {HEAVY_MODULES!r} + ('app.base_generator',) if m in sys.modules]\n"
+            "print(json.dumps({'heavy': heavy}))"
+        )
+
+        assert out["heavy"] == []
+
+    def test_generator_loaded_on_demand(self):
+        """Registry resolves generator classes on first use"""
+        out = _run(
+            "import json, sys\n"
+            "from app import registry\n"
+            "before = 'app.cohort' in sys.modules\n"
+            "cls = registry.get_spec('cohort').load()\n"
+            "print(json.dumps({'before': before, 'after': 'app.cohort' in sys.modules,"
+            " 'name': cls.__name__}))"
+        )
+
+        assert out == {"before": False, "after": True, "name": "CohortPipeline"}
@@ -0,0 +1,105 @@
+import sqlite3
+import pytest
+import pandas as pd
+import numpy as np
+from app.cohort import CohortPipeline
+from app.storage import CSVSink, SQLiteSink, ParquetSink, open_sink, sqlite_path
+
+
+def _chunk(start, n):
+    return pd.DataFrame(
+        {
+            "encounter_key": np.arange(start, start + n),
+            "value": np.linspace(0, 1, n),
+            "flag": np.arange(n) % 2 == 0,
+            "region": np.where(np.arange(n) % 2 == 0, "R13", "R05"),
+            "encounter_date": pd.to_datetime(["2021-03-01", "2022-07-15"] * (n // 2)),
+        }
+    )
+
+
+class TestSQLiteSink:
+    """Tests for SQLiteSink"""
+
+    def test_sqlite_path(self):
+        """URL parsing"""
+        assert sqlite_path("sqlite:///./synthetic.db") == "./synthetic.db"
+        assert sqlite_path("sqlite://") == ":memory:"
+        assert sqlite_path("out.db") == "out.db"
+
+    def test_chunks_appended(self, tmp_path):
+        """Chunks are appended and types preserved"""
+        db = tmp_path / "out.db"
+        with SQLiteSink(db) as sink:
+            sink.write("encounters", _chunk(0, 10))
+            sink.write("encounters", _chunk(10, 10))
+
+        con = sqlite3.connect(db)
+        df = pd.read_sql("SELECT * FROM encounters", con)
+        assert len(df) == 20
+        assert df["encounter_key"].tolist() == list(range(20))
+        assert set(df["flag"]) == {0, 1}
+        assert df["encounter_date"].iloc[0] == "2021-03-01"
+
+    def test_indexes_created_after_load(self, tmp_path):
+        """Key columns are indexed on close"""
+        db = tmp_path / "out.db"
+        with SQLiteSink(f"sqlite:///{db}") as sink:
+            sink.write("encounters", _chunk(0, 10))
+
+        con = sqlite3.connect(db)
+        indexes = [r[1] for r in con.execute("PRAGMA index_list('encounters')")]
+        assert "ix_encounters_encounter_key" in indexes
+
+    def test_replaces_existing_table(self, tmp_path):
+        """A new load replaces the previous table"""
+        db = tmp_path / "out.db"
+        for _ in range(2):
+            with SQLiteSink(db) as sink:
+                sink.write("encounters", _chunk(0, 10))
+
+        con = sqlite3.connect(db)
+        assert con.execute("SELECT COUNT(*) FROM encounters").fetchone()[0] == 10
+
+    def test_cohort_to_sqlite(self, tmp_path):
+        """Cohort foreign keys join inside SQLite"""
+        db = tmp_path / "cohort.db"
+        rows = CohortPipeline(seed=42, chunk_size=30).run(100, db, format="sqlite")
+
+        con = sqlite3.connect(db)
+        orphans = con.execute(
+            "SELECT COUNT(*) FROM encounters e "
+            "LEFT JOIN patients p ON e.patient_key = p.patient_key "
+            "WHERE p.patient_key IS NULL"
+        ).fetchone()[0]
+        assert orphans == 0
+        assert con.execute("SELECT COUNT(*) FROM labs").fetchone()[0] == rows["labs"]
+
+
+class TestParquetSink:
+    """Tests for ParquetSink"""
+
+    def test_hive_partitions(self, tmp_path):
+        """Partitions by region and derived year"""
+        pytest.importorskip("pyarrow")
+        with ParquetSink(tmp_path) as sink:
+            sink.write("encounters", _chunk(0, 10))
+            sink.write("encounters", _chunk(10, 10))
+
+        assert (tmp_path / "encounters" / "region=R13" / "year=2021").is_dir()
+        df = pd.read_parquet(tmp_path / "encounters")
+        assert len(df) == 20
+        assert sorted(df["encounter_key"]) == list(range(20))
+
+
+class TestOpenSink:
+    """Tests for open_sink"""
+
+    def test_csv(self, tmp_path):
+        """Format name resolves to sink class"""
+        assert isinstance(open_sink("csv", tmp_path), CSVSink)
+
+    def test_invalid_format(self, tmp_path):
+        """Unknown format raises ValueError"""
+        with pytest.raises(ValueError):
+            open_sink("xlsx", tmp_path)
@@ -0,0 +1,119 @@
+import pytest
+import pandas as pd
+import numpy as np
+from app.study_designs import CaseControlGenerator, RCTGenerator
+
+
+class TestCaseControlGenerator:
+    """Tests for nested case-control with risk-set sampling"""
+
+    @pytest.fixture(scope="class")
+    def study(self):
+        return CaseControlGenerator(seed=42).generate(200_000, controls_per_case=3)
+
+    def test_sets(self, study):
+        """Each set has one case followed by k controls"""
+        sizes = study.groupby("set_id")["case"].agg(["sum", "size"])
+
+        assert (sizes["sum"] == 1).all()
+        assert (sizes["size"] == 4).all()
+        assert study.attrs["unmatched"] == 0
+        assert study.groupby("set_id")["case"].first().eq(1).all()
+
+    def test_matching_criteria(self, study):
+        """Controls match sex/region exactly and age within caliper"""
+        cases = study[study["case"] == 1].set_index("set_id")
+        controls = study[study["case"] == 0]
+        ref = cases.loc[controls["set_id"]]
+
+        assert (controls["sex"].to_numpy() == ref["sex"].to_numpy()).all()
+        assert (controls["region"].to_numpy() == ref["region"].to_numpy()).all()
+        assert (np.abs(controls["age"].to_numpy() - ref["age"].to_numpy()) <= 2).all()
+
+    def test_controls_at_risk(self, study):
+        """Controls are still event-free at the case's index day"""
+        controls = study[study["case"] == 0]
+
+        assert (controls["exit_day"] > controls["index_day"]).all()
+        assert not controls.duplicated(["set_id", "subject_id"]).any()
+
+    def test_odds_ratio_estimates_rate_ratio(self, study):
+        """Density sampling: crude OR approximates the rate ratio"""
+        cases = study[study["case"] == 1]["exposed"].mean()
+        controls = study[study["case"] == 0]["exposed"].mean()
+        odds_ratio = (cases / (1 - cases)) / (controls / (1 - controls))
+
+        assert 2.0 < odds_ratio < 3.1
+
+    def test_reproducible(self):
+        """Same seed, same study"""
+        a = CaseControlGenerator(seed=7).generate(20_000)
+        b = CaseControlGenerator(seed=7).generate(20_000)
+
+        pd.testing.assert_frame_equal(a, b)
+
+    def test_source_population_blocks(self):
+        """The source population is generated in blocks: smaller n is a prefix"""
+        gen = CaseControlGenerator(seed=7)
+        large = gen.source_population(gen.BLOCK_SIZE + 500)
+
+        assert large["subject_id"].tolist() == list(range(1, gen.BLOCK_SIZE + 501))
+        pd.testing.assert_frame_equal(
+            CaseControlGenerator(seed=7).source_population(1000), large.head(1000)
+        )
+        assert not gen.random_access
+
+    def test_invalid_params(self):
+        """Invalid parameters raise ValueError"""
+        gen = CaseControlGenerator(seed=42)
+        with pytest.raises(ValueError):
+            gen.generate(1000, controls_per_case=0)
+        with pytest.raises(ValueError):
+            gen.generate(1000, match_on=("smoking",))
+
+
+class TestRCTGenerator:
+    """Tests for randomized trial generator"""
+
+    def test_stratified_balance(self):
+        """Permuted blocks keep each stratum within half a block of balance"""
+        df = RCTGenerator(seed=42).generate(20_000, block_sizes=(4, 6))
+        counts = df.groupby(["stratum", "arm"]).size().unstack(fill_value=0)
+
+        assert (abs(counts["A"] - counts["B"]) <= 3).all()
+
+    def test_blocks_complete_allocation(self):
+        """Every block except the last of each stratum holds the allocation ratio"""
+        df = RCTGenerator(seed=1).generate(
+            5000, allocation=(2, 1), method="block", block_sizes=(3, 6)
+        )
+        blocks = df.groupby("block_id")["arm"].agg(
+            size="size", a=lambda s: (s == "A").sum()
+        )
+        full = blocks.iloc[:-1]
+
+        assert (full["a"] * 3 == full["size"] * 2).all()
+        assert full["size"].isin([3, 6]).all()
+
+    def test_simple_randomization(self):
+        """Simple randomization follows the allocation ratio"""
+        df = RCTGenerator(seed=42).generate(30_000, allocation=(3, 1), method="simple")
+
+        assert abs((df["arm"] == "A").mean() - 0.75) < 0.02
+
+    def test_outcome_by_arm(self):
+        """Outcome probabilities differ by arm"""
+        df = RCTGenerator(seed=42).generate(
+            20_000, outcome_prob={"A": 0.4, "B": 0.1}
+        )
+        rates = df.groupby("arm")["outcome"].mean()
+
+        assert abs(rates["A"] - 0.4) < 0.03
+        assert abs(rates["B"] - 0.1) < 0.03
+
+    def test_invalid_block_sizes(self):
+        """Block sizes must be multiples of the allocation total"""
+        with pytest.raises(ValueError):
+            RCTGenerator(seed=42).generate(100, allocation=(2, 1), block_sizes=(4,))
+        with pytest.raises(ValueError):
+            RCTGenerator(seed=42).generate(100, method="minimization")
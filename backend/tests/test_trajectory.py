@@ -0,0 +1,139 @@
+import pytest
+import pandas as pd
+from app.trajectory import TrajectoryGenerator, DiseaseModel, DEFAULT_MODELS
+
+
+def _progressive_model(**kwargs):
+    params = dict(
+        name="test",
+        states=["a", "b"],
+        transitions=[[0.9, 0.1], [0.0, 1.0]],
+        initial=[1.0, 0.0],
+        cie10=[None, "E11.9"],
+        encounter_rate=[1.0, 1.0],
+        lab="HbA1c",
+        lab_unit="%",
+        lab_mean=[5.0, 8.0],
+        lab_drift=1.0,
+    )
+    params.update(kwargs)
+    return DiseaseModel(**params)
+
+
+class TestDiseaseModel:
+    """Tests for DiseaseModel validation"""
+
+    def test_default_models_valid(self):
+        """Default models build transition matrices"""
+        for model in DEFAULT_MODELS:
+            assert model.transitions.shape == (len(model.states), len(model.states))
+
+    def test_rows_must_sum_to_one(self):
+        """Invalid transition matrix raises ValueError"""
+        with pytest.raises(ValueError):
+            _progressive_model(transitions=[[0.5, 0.1], [0.0, 1.0]])
+
+    def test_lengths_must_match(self):
+        """Per-state lists must match number of states"""
+        with pytest.raises(ValueError):
+            _progressive_model(cie10=["E11.9"])
+
+
+class TestTrajectoryGenerator:
+    """Tests for TrajectoryGenerator"""
+
+    def test_tables(self):
+        """Linked tables are generated"""
+        tables = TrajectoryGenerator(seed=42).generate(200, years=2)
+
+        assert len(tables["patients"]) == 200
+        assert tables["encounters"]["patient_key"].isin(tables["patients"]["patient_key"]).all()
+        assert tables["diagnoses"]["encounter_key"].isin(tables["encounters"]["encounter_key"]).all()
+        assert tables["labs"]["encounter_key"].isin(tables["encounters"]["encounter_key"]).all()
+
+    def test_initial_state_per_model(self):
+        """Each patient has an initial state for every model"""
+        tables = TrajectoryGenerator(seed=42).generate(100, years=1)
+        initial = tables["state_changes"].query("from_state == ''")
+
+        assert len(initial) == 100 * len(DEFAULT_MODELS)
+
+    def test_states_progress_forward(self):
+        """Upper-triangular chains never regress"""
+        tables = TrajectoryGenerator(seed=42).generate(500, years=5)
+        changes = tables["state_changes"].query("from_state != ''")
+        order = {m.name: {s: i for i, s in enumerate(m.states)} for m in DEFAULT_MODELS}
+        rank = lambda col: changes.apply(lambda r: order[r["model"]][r[col]], axis=1)
+
+        assert len(changes) > 0
+        assert (rank("to_state") > rank("from_state")).all()
+
+    def test_labs_follow_state(self):
+        """Lab values rise with disease state and time in state"""
+        gen = TrajectoryGenerator(seed=1, models=[_progressive_model()])
+        tables = gen.generate(300, years=3, lab_probability=1.0)
+        labs = tables["labs"].merge(tables["diagnoses"], on=["encounter_key", "patient_key"])
+
+        sick = labs[labs["cie10_code"] == "E11.9"]
+        healthy = labs[labs["cie10_code"] == "Z00.0"]
+        assert sick["value"].mean() > healthy["value"].mean() + 2
+        early = sick[sick["test_date"] < "2016-01-01"]["value"].mean()
+        late = sick[sick["test_date"] >= "2017-06-01"]["value"].mean()
+        assert late > early
+
+    def test_no_encounters_before_birth(self):
+        """Patients are not seen before they are born"""
+        tables = TrajectoryGenerator(seed=42).generate(1000, years=10)
+        enc = tables["encounters"].merge(tables["patients"], on="patient_key")
+
+        assert (enc["encounter_date"] >= enc["birth_date"]).all()
+
+    def test_no_transitions_before_birth(self):
+        """Unborn patients keep their state until they are born"""
+        tables = TrajectoryGenerator(seed=42).generate(300, years=20, start_date="1985-01-01")
+        changes = tables["state_changes"].query("from_state != ''")
+        changes = changes.merge(tables["patients"], on="patient_key")
+
+        assert (tables["patients"]["birth_date"] > "1985-01-01").any()
+        assert len(changes) > 0
+        assert (changes["change_date"] >= changes["birth_date"]).all()
+
+    def test_one_chunk_per_patient_block(self):
+        """Monthly steps are buffered into one set of tables per patient block"""
+        gen = TrajectoryGenerator(seed=42, chunk_size=40)
+        chunks = list(gen.iter_chunks(100, years=2))
+
+        assert len(chunks) == 3
+        for chunk in chunks:
+            assert set(chunk) == {"patients", "encounters", "diagnoses", "labs", "state_changes"}
+        assert [len(chunk["patients"]) for chunk in chunks] == [40, 40, 20]
+
+    def test_every_encounter_has_diagnosis(self):
+        """Each encounter has a primary diagnosis"""
+        tables = TrajectoryGenerator(seed=42).generate(200, years=2)
+        primary = tables["diagnoses"].query("dx_rank == 1")
+
+        assert len(primary) == len(tables["encounters"])
+
+    def test_chunked_matches_keys(self, tmp_path):
+        """Chunked streaming writes consistent unique keys"""
+        rows = TrajectoryGenerator(seed=42, chunk_size=40).run(100, tmp_path, years=1)
+        encounters = pd.read_csv(tmp_path / "encounters.csv")
+
+        assert rows["patients"] == 100
+        assert encounters["encounter_key"].is_unique
+
+    def test_reproducibility(self):
+        """Same seed yields same trajectories"""
+        a = TrajectoryGenerator(seed=42).generate(100, years=2)
+        b = TrajectoryGenerator(seed=42).generate(100, years=2)
+
+        for table in a:
+            pd.testing.assert_frame_equal(a[table], b[table])
+
+    def test_invalid_params(self):
+        """Invalid parameters raise ValueError"""
+        with pytest.raises(ValueError):
+            TrajectoryGenerator(models=[])
+        with pytest.raises(ValueError):
+            list(TrajectoryGenerator().iter_chunks(10, years=0))